@@ -2,7 +2,6 @@
 adviceBot - Logs Twitch chat and uses OpenAI to generate Rocket League advice every 10 minutes.
 """
 import asyncio
-import base64
 import json
 import logging
 import os
@@ -14,6 +13,7 @@ import requests
 from dotenv import load_dotenv
 from twitchio.ext import commands
 from baseBot import BaseBot
+from audio_store import upload_audio
 
 # Ensure .env is loaded from project directory (CredentialManager may load before cwd is set)
 load_dotenv(Path(__file__).resolve().parent / ".env")
@@ -142,7 +142,7 @@ class AdviceBot(BaseBot):
             logger.info("=" * 60)
 
             # Generate TTS via TTS Monster (like declare_overlay)
-            audio_data_url = None
+            audio_url = None
             if self.tts_api_token:
                 try:
                     payload_tts = {
@@ -161,11 +161,10 @@ class AdviceBot(BaseBot):
                     if response.status_code == 200:
                         result = response.json()
                         if result.get("status") == 200:
-                            audio_url = result.get("url")
-                            audio_response = requests.get(audio_url)
+                            tts_url = result.get("url")
+                            audio_response = requests.get(tts_url)
                             if audio_response.status_code == 200:
-                                audio_base64 = base64.b64encode(audio_response.content).decode('utf-8')
-                                audio_data_url = f"data:audio/wav;base64,{audio_base64}"
+                                audio_url = await upload_audio(audio_response.content, "audio/wav")
                     else:
                         logger.warning(f"TTS Monster request failed: {response.status_code}")
                 except Exception as e:
@@ -174,7 +173,7 @@ class AdviceBot(BaseBot):
             payload = {
                 "type": "advice",
                 "message": advice,
-                "audio_data_url": audio_data_url,
+                "audio_url": audio_url,
             }
             try:
                 await self.send_to_overlay(json.dumps(payload))
@@ -0,0 +1,152 @@
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AUDIO_HOST = "localhost"
+AUDIO_PORT = 6791
+AUDIO_SERVER_URL = f"http://{AUDIO_HOST}:{AUDIO_PORT}"
+MAX_UPLOAD_BYTES = 20 * 2**20
+
+
+class AudioBlobCache:
+    def __init__(self, max_bytes: int = 64 * 2**20, max_entries: int = 256):
+        """
+        In-memory LRU store for short-lived TTS audio clips.
+
+        Bots upload a clip once and broadcast only its id through the relay;
+        overlays then fetch the bytes over HTTP. Eviction is by total size so a
+        burst of long clips can't grow the relay process without bound.
+
+        Args:
+            max_bytes: Total bytes kept before the least recently used clips are dropped
+            max_entries: Upper bound on the number of clips regardless of size
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._blobs: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._blobs)
+
+    def put(self, data: bytes, mime_type: str = "audio/wav") -> str:
+        """Store a clip and return its id."""
+        blob_id = uuid.uuid4().hex
+        self._blobs[blob_id] = (data, mime_type)
+        self.total_bytes += len(data)
+        self._evict()
+        return blob_id
+
+    def get(self, blob_id: str) -> Optional[Tuple[bytes, str]]:
+        """Return (bytes, mime type) for a clip, or None if unknown or evicted."""
+        blob = self._blobs.get(blob_id)
+        if blob is None:
+            self.misses += 1
+            return None
+        self._blobs.move_to_end(blob_id)
+        self.hits += 1
+        return blob
+
+    def _evict(self):
+        # Always keep the newest clip, even if it alone exceeds the budget
+        while len(self._blobs) > 1 and (self.total_bytes > self.max_bytes or len(self._blobs) > self.max_entries):
+            _, (data, _) = self._blobs.popitem(last=False)
+            self.total_bytes -= len(data)
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        return {
+            "clips": len(self._blobs),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+        }
+
+
+async def start_audio_server(cache: AudioBlobCache, host: str = AUDIO_HOST, port: int = AUDIO_PORT,
+                             setup: Optional[Callable] = None):
+    """
+    Serve the audio cache over HTTP:
+      POST /audio        raw bytes (Content-Type is kept) -> {"id": ..., "url": ...}
+      GET  /audio/<id>   the stored clip
+
+    Args:
+        cache: Clip store to serve
+        host: Interface to listen on
+        port: HTTP port
+        setup: Called with the aiohttp application to register more routes
+
+    Returns:
+        The aiohttp AppRunner; call ``await runner.cleanup()`` to stop it.
+    """
+    from aiohttp import web
+
+    # Hand out URLs for the address this server actually listens on
+    server_url = f"http://{host}:{port}"
+
+    # Overlays are loaded from file:// in OBS, so fetches are always cross-origin
+    cors = {"Access-Control-Allow-Origin": "*"}
+
+    async def upload(request):
+        data = await request.read()
+        if not data:
+            return web.json_response({"error": "empty body"}, status=400, headers=cors)
+        blob_id = cache.put(data, request.content_type or "application/octet-stream")
+        logger.debug(f"Stored audio clip {blob_id} ({len(data)} bytes, {cache.stats()})")
+        return web.json_response({"id": blob_id, "url": f"{server_url}/audio/{blob_id}"}, headers=cors)
+
+    async def download(request):
+        blob = cache.get(request.match_info["blob_id"])
+        if blob is None:
+            return web.Response(status=404, headers=cors)
+        data, mime_type = blob
+        # Ids are never reused, so the browser may cache a clip forever
+        headers = dict(cors, **{"Cache-Control": "public, max-age=31536000, immutable"})
+        return web.Response(body=data, content_type=mime_type, headers=headers)
+
+    app = web.Application(client_max_size=MAX_UPLOAD_BYTES)
+    app.router.add_post("/audio", upload)
+    app.router.add_get("/audio/{blob_id}", download)
+    if setup is not None:
+        setup(app)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Audio blob server started on {server_url}/audio")
+    return runner
+
+
+async def upload_audio(data: bytes, mime_type: str = "audio/wav", server_url: str = AUDIO_SERVER_URL) -> Optional[str]:
+    """
+    Upload a clip to the relay's audio endpoint.
+
+    Args:
+        data: Raw audio bytes
+        mime_type: Content type to serve the clip with
+        server_url: Base URL of the audio endpoint
+
+    Returns:
+        Optional[str]: URL overlays can fetch the clip from, or None if the upload failed
+    """
+    import aiohttp
+
+    try:
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.post(f"{server_url}/audio", data=data, headers={"Content-Type": mime_type}) as resp:
+                if resp.status != 200:
+                    logger.error(f"Audio upload failed: {resp.status} - {await resp.text()}")
+                    return None
+                result = await resp.json()
+                return result["url"]
+    except Exception as e:
+        logger.error(f"Could not upload audio to {server_url}: {e}")
+        return None
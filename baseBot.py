@@ -1,21 +1,25 @@
 import os
 import asyncio
-import websockets
 import logging
+import websockets
 from twitchio.ext import commands
-from typing import Optional, List
+from typing import Optional, List, Iterable, Tuple, Dict, AsyncIterator
 from dotenv import load_dotenv
 from pathlib import Path
-from credential_manager import CredentialManager
-import aiohttp
+from credential_manager import AsyncCredentialManager
+from helix_client import HelixClient, PRIORITY_MODERATION, PRIORITY_LOOKUP, PRIORITY_VIP, PRIORITY_READ
+from user_cache import UserIdCache
+from timeout_tracker import TimeoutTracker
+from overlay_outbox import OverlayOutbox
+from moderation_outbox import ModerationOutbox
 import json
 from datetime import datetime, timezone
-import tempfile
-import playsound
-import requests
-from gtts import gTTS
 import time
 import re
+import random
+
+# Optional subsystems (aiohttp, gTTS/playsound, requests, Selenium)
+# are imported on first use so bots that never need them start faster.
 
 # Configure logging
 logging.basicConfig(
@@ -24,7 +28,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Upper bound on in-flight requests for bulk moderation (matches the Helix pool size)
+BULK_MAX_CONCURRENCY = 20
+# Minimum seconds between bulk moderation progress updates to the overlay
+BULK_PROGRESS_INTERVAL = 0.25
+# Workers running queued timeouts and chat announcements off the game locks
+MODERATION_WORKERS = 4
+# Relay reconnect backoff: a quick first retry (relay restarts take milliseconds),
+# then exponential growth with full jitter up to the cap
+RECONNECT_FIRST_DELAY = 0.05
+RECONNECT_BASE_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+
 class BaseBot(commands.Bot):
+    # Relay topics this bot receives; overlay actions are routed as "action:<name>"
+    OVERLAY_TOPICS = ["action:*"]
+    # Overlay actions this bot answers as requests (see relay_rpc.py and on_websocket_request)
+    OVERLAY_REQUESTS: List[str] = []
+
     def __init__(self, 
                  overlay_ws_url: str,
                  prefix: str = '!',
@@ -40,7 +61,7 @@ class BaseBot(commands.Bot):
             require_client_id: Whether to require CLIENT_ID and CLIENT_SECRET
         """
         # Initialize credential manager
-        self.cred_manager = CredentialManager()
+        self.cred_manager = AsyncCredentialManager()
         
         # Validate environment variables
         self.token = self.cred_manager.get_valid_token()
@@ -72,8 +93,21 @@ class BaseBot(commands.Bot):
         
         # WebSocket settings
         self.overlay_ws_url = overlay_ws_url
-        self.ws: Optional[websockets.WebSocketClientProtocol] = None
+        self.ws = None  # websockets client connection, set by connect_websocket
+        self.outbox = OverlayOutbox()  # messages waiting for the relay while it is unreachable
         self.token_refresh_task = None
+
+        # Shared, connection-pooled Helix client for moderation and lookups
+        self.helix = HelixClient(self.client_id, lambda: self.token)
+        # login -> user ID cache, fed from chat tags and batched /users lookups
+        self.user_ids = UserIdCache(self._fetch_user_ids)
+        # Live index of active timeouts, seeded once from Helix and kept current by our own calls
+        self.timeouts = TimeoutTracker()
+        self.timeouts_seeded = False
+        self._timeouts_changed = asyncio.Event()
+        self.timeout_expiry_task = None
+        # Timeouts and announcements queued by game logic (queue_timeout / queue_announce)
+        self.moderation = ModerationOutbox(MODERATION_WORKERS, on_failure=self._moderation_failed)
         
         # TTS configuration
         self.tts_api_url = "https://api.console.tts.monster/generate"
@@ -90,11 +124,14 @@ class BaseBot(commands.Bot):
         self._last_scraped_domain = None  # Track which domain we last scraped
 
     async def _token_refresh_loop(self):
-        """Background task to periodically check and refresh token."""
+        """Background task that refreshes the token just before it expires."""
         while True:
             try:
-                # Get a valid token (will refresh if needed)
-                token = self.cred_manager.get_valid_token()
+                # Sleep until the token enters the refresh buffer
+                await asyncio.sleep(self.cred_manager.seconds_until_refresh())
+
+                # Get a valid token (non-blocking; refreshes if needed)
+                token = await self.cred_manager.get_valid_token_async()
                 if token and token != self.token:
                     logger.info("Token refreshed, reconnecting bot...")
                     self.token = token
@@ -102,8 +139,10 @@ class BaseBot(commands.Bot):
                     # Reconnect the bot with new token
                     # await self.close()
                     await self.connect()
-                    
-                await asyncio.sleep(60)  # Check every minute
+                elif not token:
+                    await asyncio.sleep(60)  # Wait before retrying a failed refresh
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Error in token refresh loop: {e}")
                 await asyncio.sleep(60)  # Wait before retrying
@@ -113,6 +152,11 @@ class BaseBot(commands.Bot):
         logger.info(f'Logged in as {self.nick}')
         # Start token refresh task now that event loop is running
         self.token_refresh_task = asyncio.create_task(self._token_refresh_loop())
+        # Open the Helix connection pool before the first moderation call needs it
+        asyncio.create_task(self.helix.warm_up())
+        asyncio.create_task(self._prefetch_own_ids())
+        self.timeout_expiry_task = asyncio.create_task(self._timeout_expiry_loop())
+        self.moderation.start()
         # Only connect to WebSocket if overlay URL is provided
         if self.overlay_ws_url is not None:
             self.websocket_task = asyncio.create_task(self.connect_websocket())
@@ -122,6 +166,32 @@ class BaseBot(commands.Bot):
         # uid = await self.get_user_id("eros__rl")
         # await self.untimeout_user(uid, "eros__rl")
 
+    async def _prefetch_own_ids(self):
+        """Resolve the moderator and broadcaster IDs in a single batched lookup."""
+        ids = await self.user_ids.resolve_many([self.nick, self.channel_name])
+        if self.moderator_id is None:
+            self.moderator_id = ids.get(self.nick)
+        if self.broadcaster_id is None:
+            self.broadcaster_id = ids.get(self.channel_name)
+
+    def run_event(self, event_name, *args):
+        """Learn login -> ID mappings from chat tags before any handler runs."""
+        if event_name == "message" and args:
+            self._harvest_user_ids(args[0])
+        return super().run_event(event_name, *args)
+
+    def _harvest_user_ids(self, message):
+        try:
+            author = message.author
+            if author is not None and author.id:
+                self.user_ids.learn(author.name, author.id)
+            tags = message.tags or {}
+            room_id = tags.get("room-id")
+            if room_id and message.channel is not None:
+                self.user_ids.learn(message.channel.name, room_id)
+        except Exception as e:
+            logger.debug(f"Could not harvest user ID from message tags: {e}")
+
     async def get_broadcaster_id(self):
         if self.broadcaster_id is None:
             self.broadcaster_id = await self.get_user_id(self.channel_name)
@@ -130,6 +200,42 @@ class BaseBot(commands.Bot):
                 return
         return self.broadcaster_id
 
+    async def iter_banned_users(self) -> AsyncIterator[dict]:
+        """
+        Stream banned/timed-out users from the channel, following the
+        pagination cursor until every page has been read.
+        
+        Yields:
+            dict: One Helix banned-user item at a time
+        """
+        # Get broadcaster ID from the channel name
+        self.broadcaster_id = await self.get_broadcaster_id()
+
+        cursor = None
+        while True:
+            params = {"broadcaster_id": self.broadcaster_id, "first": 100}
+            if cursor:
+                params["after"] = cursor
+            try:
+                response = await self.helix.request(
+                    "GET",
+                    "/moderation/banned",
+                    params=params,
+                    priority=PRIORITY_READ
+                )
+            except Exception as e:
+                logger.error(f"error getting banned users: {str(e)}")
+                return
+            if response.status != 200:
+                logger.error(f"Failed to fetch banned list. Status: {response.status}, Error: {response.text}")
+                return
+            payload = response.data or {}
+            for item in payload.get('data', []):
+                yield item
+            cursor = (payload.get('pagination') or {}).get('cursor')
+            if not cursor:
+                return
+
     async def get_banned_users(self):
         """
         Get a list of banned users from the channel.
@@ -138,31 +244,62 @@ class BaseBot(commands.Bot):
             None
             
         Returns:
-            list: A list of banned users
+            list: A list of banned users (all pages)
         """
+        return [item async for item in self.iter_banned_users()]
 
-        # Get broadcaster ID from the channel name
-        self.broadcaster_id = await self.get_broadcaster_id()
+    async def refresh_timeouts(self) -> List[dict]:
+        """
+        Re-seed the timeout index from a full paginated fetch.
+        
+        Returns:
+            list: Active timeouts, soonest to expire first
+        """
+        items = await self.get_banned_users()
+        count = self.timeouts.seed(items, self._parse_iso8601_utc)
+        self.timeouts_seeded = True
+        self._timeouts_changed.set()
+        logger.info(f"Timeout index seeded with {count} active timeouts")
+        return self.timeouts.soonest()
 
-        try:
-            url = f"https://api.twitch.tv/helix/moderation/banned?broadcaster_id={self.broadcaster_id}&first=100"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Client-Id": self.client_id
-            }
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        payload = await response.json()
-                        items = payload.get('data', [])
-                        return items
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to fetch banned list. Status: {response.status}, Error: {error_text}")
-                        return []
-        except Exception as e:
-            logger.error(f"error getting banned users: {str(e)}")
-            return []
+    async def get_active_timeouts(self) -> List[dict]:
+        """Active timeouts from the live index, seeding it on first use."""
+        if not self.timeouts_seeded:
+            return await self.refresh_timeouts()
+        self.timeouts.pop_expired()
+        return self.timeouts.soonest()
+
+    async def _timeout_expiry_loop(self):
+        """Push timeout expirations to the overlay as they happen."""
+        while True:
+            try:
+                self._timeouts_changed.clear()
+                next_expiry = self.timeouts.next_expiry()
+                wait = None if next_expiry is None else max(0.0, next_expiry - time.time())
+                try:
+                    await asyncio.wait_for(self._timeouts_changed.wait(), timeout=wait)
+                    continue  # index changed, recompute the next deadline
+                except asyncio.TimeoutError:
+                    pass
+                expired = self.timeouts.pop_expired()
+                if expired:
+                    logger.info(f"Timeouts expired: {', '.join(e['user'] for e in expired)}")
+                    await self.send_to_overlay(json.dumps({
+                        "type": "timeout_expired",
+                        "users": [e['user'] for e in expired]
+                    }))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in timeout expiry loop: {e}")
+                await asyncio.sleep(1)
+
+    def _format_remaining(self, expires_at: float) -> str:
+        remaining = max(0, int(expires_at - time.time()))
+        days = remaining // 86400
+        hours = (remaining % 86400) // 3600
+        minutes = (remaining % 3600) // 60
+        return f"{days}d {hours}h {minutes}m"
 
     def _parse_iso8601_utc(self, value: str) -> Optional[datetime]:
         if not value:
@@ -185,58 +322,19 @@ class BaseBot(commands.Bot):
         if not (is_broadcaster or is_mod):
             return
 
-        # Ensure broadcaster id is available
-        self.broadcaster_id = await self.get_broadcaster_id()
-        items = await self.get_banned_users()
-
-        # Filter to timeouts (non-empty expires_at) and sort by soonest expiration
-        timeouts = [it for it in items if it.get('expires_at')]
+        # Read from the live index (already sorted by soonest expiration)
+        timeouts = await self.get_active_timeouts()
         if not timeouts:
             logger.info("No active timeouts.")
             return
 
-        def sort_key(it):
-            dt = self._parse_iso8601_utc(it.get('expires_at', ''))
-            # None goes to far future
-            return dt or datetime.max.replace(tzinfo=timezone.utc)
-
-        timeouts.sort(key=sort_key)
-
-        # Log line-by-line
-        for it in timeouts:
-            user = it.get('user_login') or it.get('user_name') or it.get('user_id')
-            expires = self._parse_iso8601_utc(it.get('expires_at'))
-            mod = it.get('moderator_login') or it.get('moderator_name')
-            if not expires:
-                logger.info(f"timeout: {user} remaining unknown (by {mod})")
-                continue
-            now_utc = datetime.now(timezone.utc)
-            remaining = expires - now_utc
-            if remaining.total_seconds() < 0:
-                remaining = remaining.__class__(0)
-            days = remaining.days
-            hours = (remaining.seconds // 3600)
-            minutes = (remaining.seconds % 3600) // 60
-            logger.info(f"timeout: {user} {days}d {hours}h {minutes}m remaining (by {mod})")
-
-        # Send structured payload to overlay (no chat output)
+        # Log line-by-line and build the overlay payload in the same pass
         payload_items = []
-        for it in timeouts:
-            user = it.get('user_login') or it.get('user_name') or it.get('user_id')
-            expires = self._parse_iso8601_utc(it.get('expires_at'))
-            if not expires:
-                remaining_str = "unknown"
-            else:
-                now_utc = datetime.now(timezone.utc)
-                remaining = expires - now_utc
-                if remaining.total_seconds() < 0:
-                    remaining = remaining.__class__(0)
-                days = remaining.days
-                hours = (remaining.seconds // 3600)
-                minutes = (remaining.seconds % 3600) // 60
-                remaining_str = f"{days}d {hours}h {minutes}m"
+        for entry in timeouts:
+            remaining_str = self._format_remaining(entry['expires_at'])
+            logger.info(f"timeout: {entry['user']} {remaining_str} remaining (by {entry['moderator']})")
             payload_items.append({
-                "user": user,
+                "user": entry['user'],
                 "remaining": remaining_str,
             })
 
@@ -260,36 +358,18 @@ class BaseBot(commands.Bot):
             logger.info("No overlay WebSocket URL provided, skipping connection")
             return
 
-        # retry_delay = 1
-        # max_delay = 30
-        
-        # while True:
-        #     try:
-        #         if self.ws is None or self.ws.state != websockets.State.OPEN:
-        #             self.ws = await websockets.connect(self.overlay_ws_url)
-        #             logger.info("Connected to WebSocket server")
-        #             retry_delay = 1  # Reset delay on successful connection
-                
-        #         # Prevent tight loop
-        #         await asyncio.sleep(1)
-                        
-        #     except websockets.exceptions.ConnectionClosed as e:
-        #         logger.warning(f"WebSocket connection closed: {e}")
-        #         self.ws = None
-        #     except Exception as e:
-        #         logger.error(f"WebSocket connection error: {e}")
-        #         self.ws = None
-            
-        #     if self.ws is None:
-        #         # Exponential backoff with max delay
-        #         retry_delay = min(retry_delay * 2, max_delay)
-        #         logger.info(f"Reconnecting in {retry_delay} seconds...")
-        #         await asyncio.sleep(retry_delay)
+        attempt = 0
         while True:
             logger.info("Attempting to connect to WebSocket server...")
             try:
                 async with websockets.connect(self.overlay_ws_url) as websocket:
                     logger.info("Connected to WebSocket server")
+                    attempt = 0
+                    await websocket.send(json.dumps({"relay": "subscribe", "topics": self.OVERLAY_TOPICS}))
+                    if self.OVERLAY_REQUESTS:
+                        await websocket.send(json.dumps({"relay": "register", "actions": self.OVERLAY_REQUESTS}))
+                    # Deliver what was buffered while we were away before anything new
+                    await self._flush_outbox(websocket)
                     self.ws = websocket
                     await self.upon_connection()
                     # Keep connection alive and handle messages
@@ -310,8 +390,35 @@ class BaseBot(commands.Bot):
             except Exception as e:
                 self.ws = None
                 logger.error(f"Error: {e}")
-                
-            await asyncio.sleep(2)
+
+            delay = self._reconnect_delay(attempt)
+            attempt += 1
+            logger.info(f"Reconnecting in {delay:.2f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _reconnect_delay(attempt: int) -> float:
+        """Backoff before reconnect attempt number `attempt` (0-based)."""
+        if attempt == 0:
+            return RECONNECT_FIRST_DELAY
+        cap = min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * (2 ** (attempt - 1)))
+        return random.uniform(RECONNECT_FIRST_DELAY, cap)
+
+    async def _flush_outbox(self, websocket):
+        """Send buffered overlay messages in order; stops (keeping the rest) if the socket fails."""
+        if not len(self.outbox):
+            return
+        count = len(self.outbox)
+        while True:
+            text = self.outbox.pop()
+            if text is None:
+                break
+            try:
+                await websocket.send(text)
+            except Exception:
+                self.outbox.push_front(text)
+                raise
+        logger.info(f"Flushed {count} buffered overlay messages ({self.outbox.stats()})")
 
     async def handle_websocket_message(self, message: str):
         """
@@ -324,6 +431,9 @@ class BaseBot(commands.Bot):
         try:
             data = json.loads(message)
             if isinstance(data, dict) and data.get("action"):
+                if data.get("request_id") is not None and data["action"] in self.OVERLAY_REQUESTS:
+                    await self._answer_request(data)
+                    return
                 # Let child classes handle specific actions
                 await self.on_websocket_action(data.get("action"), data)
         except json.JSONDecodeError:
@@ -332,6 +442,32 @@ class BaseBot(commands.Bot):
         except Exception as e:
             logger.debug(f"Error processing websocket message: {e}")
 
+    async def _answer_request(self, data: dict):
+        """Reply to a routed overlay request; the relay delivers it to the requester only."""
+        try:
+            reply = await self.on_websocket_request(data["action"], data)
+        except Exception as e:
+            logger.error(f"Error answering {data['action']} request: {e}")
+            reply = {"error": str(e)}
+        if reply is None:
+            reply = {"error": "unhandled"}
+        # Replies go straight out: a requester that reconnects asks again
+        if self.ws:
+            await self.ws.send(json.dumps(dict(reply, reply_to=data["request_id"])))
+
+    async def on_websocket_request(self, action: str, data: dict) -> Optional[dict]:
+        """
+        Answer an overlay request for one of OVERLAY_REQUESTS. Override in child classes.
+
+        Args:
+            action: The action name (e.g., "get_king")
+            data: The full request data
+
+        Returns:
+            Optional[dict]: The reply message, or None if the action isn't handled
+        """
+        return None
+
     async def on_websocket_action(self, action: str, data: dict):
         """
         Handle specific websocket actions. Override in child classes.
@@ -349,7 +485,9 @@ class BaseBot(commands.Bot):
             return
 
         if self.ws is None or self.ws.state != websockets.State.OPEN:
-            logger.warning("WebSocket not connected. Message not sent.")
+            # Buffer until connect_websocket reconnects and flushes
+            self.outbox.put(text)
+            logger.debug(f"WebSocket not connected. Buffered message ({len(self.outbox)} queued).")
             return
             
         try:
@@ -357,9 +495,10 @@ class BaseBot(commands.Bot):
             logger.debug(f"Successfully sent message to overlay: {text}")
         except Exception as e:
             logger.error(f"Error sending message to overlay: {e}")
+            self.outbox.put(text)
             self.ws = None
 
-    async def timeout_user(self, user_id: str, username: str, duration: int = 30, reason: str = "Timeout"):
+    async def timeout_user(self, user_id: str, username: str, duration: int = 30, reason: str = "Timeout") -> bool:
         """
         Timeout a user in the channel.
         
@@ -368,6 +507,9 @@ class BaseBot(commands.Bot):
             username: The username of the user (for logging)
             duration: Duration of the timeout in seconds
             reason: Reason for the timeout
+            
+        Returns:
+            bool: True if successful, False otherwise
         """
         try:
             self.broadcaster_id = await self.get_broadcaster_id()
@@ -377,36 +519,62 @@ class BaseBot(commands.Bot):
                 self.moderator_id = await self.get_user_id(self.nick)
                 if not self.moderator_id:
                     logger.error(f"Could not get moderator ID for {self.nick}")
-                    return
+                    return False
 
-            # Prepare the request
-            url = f"https://api.twitch.tv/helix/moderation/bans?broadcaster_id={self.broadcaster_id}&moderator_id={self.moderator_id}"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Client-Id": self.client_id,
-                "Content-Type": "application/json"
-            }
-            
             data = {"data":{"user_id": user_id,"duration": duration,"reason": reason}}
 
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=data) as response:
-                    if response.status == 200:
-                        logger.info(f"Successfully timed out {username} for {duration} seconds")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to timeout {username}. Status: {response.status}, Error: {error_text}")
+            response = await self.helix.request(
+                "POST",
+                "/moderation/bans",
+                params={"broadcaster_id": self.broadcaster_id, "moderator_id": self.moderator_id},
+                json=data,
+                priority=PRIORITY_MODERATION
+            )
+            if response.status == 200:
+                logger.info(f"Successfully timed out {username} for {duration} seconds")
+                self.timeouts.add(user_id, username, time.time() + duration, self.nick)
+                self._timeouts_changed.set()
+                return True
+            else:
+                logger.error(f"Failed to timeout {username}. Status: {response.status}, Error: {response.text}")
+                return False
 
         except Exception as e:
             logger.error(f"Error timing out user {username}: {str(e)}")
+            return False
+
+    def queue_timeout(self, user_id: str, username: str, duration: int = 30, reason: str = "Timeout") -> asyncio.Future:
+        """
+        Queue a timeout on the moderation outbox and return immediately.
+        Call this while holding a game lock instead of awaiting timeout_user.
+
+        Returns:
+            asyncio.Future: Resolves to timeout_user's result
+        """
+        return self.moderation.submit(
+            ("user", user_id),
+            f"timeout {username} for {duration}s",
+            lambda: self.timeout_user(user_id, username, duration=duration, reason=reason),
+        )
 
-    async def untimeout_user(self, user_id: str, username: str) -> None:
+    def queue_announce(self, channel, text: str) -> asyncio.Future:
+        """Queue a chat message; announcements to a channel keep their order."""
+        return self.moderation.submit(("chat", channel.name), f"announce {text!r}", lambda: channel.send(text))
+
+    def _moderation_failed(self, job, result):
+        reason = result if isinstance(result, BaseException) else "request rejected"
+        logger.error(f"Queued moderation action failed: {job.description} ({reason}; {self.moderation.stats()})")
+
+    async def untimeout_user(self, user_id: str, username: str) -> bool:
         """
         Remove an active timeout/ban for a user in the channel.
 
         Args:
             user_id: The Twitch user ID to untimeout/unban
             username: The username of the user (for logging)
+
+        Returns:
+            bool: True if successful, False otherwise
         """
         try:
             self.broadcaster_id = await self.get_broadcaster_id()
@@ -415,29 +583,119 @@ class BaseBot(commands.Bot):
                 self.moderator_id = await self.get_user_id(self.nick)
                 if not self.moderator_id:
                     logger.error(f"Could not get moderator ID for {self.nick}")
-                    return
+                    return False
 
             # DELETE removes the ban/timeout
-            url = (
-                "https://api.twitch.tv/helix/moderation/bans"
-                f"?broadcaster_id={self.broadcaster_id}&moderator_id={self.moderator_id}&user_id={user_id}"
+            response = await self.helix.request(
+                "DELETE",
+                "/moderation/bans",
+                params={"broadcaster_id": self.broadcaster_id, "moderator_id": self.moderator_id, "user_id": user_id},
+                priority=PRIORITY_MODERATION
             )
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Client-Id": self.client_id,
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(url, headers=headers) as response:
-                    if response.status in (200, 204):
-                        logger.info(f"Successfully removed timeout/ban for {username}")
-                    else:
-                        error_text = await response.text()
-                        logger.error(
-                            f"Failed to remove timeout/ban for {username}. Status: {response.status}, Error: {error_text}"
-                        )
+            if response.status in (200, 204):
+                logger.info(f"Successfully removed timeout/ban for {username}")
+                if self.timeouts.remove(user_id) is not None:
+                    self._timeouts_changed.set()
+                return True
+            else:
+                logger.error(
+                    f"Failed to remove timeout/ban for {username}. Status: {response.status}, Error: {response.text}"
+                )
+                return False
         except Exception as e:
             logger.error(f"Error removing timeout/ban for {username}: {str(e)}")
+            return False
+
+    async def bulk_timeout(self, users: Iterable[Tuple[str, str]], duration: int = 30, reason: str = "Timeout") -> Dict[str, bool]:
+        """
+        Timeout many users concurrently.
+        
+        Args:
+            users: (user_id, username) pairs
+            duration: Duration of each timeout in seconds
+            reason: Reason for the timeouts
+            
+        Returns:
+            dict: user_id -> True if that timeout succeeded
+        """
+        return await self._bulk_moderate(
+            "timeout",
+            users,
+            lambda user_id, username: self.timeout_user(user_id, username, duration=duration, reason=reason)
+        )
+
+    async def bulk_untimeout(self, users: Iterable[Tuple[str, str]]) -> Dict[str, bool]:
+        """
+        Remove timeouts for many users concurrently.
+        
+        Args:
+            users: (user_id, username) pairs
+            
+        Returns:
+            dict: user_id -> True if that untimeout succeeded
+        """
+        return await self._bulk_moderate("untimeout", users, self.untimeout_user)
+
+    async def _bulk_moderate(self, action: str, users: Iterable[Tuple[str, str]], operation) -> Dict[str, bool]:
+        """
+        Run a moderation operation over many users with a worker pool sized to
+        the current Helix rate-limit budget, streaming progress to the overlay.
+        """
+        queue = asyncio.Queue()
+        for user_id, username in users:
+            if user_id:
+                queue.put_nowait((user_id, username))
+        total = queue.qsize()
+        results: Dict[str, bool] = {}
+        if total == 0:
+            return results
+
+        # Resolve shared IDs once instead of racing every worker into the lookup
+        self.broadcaster_id = await self.get_broadcaster_id()
+        if self.moderator_id is None:
+            self.moderator_id = await self.get_user_id(self.nick)
+
+        budget = self.helix.scheduler.available(PRIORITY_MODERATION)
+        concurrency = max(1, min(BULK_MAX_CONCURRENCY, budget, total))
+        logger.info(f"Bulk {action} of {total} users with {concurrency} workers (rate-limit budget: {budget})")
+
+        completed: List[str] = []
+        last_progress = 0.0
+
+        async def report(final: bool = False):
+            nonlocal completed, last_progress
+            now = time.monotonic()
+            if not final and now - last_progress < BULK_PROGRESS_INTERVAL:
+                return
+            last_progress = now
+            batch, completed = completed, []
+            succeeded = sum(1 for ok in results.values() if ok)
+            await self.send_to_overlay(json.dumps({
+                "type": "bulk_moderation",
+                "action": action,
+                "done": len(results),
+                "total": total,
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded,
+                "users": batch,
+                "final": final
+            }))
+
+        async def worker():
+            while True:
+                try:
+                    user_id, username = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                ok = bool(await operation(user_id, username))
+                results[user_id] = ok
+                if ok:
+                    completed.append(username)
+                await report()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        await report(final=True)
+        return results
 
     async def add_vip(self, user_id: str, username: str) -> bool:
         """
@@ -460,29 +718,26 @@ class BaseBot(commands.Bot):
                 logger.error("Could not get broadcaster ID")
                 return False
 
-            url = f"https://api.twitch.tv/helix/channels/vips?broadcaster_id={self.broadcaster_id}&user_id={user_id}"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Client-Id": self.client_id
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers) as response:
-                    if response.status == 204:
-                        logger.info(f"Successfully added VIP status to {username}")
-                        return True
-                    elif response.status == 200:
-                        logger.info(f"Successfully added VIP status to {username}")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        if response.status == 425:
-                            logger.error(f"Failed to add VIP to {username}: Broadcaster must complete 'Build a Community' requirements")
-                        elif response.status == 429:
-                            logger.error(f"Failed to add VIP to {username}: Rate limit exceeded (max 10 VIP operations per 10 seconds)")
-                        else:
-                            logger.error(f"Failed to add VIP to {username}. Status: {response.status}, Error: {error_text}")
-                        return False
+            response = await self.helix.request(
+                "POST",
+                "/channels/vips",
+                params={"broadcaster_id": self.broadcaster_id, "user_id": user_id},
+                priority=PRIORITY_VIP
+            )
+            if response.status == 204:
+                logger.info(f"Successfully added VIP status to {username}")
+                return True
+            elif response.status == 200:
+                logger.info(f"Successfully added VIP status to {username}")
+                return True
+            else:
+                if response.status == 425:
+                    logger.error(f"Failed to add VIP to {username}: Broadcaster must complete 'Build a Community' requirements")
+                elif response.status == 429:
+                    logger.error(f"Failed to add VIP to {username}: Rate limit exceeded (max 10 VIP operations per 10 seconds)")
+                else:
+                    logger.error(f"Failed to add VIP to {username}. Status: {response.status}, Error: {response.text}")
+                return False
 
         except Exception as e:
             logger.error(f"Error adding VIP to {username}: {str(e)}")
@@ -509,27 +764,24 @@ class BaseBot(commands.Bot):
                 logger.error("Could not get broadcaster ID")
                 return False
 
-            url = f"https://api.twitch.tv/helix/channels/vips?broadcaster_id={self.broadcaster_id}&user_id={user_id}"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Client-Id": self.client_id
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(url, headers=headers) as response:
-                    if response.status == 204:
-                        logger.info(f"Successfully removed VIP status from {username}")
-                        return True
-                    elif response.status == 200:
-                        logger.info(f"Successfully removed VIP status from {username}")
-                        return True
-                    else:
-                        error_text = await response.text()
-                        if response.status == 429:
-                            logger.error(f"Failed to remove VIP from {username}: Rate limit exceeded (max 10 VIP operations per 10 seconds)")
-                        else:
-                            logger.error(f"Failed to remove VIP from {username}. Status: {response.status}, Error: {error_text}")
-                        return False
+            response = await self.helix.request(
+                "DELETE",
+                "/channels/vips",
+                params={"broadcaster_id": self.broadcaster_id, "user_id": user_id},
+                priority=PRIORITY_VIP
+            )
+            if response.status == 204:
+                logger.info(f"Successfully removed VIP status from {username}")
+                return True
+            elif response.status == 200:
+                logger.info(f"Successfully removed VIP status from {username}")
+                return True
+            else:
+                if response.status == 429:
+                    logger.error(f"Failed to remove VIP from {username}: Rate limit exceeded (max 10 VIP operations per 10 seconds)")
+                else:
+                    logger.error(f"Failed to remove VIP from {username}. Status: {response.status}, Error: {response.text}")
+                return False
 
         except Exception as e:
             logger.error(f"Error removing VIP from {username}: {str(e)}")
@@ -551,25 +803,21 @@ class BaseBot(commands.Bot):
                 logger.error("Could not get broadcaster ID")
                 return False
 
-            url = f"https://api.twitch.tv/helix/channels/vips?broadcaster_id={self.broadcaster_id}&user_id={user_id}"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Client-Id": self.client_id
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        # If user is VIP, the API returns their data
-                        return len(data.get('data', [])) > 0
-                    elif response.status == 404:
-                        # User is not a VIP
-                        return False
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to check VIP status for user {user_id}. Status: {response.status}, Error: {error_text}")
-                        return False
+            response = await self.helix.request(
+                "GET",
+                "/channels/vips",
+                params={"broadcaster_id": self.broadcaster_id, "user_id": user_id},
+                priority=PRIORITY_VIP
+            )
+            if response.status == 200:
+                # If user is VIP, the API returns their data
+                return len((response.data or {}).get('data', [])) > 0
+            elif response.status == 404:
+                # User is not a VIP
+                return False
+            else:
+                logger.error(f"Failed to check VIP status for user {user_id}. Status: {response.status}, Error: {response.text}")
+                return False
 
         except Exception as e:
             logger.error(f"Error checking VIP status for user {user_id}: {str(e)}")
@@ -577,7 +825,9 @@ class BaseBot(commands.Bot):
 
     async def get_user_id(self, username: str) -> str:
         """
-        Get a Twitch user's ID from their username using the Twitch API.
+        Get a Twitch user's ID from their username.
+        Served from the identity cache when the user has chatted; otherwise
+        looked up via the Twitch API in a batch with other pending misses.
         
         Args:
             username: The Twitch username to look up
@@ -586,29 +836,36 @@ class BaseBot(commands.Bot):
             str: The user's ID if found, None otherwise
         """
         try:
-            url = f"https://api.twitch.tv/helix/users?login={username}"
-            headers = {
-                "Authorization": f"Bearer {self.token}",
-                "Client-Id": self.client_id
-            }
-            
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('data') and len(data['data']) > 0:
-                            return data['data'][0]['id']
-                        logger.error(f"No user found with username: {username}")
-                        return None
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Failed to get user ID for {username}. Status: {response.status}, Error: {error_text}")
-                        return None
-                        
+            return await self.user_ids.resolve(username)
         except Exception as e:
             logger.error(f"Error getting user ID for {username}: {str(e)}")
             return None
 
+    async def _fetch_user_ids(self, logins: List[str]) -> dict:
+        """
+        Look up to 100 logins in one Helix /users request.
+        
+        Args:
+            logins: Lowercase Twitch logins
+            
+        Returns:
+            dict: Mapping of login to user ID for every user that exists
+        """
+        response = await self.helix.request(
+            "GET",
+            "/users",
+            params=[("login", login) for login in logins],
+            priority=PRIORITY_LOOKUP
+        )
+        if response.status != 200:
+            logger.error(f"Failed to get user IDs for {', '.join(logins)}. Status: {response.status}, Error: {response.text}")
+            return {}
+        found = {item['login']: item['id'] for item in (response.data or {}).get('data', [])}
+        for login in logins:
+            if login not in found:
+                logger.error(f"No user found with username: {login}")
+        return found
+
     def _init_viewer_count_browser(self):
         """Lazy initialization of browser for viewer count scraping."""
         if self._viewer_count_driver is None:
@@ -768,6 +1025,8 @@ class BaseBot(commands.Bot):
             logger.warning("YOUTUBE_API_KEY not set and scraping disabled. Cannot get YouTube viewer count.")
             return None
         
+        import aiohttp
+
         try:
             # If video_id is provided, check that specific video directly
             if video_id:
@@ -986,6 +1245,16 @@ class BaseBot(commands.Bot):
         # Child classes should implement
         pass 
 
+    async def close(self):
+        """Shut down the bot and release the pooled Helix connections."""
+        if self.timeout_expiry_task is not None:
+            self.timeout_expiry_task.cancel()
+        if self.token_refresh_task is not None:
+            self.token_refresh_task.cancel()
+        await self.moderation.stop()
+        await self.helix.close()
+        await super().close()
+
     async def speak(self, message: str, voice_id: Optional[str] = None):
         """
         Generate TTS using gTTS and play the audio.
@@ -995,6 +1264,10 @@ class BaseBot(commands.Bot):
             voice_id: Optional voice ID (not used for gTTS, kept for compatibility)
         """
         try:
+            import tempfile
+            import playsound
+            from gtts import gTTS
+
             tts = gTTS(message, lang='en', tld='us')
             with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as fp:
                 temp_path = fp.name
@@ -1015,6 +1288,10 @@ class BaseBot(commands.Bot):
             voice_id: Optional voice ID, uses default if not provided
         """
         try:
+            import tempfile
+            import playsound
+            import requests
+
             # Use provided voice_id or default
             selected_voice_id = voice_id or self.default_voice_id
             
@@ -14,6 +14,7 @@ import logging
 import os
 import hmac
 import hashlib
+import math
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -22,6 +23,9 @@ from aiohttp import web
 import aiohttp
 import websockets
 
+from countdown import Countdown
+from history_stream import HistoryStream, RESYNC_ACTION
+
 # --- Logging ---
 logging.basicConfig(
     level=logging.INFO,
@@ -45,7 +49,7 @@ TIME_TIER2 = TIME_TIER1 * 2   # 6 minutes for Tier 2 (Twitch tier 2000)
 TIME_TIER3 = TIME_TIER1 * 6  # 15 minutes for Tier 3 (Twitch tier 3000)
 TIME_GIFTED = 0 * 60  # 3 minutes per gifted sub (all tiers)
 
-_timer_seconds = 0
+_countdown = Countdown(running=True)  # overlays count down locally from its deadline
 _timer_history = []  # [{timestamp, timer_seconds}, ...]
 _overlay_ws = None
 _app_token = None
@@ -53,6 +57,7 @@ _client_id = None
 _client_secret = None
 _broadcaster_id = None
 _last_chart_update = None
+_history_stream = HistoryStream("begathon_timer", "timer_history")
 
 
 def _get_time_for_tier(tier: str, is_gift: bool) -> int:
@@ -63,21 +68,26 @@ def _get_time_for_tier(tier: str, is_gift: bool) -> int:
     return tier_map.get(tier, TIME_TIER1)
 
 
+def _timer_now() -> int:
+    """Whole seconds left on the timer."""
+    return math.ceil(_countdown.remaining())
+
+
 def _load_timer_data() -> tuple[int, list]:
     """Load timer state from JSON file."""
-    global _timer_seconds, _timer_history
+    global _timer_history
     data_file = Path(TIMER_DATA_FILE)
     if data_file.exists():
         try:
             with open(data_file, "r") as f:
                 data = json.load(f)
-                _timer_seconds = data.get("timer_seconds", 0)
+                _countdown.set(data.get("timer_seconds", 0))
                 _timer_history = data.get("timer_history", [])
         except Exception as e:
             logger.error("Error loading timer data: %s", e)
-            _timer_seconds = 0
+            _countdown.set(0)
             _timer_history = []
-    return _timer_seconds, _timer_history
+    return _timer_now(), _timer_history
 
 
 def _save_timer_data() -> None:
@@ -87,7 +97,7 @@ def _save_timer_data() -> None:
     try:
         with open(data_file, "w") as f:
             json.dump({
-                "timer_seconds": _timer_seconds,
+                "timer_seconds": _timer_now(),
                 "timer_history": _timer_history,
             }, f, indent=2)
     except Exception as e:
@@ -100,7 +110,7 @@ def _append_timer_history() -> None:
     now = datetime.now(timezone.utc)
     _timer_history.append({
         "timestamp": now.isoformat(),
-        "timer_seconds": _timer_seconds,
+        "timer_seconds": _timer_now(),
     })
     cutoff_ts = now.timestamp() - CHART_HISTORY_DURATION
     _timer_history = [
@@ -156,11 +166,12 @@ async def _send_timer_to_overlay() -> bool:
     if _overlay_ws is None or _overlay_ws.state != websockets.State.OPEN:
         return False
     try:
-        payload = {
-            "type": "begathon_timer",
-            "timer_seconds": _timer_seconds,
-            "timer_history": _timer_history,
-        }
+        # Full history only on connect/resync; otherwise just the new points
+        payload = _history_stream.encode(
+            _timer_history,
+            timer_seconds=_timer_now(),
+            countdown=_countdown.to_message(),
+        )
         await _overlay_ws.send(json.dumps(payload))
         return True
     except websockets.exceptions.ConnectionClosed:
@@ -291,7 +302,6 @@ async def create_eventsub_subscription(
 
 async def handle_eventsub(request: web.Request, webhook_secret: str):
     """Handle Twitch EventSub: verification challenge and notifications."""
-    global _timer_seconds, _timer_history
     body = await request.text()
     message_id = request.headers.get("Twitch-Eventsub-Message-Id", "")
     timestamp = request.headers.get("Twitch-Eventsub-Message-Timestamp", "")
@@ -320,22 +330,22 @@ async def handle_eventsub(request: web.Request, webhook_secret: str):
             user_name = event.get("user_name") or event.get("user_login", "?")
             tier = event.get("tier", "1000")
             seconds = _get_time_for_tier(tier, is_gift=False)
-            _timer_seconds += seconds
+            _countdown.add(seconds)
             _append_timer_history()
             _save_timer_data()
             await _send_timer_to_overlay()
-            logger.info("Webhook: share -> %s (tier %s) +%ds, timer=%ds", user_name, tier, seconds, _timer_seconds)
+            logger.info("Webhook: share -> %s (tier %s) +%ds, timer=%ds", user_name, tier, seconds, _timer_now())
         elif sub_type == "channel.subscription.gift":
             user_name = event.get("user_name") or event.get("user_login", "?")
             total = event.get("total", 1)
             tier = event.get("tier", "1000")
             seconds_per = _get_time_for_tier(tier, is_gift=True)
             seconds = total * seconds_per
-            _timer_seconds += seconds
+            _countdown.add(seconds)
             _append_timer_history()
             _save_timer_data()
             await _send_timer_to_overlay()
-            logger.info("Webhook: gift -> %s x%d (tier %s) +%ds, timer=%ds", user_name, total, tier, seconds, _timer_seconds)
+            logger.info("Webhook: gift -> %s x%d (tier %s) +%ds, timer=%ds", user_name, total, tier, seconds, _timer_now())
         return web.Response(status=200)
 
     if message_type == "revocation":
@@ -353,8 +363,18 @@ async def _overlay_websocket_loop() -> None:
             if _overlay_ws is None or _overlay_ws.state != websockets.State.OPEN:
                 async with websockets.connect(OVERLAY_WS_URL) as ws:
                     _overlay_ws = ws
+                    # Only listen for overlays asking for a full history resync
+                    await ws.send(json.dumps({"relay": "subscribe", "topics": [f"action:{RESYNC_ACTION}"]}))
+                    _history_stream.request_keyframe()
                     await _send_timer_to_overlay()
-                    await ws.wait_closed()
+                    async for message in ws:
+                        try:
+                            data = json.loads(message)
+                        except (TypeError, ValueError):
+                            continue
+                        if isinstance(data, dict) and _history_stream.is_resync_request(data):
+                            _history_stream.request_keyframe()
+                            await _send_timer_to_overlay()
                     _overlay_ws = None
             else:
                 await asyncio.sleep(1)
@@ -366,22 +386,21 @@ async def _overlay_websocket_loop() -> None:
 
 
 async def _countdown_loop() -> None:
-    """Count down timer every second and update overlay. Append to history every 10s."""
-    global _timer_seconds, _timer_history, _last_chart_update
+    """
+    Append the timer to the chart history every CHART_UPDATE_INTERVAL and send it.
+    The overlay counts down on its own from the deadline, so there is no per-second tick.
+    """
+    global _last_chart_update
     _last_chart_update = datetime.now(timezone.utc)
     while True:
+        await asyncio.sleep(CHART_UPDATE_INTERVAL)
         try:
-            if _timer_seconds > 0:
-                _timer_seconds -= 1
-            now = datetime.now(timezone.utc)
-            if (now - _last_chart_update).total_seconds() >= CHART_UPDATE_INTERVAL:
-                _append_timer_history()
-                _save_timer_data()
-                _last_chart_update = now
+            _append_timer_history()
+            _save_timer_data()
+            _last_chart_update = datetime.now(timezone.utc)
             await _send_timer_to_overlay()
         except Exception as e:
             logger.exception("Countdown error: %s", e)
-        await asyncio.sleep(1)
 
 
 @web.middleware
@@ -404,7 +423,7 @@ async def run_webhook_server(webhook_port: int, webhook_secret: str):
 
     async def health(request):
         return web.Response(
-            text=f"Begathon webhook OK (port {webhook_port}). Timer: {_timer_seconds}s\n"
+            text=f"Begathon webhook OK (port {webhook_port}). Timer: {_timer_now()}s\n"
         )
 
     app.router.add_get("/eventsub", health)
@@ -433,15 +452,15 @@ async def _check_webhook_reachable(callback_url: str, webhook_port: int) -> None
 
 async def run_test_mode(start_time: int = 3600) -> None:
     """Run in test mode: generate sample history + webhook server. Use test_eventsub_webhook.py to send fake subs."""
-    global _timer_seconds, _timer_history
+    global _timer_history
     config = load_config()
     webhook_secret = config["webhook_secret"]
     webhook_port = config["webhook_port"]
 
     logger.info("TEST MODE: Generating 1 hour of sample timer history...")
     _timer_history = _generate_test_history(duration_seconds=3600, interval=10)
-    _timer_seconds = _timer_history[-1]["timer_seconds"] if _timer_history else start_time
-    logger.info("TEST MODE: Timer=%ds, history=%d points", _timer_seconds, len(_timer_history))
+    _countdown.set(_timer_history[-1]["timer_seconds"] if _timer_history else start_time)
+    logger.info("TEST MODE: Timer=%ds, history=%d points", _timer_now(), len(_timer_history))
     logger.info("TEST MODE: Webhook server on port %s. Run test_eventsub_webhook.py to send fake subs.", webhook_port)
     logger.info("TEST MODE: Overlay: begathon_overlay.html (ws://localhost:6790)")
 
@@ -468,7 +487,7 @@ async def run_test_mode(start_time: int = 3600) -> None:
 
 
 async def main(start_time: int, keep_state: bool = False):
-    global _client_id, _broadcaster_id, _app_token, _client_secret, _timer_seconds, _timer_history
+    global _client_id, _broadcaster_id, _app_token, _client_secret, _timer_history
     config = load_config()
     webhook_secret = config["webhook_secret"]
     webhook_port = config["webhook_port"]
@@ -476,13 +495,13 @@ async def main(start_time: int, keep_state: bool = False):
     callback_url = f"{webhook_base_url}/eventsub" if webhook_base_url else None
 
     if keep_state:
-        _timer_seconds, _timer_history = _load_timer_data()
-        logger.info("Timer: %ds (kept from previous run)", _timer_seconds)
+        timer_seconds, _timer_history = _load_timer_data()
+        logger.info("Timer: %ds (kept from previous run)", timer_seconds)
     else:
-        _timer_seconds = start_time
-        _timer_history = [{"timestamp": datetime.now(timezone.utc).isoformat(), "timer_seconds": _timer_seconds}]
+        _countdown.set(start_time)
+        _timer_history = [{"timestamp": datetime.now(timezone.utc).isoformat(), "timer_seconds": _timer_now()}]
         _save_timer_data()
-        logger.info("Timer: %ds (start time)", _timer_seconds)
+        logger.info("Timer: %ds (start time)", start_time)
 
     overlay_task = asyncio.create_task(_overlay_websocket_loop())
     countdown_task = asyncio.create_task(_countdown_loop())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Compression benchmark: deflate CPU time versus bytes saved for the relay's
+real message types, using the same settings as permessage-deflate (raw
+deflate, sync flush per message, shared context across a connection).
+
+Use it to pick COMPRESSION_MIN_SIZE and COMPRESSION_LEVEL in
+relay_compression.py.
+
+Usage:
+  python bench_compression.py
+  python bench_compression.py --levels 1 6 --messages 500
+  python bench_compression.py --no-context-takeover
+"""
+
+import argparse
+import base64
+import json
+import os
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+
+# Same as relay_compression: memLevel 5, 32 KB window
+MEM_LEVEL = 5
+WINDOW_BITS = 15
+
+
+def _history(n: int, points: int) -> List[dict]:
+    start = datetime(2025, 11, 1, 18, 0, 0) + timedelta(seconds=30 * n)
+    return [{"timestamp": (start + timedelta(seconds=30 * i)).isoformat(), "timer_seconds": 36000 - 25 * i}
+            for i in range(points)]
+
+
+def begathon_keyframe(n: int) -> str:
+    return json.dumps({"type": "begathon_timer", "seq": n, "mode": "keyframe",
+                       "timer_history": _history(n, 720), "timer_seconds": 36000 - n})
+
+
+def begathon_delta(n: int) -> str:
+    point = _history(n, 1)
+    return json.dumps({"type": "begathon_timer", "seq": n, "mode": "delta", "append": point, "drop": 1,
+                       "timer_seconds": 36000 - n})
+
+
+def scores(n: int) -> str:
+    table = sorted(((f"viewer_{i:03d}", (i * 37 + n) % 500) for i in range(40)), key=lambda x: -x[1])
+    return json.dumps({"type": "scores", "scores": table})
+
+
+def timeouts(n: int) -> str:
+    items = [{"user": f"chatter_{(i + n) % 97}", "remaining": f"{(i * 7 + n) % 10}m {(i * 13) % 60:02d}s"}
+             for i in range(25)]
+    return json.dumps({"type": "timeouts", "items": items})
+
+
+def bomb_update(n: int) -> str:
+    now = time.time()
+    return json.dumps({"type": "bomb_update", "holder": f"viewer{n % 50}", "pass_count": n,
+                       "countdown": {"remaining": 42.5, "running": True, "rate": 1.0,
+                                     "server_time": now, "deadline": now + 42.5}})
+
+
+def count(n: int) -> str:
+    return f"COUNT:{n}:viewer{n % 50}:{n + 100}:0"
+
+
+def king(n: int) -> str:
+    return json.dumps({"type": "king", "king": f"viewer{n % 50}"})
+
+
+def tts_audio(n: int) -> str:
+    # Encoded audio is already dense; this shows what compressing it costs for nothing
+    return json.dumps({"type": "tts_audio", "audio_data_url": "data:audio/wav;base64,"
+                       + base64.b64encode(os.urandom(48 * 1024)).decode()})
+
+
+MESSAGE_TYPES: List[Tuple[str, Callable[[int], str]]] = [
+    ("COUNT", count),
+    ("king", king),
+    ("begathon delta", begathon_delta),
+    ("bomb_update", bomb_update),
+    ("timeouts", timeouts),
+    ("scores", scores),
+    ("begathon keyframe", begathon_keyframe),
+    ("tts_audio (b64)", tts_audio),
+]
+
+
+def measure(messages: List[bytes], level: int, context_takeover: bool) -> Tuple[float, float]:
+    """Average compressed size and microseconds per message for a stream of messages."""
+    encoder = zlib.compressobj(level, zlib.DEFLATED, -WINDOW_BITS, MEM_LEVEL)
+    total = 0
+    start = time.perf_counter()
+    for data in messages:
+        if not context_takeover:
+            encoder = zlib.compressobj(level, zlib.DEFLATED, -WINDOW_BITS, MEM_LEVEL)
+        # permessage-deflate strips the trailing 00 00 ff ff of the sync flush
+        total += len(encoder.compress(data) + encoder.flush(zlib.Z_SYNC_FLUSH)) - 4
+    elapsed = time.perf_counter() - start
+    return total / len(messages), elapsed / len(messages) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deflate CPU versus bytes for relay message types")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 3, 6, 9], help="zlib levels to compare")
+    parser.add_argument("--messages", type=int, default=200, help="Messages per type")
+    parser.add_argument("--no-context-takeover", action="store_true", help="Reset the compressor per message")
+    parser.add_argument("--min-saving", type=float, default=0.3, help="Saving worth compressing for (fraction)")
+    parser.add_argument("--min-saved-bytes", type=int, default=64, help="Saving worth compressing for (bytes)")
+    args = parser.parse_args()
+    context_takeover = not args.no_context_takeover
+
+    header = f"{'type':<18} {'raw B':>8}"
+    for level in args.levels:
+        header += f" {'L' + str(level) + ' B':>8} {'ratio':>6} {'us':>7}"
+    print(header)
+
+    worth_compressing = []
+    for name, build in MESSAGE_TYPES:
+        messages = [build(n).encode() for n in range(args.messages)]
+        raw = sum(len(m) for m in messages) / len(messages)
+        row = f"{name:<18} {raw:>8.0f}"
+        for level in args.levels:
+            size, micros = measure(messages, level, context_takeover)
+            row += f" {size:>8.0f} {size / raw:>6.2f} {micros:>7.1f}"
+            if level == args.levels[0] and 1 - size / raw >= args.min_saving and raw - size >= args.min_saved_bytes:
+                worth_compressing.append(raw)
+        print(row)
+
+    print(f"\ncontext takeover: {'on' if context_takeover else 'off'}; us = deflate time per message")
+    if worth_compressing:
+        print(f"smallest type saving >= {args.min_saving:.0%} and >= {args.min_saved_bytes} B at level {args.levels[0]}: "
+              f"{min(worth_compressing):.0f} bytes (candidate COMPRESSION_MIN_SIZE)")
+
+
+if __name__ == "__main__":
+    main()
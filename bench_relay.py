@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Relay load benchmark: starts server.py, connects N simulated overlays and M
+simulated bots, and replays a raid-like message mix through the relay.
+
+Reports per message type: fan-out latency (bot send -> overlay receive,
+p50/p99/max), deliveries that never arrived (dropped by a full client queue
+or replaced by a newer value of the same state), plus overall throughput
+and relay memory.
+
+Usage:
+  python bench_relay.py                              # 30 overlays, 15 bots, 20 s
+  python bench_relay.py --overlays 60 --producers 30 --scale 3
+  python bench_relay.py --audio-kb 512 --duration 60
+  python bench_relay.py --in-process                 # relay shares this event loop (skews latency)
+  python bench_relay.py --url ws://localhost:6790    # an already running relay
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import websockets
+
+DEFAULT_PORT = 6799
+
+# Every benchmark message carries "#<run>.<producer>.<n>" near its start so
+# overlays can match it to its send time without parsing the whole payload
+MARKER_PATTERN = re.compile(r"#([0-9a-f]{6})\.(\d+)\.(\d+)")
+
+
+def _bomb_update(marker: str, n: int, producer: int, args) -> str:
+    return json.dumps({
+        "bench": marker,
+        "type": "bomb_update",
+        "key": f"p{producer}",
+        "holder": f"viewer{n % 50}",
+        "pass_count": n,
+        "countdown": {"remaining": 42.0, "running": True, "rate": 1.0,
+                      "server_time": time.time(), "deadline": time.time() + 42.0},
+    })
+
+
+def _begathon_timer(marker: str, n: int, producer: int, args) -> str:
+    point = {"t": n, "seconds": 3600 - n, "subs": n // 10}
+    message = {"bench": marker, "type": "begathon_timer", "seq": n, "timer_seconds": 3600 - n}
+    if n % 30 == 0:
+        # Periodic keyframe with the full chart history
+        message.update(mode="keyframe", history=[{"t": i, "seconds": 3600 - i, "subs": i // 10}
+                                                 for i in range(args.history_points)])
+    else:
+        message.update(mode="delta", append=[point], drop=1)
+    return json.dumps(message)
+
+
+def _count(marker: str, n: int, producer: int, args) -> str:
+    return f"COUNT:{n}:{marker}:{n + 100}:0"
+
+
+def _word_typed(marker: str, n: int, producer: int, args) -> str:
+    return json.dumps({"bench": marker, "type": "word_typed", "user": f"viewer{n % 50}",
+                       "word": "benchmark", "index": n})
+
+
+def _declare(marker: str, n: int, producer: int, args) -> str:
+    return json.dumps({"bench": marker, "type": "declare", "message": f"viewer{n % 50} declares {n}",
+                       "audio_url": f"http://localhost:6791/audio/{n:032x}"})
+
+
+def _tts_audio(marker: str, n: int, producer: int, args) -> str:
+    # Inline base64 clip, as bots sent before the audio blob endpoint existed
+    audio = base64.b64encode(os.urandom(args.audio_kb * 1024)).decode()
+    return json.dumps({"bench": marker, "type": "tts_audio", "audio_data_url": f"data:audio/wav;base64,{audio}"})
+
+
+# (topic, messages per second per producer at --scale 1, builder)
+MESSAGE_MIX: List[tuple] = [
+    ("bomb_update", 4.0, _bomb_update),
+    ("begathon_timer", 1.0, _begathon_timer),
+    ("COUNT", 10.0, _count),
+    ("word_typed", 5.0, _word_typed),
+    ("declare", 0.5, _declare),
+    ("tts_audio", 0.2, _tts_audio),
+]
+
+# Overlays are assigned these subscriptions round-robin; the last one is a dashboard that sees everything
+OVERLAY_PROFILES = [
+    ["bomb_update", "bomb_reset"],
+    ["begathon_timer"],
+    ["COUNT"],
+    ["typeracer_state", "word_typed"],
+    ["declare", "tts_audio"],
+    ["*"],
+]
+
+
+class BenchState:
+    def __init__(self, run_id: str):
+        self.run_id = run_id
+        # (producer, n) -> (topic, send time, expected deliveries)
+        self.sent: Dict[tuple, tuple] = {}
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.delivered: Dict[str, int] = defaultdict(int)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.messages_out = 0
+        self.disconnects = 0
+        self.rss_samples: List[int] = []
+
+
+def subscribers_for(topic: str, overlays: int) -> int:
+    profiles = [OVERLAY_PROFILES[i % len(OVERLAY_PROFILES)] for i in range(overlays)]
+    return sum(1 for profile in profiles if topic in profile or "*" in profile)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    """Resident memory of a process from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+async def run_overlay(url: str, index: int, state: BenchState, ready: asyncio.Event, stop: asyncio.Event):
+    topics = OVERLAY_PROFILES[index % len(OVERLAY_PROFILES)]
+    try:
+        async with websockets.connect(url, max_size=None) as ws:
+            await ws.send(json.dumps({"relay": "subscribe", "topics": topics}))
+            ready.set()
+            while not stop.is_set():
+                try:
+                    message = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                received = time.perf_counter()
+                state.bytes_out += len(message)
+                state.messages_out += 1
+                match = MARKER_PATTERN.search(message[:200])
+                if match is None or match.group(1) != state.run_id:
+                    continue
+                sent = state.sent.get((int(match.group(2)), int(match.group(3))))
+                if sent is None:
+                    continue
+                topic, sent_at, _ = sent
+                state.latencies[topic].append(received - sent_at)
+                state.delivered[topic] += 1
+    except websockets.exceptions.ConnectionClosed:
+        state.disconnects += 1
+    finally:
+        ready.set()
+
+
+async def run_producer(url: str, index: int, args, state: BenchState, stop: asyncio.Event):
+    topic, rate, build = MESSAGE_MIX[index % len(MESSAGE_MIX)]
+    interval = 1.0 / (rate * args.scale)
+    expected = subscribers_for(topic, args.overlays)
+    async with websockets.connect(url, max_size=None) as ws:
+        # Bots only listen for their own actions; this one wants nothing back
+        await ws.send(json.dumps({"relay": "subscribe", "topics": [f"action:bench-{index}"]}))
+        # Spread producers out so they don't all fire on the same tick
+        next_send = time.perf_counter() + random.random() * interval
+        n = 0
+        while not stop.is_set():
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            n += 1
+            message = build(f"#{state.run_id}.{index}.{n}", n, index, args)
+            state.sent[(index, n)] = (topic, time.perf_counter(), expected)
+            await ws.send(message)
+            state.bytes_in += len(message)
+            next_send += interval
+
+
+async def sample_memory(pid: Optional[int], state: BenchState, stop: asyncio.Event):
+    while pid is not None and not stop.is_set():
+        rss = rss_kb(pid)
+        if rss is not None:
+            state.rss_samples.append(rss)
+        await asyncio.sleep(0.5)
+
+
+async def wait_for_relay(url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with websockets.connect(url):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"relay at {url} did not come up within {timeout}s")
+            await asyncio.sleep(0.2)
+
+
+def start_relay_subprocess(port: int) -> subprocess.Popen:
+    code = f"import asyncio, server; asyncio.run(server.main(port={port}, audio_port=None))"
+    return subprocess.Popen(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def report(state: BenchState, args, elapsed: float):
+    print(f"\n{args.overlays} overlays, {args.producers} producers, {elapsed:.1f}s at scale {args.scale}")
+    print(f"{'type':<16} {'sent':>7} {'expected':>9} {'delivered':>10} {'missing':>8} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    sent_by_topic: Dict[str, int] = defaultdict(int)
+    expected_by_topic: Dict[str, int] = defaultdict(int)
+    for topic, _, expected in state.sent.values():
+        sent_by_topic[topic] += 1
+        expected_by_topic[topic] += expected
+    for topic, _, _ in MESSAGE_MIX:
+        if not sent_by_topic[topic]:
+            continue
+        samples = state.latencies[topic]
+        print(
+            f"{topic:<16} {sent_by_topic[topic]:>7} {expected_by_topic[topic]:>9} {state.delivered[topic]:>10} "
+            f"{expected_by_topic[topic] - state.delivered[topic]:>8} "
+            f"{percentile(samples, 0.5) * 1000:>8.1f} {percentile(samples, 0.99) * 1000:>8.1f} "
+            f"{max(samples, default=0.0) * 1000:>8.1f}"
+        )
+    all_samples = [s for samples in state.latencies.values() for s in samples]
+    print(f"{'all':<16} {len(state.sent):>7} {sum(expected_by_topic.values()):>9} {len(all_samples):>10} "
+          f"{sum(expected_by_topic.values()) - len(all_samples):>8} "
+          f"{percentile(all_samples, 0.5) * 1000:>8.1f} {percentile(all_samples, 0.99) * 1000:>8.1f} "
+          f"{max(all_samples, default=0.0) * 1000:>8.1f}")
+    print("missing = dropped by a full client queue, or state replaced by a newer value before delivery")
+    print(f"\nthroughput in:  {len(state.sent) / elapsed:8.1f} msg/s {state.bytes_in / elapsed / 2**20:8.2f} MB/s")
+    print(f"throughput out: {state.messages_out / elapsed:8.1f} msg/s {state.bytes_out / elapsed / 2**20:8.2f} MB/s")
+    if state.rss_samples:
+        print(f"relay memory:   start {state.rss_samples[0] / 1024:.1f} MB, "
+              f"peak {max(state.rss_samples) / 1024:.1f} MB, end {state.rss_samples[-1] / 1024:.1f} MB")
+    print(f"overlay disconnects: {state.disconnects}")
+
+
+async def run(args):
+    state = BenchState(f"{random.getrandbits(24):06x}")
+    relay = None
+    relay_task = None
+    pid = args.pid
+    url = args.url
+    if url is None:
+        url = f"ws://localhost:{args.port}"
+        if args.in_process:
+            import logging
+            import server
+            logging.getLogger().setLevel(logging.WARNING)
+            relay_task = asyncio.create_task(server.main(port=args.port, audio_port=None))
+            pid = os.getpid()
+        else:
+            relay = start_relay_subprocess(args.port)
+            pid = relay.pid
+    try:
+        await wait_for_relay(url)
+        stop = asyncio.Event()
+        overlays = []
+        for i in range(args.overlays):
+            ready = asyncio.Event()
+            overlays.append(asyncio.create_task(run_overlay(url, i, state, ready, stop)))
+            await ready.wait()
+        memory = asyncio.create_task(sample_memory(pid, state, stop))
+
+        producer_stop = asyncio.Event()
+        producers = [asyncio.create_task(run_producer(url, i, args, state, producer_stop))
+                     for i in range(args.producers)]
+        start = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        producer_stop.set()
+        elapsed = time.perf_counter() - start
+        await asyncio.gather(*producers, return_exceptions=True)
+        # Let in-flight messages reach the overlays before counting what's missing
+        await asyncio.sleep(args.drain)
+        stop.set()
+        await asyncio.gather(*overlays, memory, return_exceptions=True)
+        report(state, args, elapsed)
+    finally:
+        if relay_task is not None:
+            relay_task.cancel()
+        if relay is not None:
+            relay.terminate()
+            relay.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure relay fan-out latency and throughput under load")
+    parser.add_argument("--overlays", type=int, default=30, help="Simulated overlay clients")
+    parser.add_argument("--producers", type=int, default=15, help="Simulated bots sending messages")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to send for")
+    parser.add_argument("--drain", type=float, default=2.0, help="Seconds to wait for in-flight messages")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every message rate (raid = 3+)")
+    parser.add_argument("--audio-kb", type=int, default=256, help="Size of inline base64 audio clips")
+    parser.add_argument("--history-points", type=int, default=1500, help="Points in begathon keyframes")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port for the relay started by the benchmark")
+    parser.add_argument("--in-process", action="store_true", help="Run the relay in this process instead of a subprocess")
+    parser.add_argument("--url", help="Benchmark an already running relay instead of starting one")
+    parser.add_argument("--pid", type=int, help="With --url: relay process id for memory sampling")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: measures how long each bot entry point takes to import
+and, optionally, to reach event_ready. Every measurement runs in a fresh
+interpreter so results reflect a cold start after a crash.
+
+Usage:
+  python bench_startup.py                     # import time for every bot
+  python bench_startup.py kingBot bombBot     # only these modules
+  python bench_startup.py --repeat 10
+  python bench_startup.py --ready             # also time to event_ready (needs real credentials)
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ENTRY_POINTS = [
+    "adviceBot",
+    "bombBot",
+    "botHost",
+    "countingBot",
+    "goldenvipBot",
+    "KeyboardBot",
+    "kingBot",
+    "marblesOnlyBot",
+    "progressbarBot",
+    "quickchatBot",
+    "scoreBot",
+    "streakBot",
+    "ttsbot",
+    "twitchPlaysBot",
+    "typeracerBot",
+    "viewtestBot",
+    "vignetteBot",
+    "server",
+]
+
+# Heavy optional modules we want to know about if an entry point pulls them in eagerly
+WATCHED_MODULES = ["gtts", "playsound", "requests", "selenium", "websockets", "aiohttp"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+try:
+    __import__({module!r})
+    error = None
+except BaseException as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "error": error,
+    "loaded": [m for m in {watched!r} if m in sys.modules],
+}}))
+"""
+
+READY_PROBE = """
+import asyncio, inspect, json, sys, time
+start = time.perf_counter()
+module = __import__({module!r})
+from baseBot import BaseBot
+bot_cls = next(c for _, c in inspect.getmembers(module, inspect.isclass)
+               if issubclass(c, BaseBot) and c is not BaseBot and c.__module__ == module.__name__)
+imported = time.perf_counter() - start
+original_ready = bot_cls.event_ready
+
+async def timed_ready(self):
+    await original_ready(self)
+    print(json.dumps({{"import": imported, "ready": time.perf_counter() - start}}), flush=True)
+    await self.close()
+
+bot_cls.event_ready = timed_ready
+bot_cls().run()
+"""
+
+
+def run_probe(code: str, timeout: float) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+    for line in reversed(result.stdout.splitlines()):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return {"error": (result.stderr.strip().splitlines() or ["no output"])[-1]}
+
+
+def bench_import(module: str, repeat: int) -> dict:
+    samples, loaded, error = [], [], None
+    for _ in range(repeat):
+        probe = run_probe(IMPORT_PROBE.format(module=module, watched=WATCHED_MODULES), timeout=60)
+        if probe.get("error"):
+            error = probe["error"]
+            break
+        samples.append(probe["elapsed"])
+        loaded = probe["loaded"]
+    return {"samples": samples, "loaded": loaded, "error": error}
+
+
+def bench_ready(module: str, timeout: float) -> dict:
+    try:
+        return run_probe(READY_PROBE.format(module=module), timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"error": f"did not reach event_ready within {timeout}s"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bot import and ready time")
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS, help="Entry point modules to measure")
+    parser.add_argument("--repeat", type=int, default=5, help="Cold imports per module")
+    parser.add_argument("--ready", action="store_true", help="Also measure time to event_ready")
+    parser.add_argument("--ready-timeout", type=float, default=60.0, help="Seconds to wait for event_ready")
+    args = parser.parse_args()
+
+    print(f"{'module':<16} {'import min':>11} {'median':>9} {'ready':>9}  eager optional imports")
+    for module in args.modules:
+        result = bench_import(module, args.repeat)
+        if result["error"]:
+            print(f"{module:<16} {'error':>11}  {result['error']}")
+            continue
+        samples = result["samples"]
+        ready_str = ""
+        if args.ready and module != "server":
+            ready = bench_ready(module, args.ready_timeout)
+            ready_str = f"{ready['ready'] * 1000:7.0f}ms" if "ready" in ready else "error"
+            if "error" in ready:
+                print(f"  {module}: {ready['error']}")
+        print(
+            f"{module:<16} {min(samples) * 1000:9.1f}ms {statistics.median(samples) * 1000:7.1f}ms "
+            f"{ready_str:>9}  {', '.join(result['loaded']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
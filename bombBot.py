@@ -3,10 +3,10 @@ import logging
 import json
 import random
 import re
-from datetime import datetime, timezone
 from collections import deque
 from twitchio.ext import commands
 from baseBot import BaseBot
+from countdown import Countdown
 
 # Configure logging
 logging.basicConfig(
@@ -23,7 +23,6 @@ MAX_BAN_DURATION = 1209600  # Maximum ban duration (2 weeks in seconds)
 BAN_MULTIPLIER = 1.258  # Exponential multiplier for ban duration (reaches ~2 weeks after 50 passes)
 INITIAL_SELECTION_MESSAGE_COUNT = 5  # Last 5 messages for initial selection
 PASS_MESSAGE_COUNT = 200  # Last 200 messages for passing eligibility
-UPDATE_INTERVAL = 0.5  # Send updates every 0.5 seconds to ensure reliability
 
 
 class BombBot(BaseBot):
@@ -41,46 +40,25 @@ class BombBot(BaseBot):
         self.recent_chatters = deque(maxlen=PASS_MESSAGE_COUNT)  # Keep last 200 chatters
         self.current_bomb_holder = None  # Username of current bomb holder
         self.previous_bomb_holder = None  # Username of previous bomb holder (to prevent passing back)
-        self.timer_start_time = None  # When the timer started
+        self.countdown = Countdown(TIMER_DURATION)  # Overlay counts down locally from its deadline
         self.timer_task = None  # Background task for timer countdown
-        self.update_task = None  # Background task for constant updates
         self.game_active = False
         self.pass_count = 0  # Track how many times the bomb has been passed
         self.current_ban_duration = INITIAL_BAN_DURATION  # Current ban duration
 
-    async def event_ready(self):
-        """Called when the bot is ready and connected to Twitch."""
-        await super().event_ready()
-        # Start the update task to constantly send updates
-        self.update_task = asyncio.create_task(self.constant_update_loop())
-
-    async def constant_update_loop(self):
-        """Constantly send updates to the overlay to ensure no missed updates."""
-        while True:
-            try:
-                if self.game_active:
-                    await self.send_bomb_update()
-                await asyncio.sleep(UPDATE_INTERVAL)
-            except Exception as e:
-                logger.error(f"Error in constant update loop: {e}")
-                await asyncio.sleep(UPDATE_INTERVAL)
-
     async def send_bomb_update(self):
-        """Send current bomb state to overlay."""
+        """
+        Send current bomb state to overlay. Only called on state changes
+        (ignite, pass, reconnect); the overlay counts down from the deadline.
+        """
         if self.current_bomb_holder is None:
             return
         
-        # Calculate remaining time (always based on 60 second timer)
-        if self.timer_start_time:
-            elapsed = (datetime.now(timezone.utc) - self.timer_start_time).total_seconds()
-            remaining = max(0, TIMER_DURATION - elapsed)
-        else:
-            remaining = TIMER_DURATION
-        
         payload = {
             "type": "bomb_update",
             "holder": self.current_bomb_holder,
-            "timer": round(remaining, 1),
+            "timer": round(self.countdown.remaining(), 1),
+            "countdown": self.countdown.to_message(),
             "game_active": self.game_active,
             "pass_count": self.pass_count,
             "ban_duration": self.current_ban_duration
@@ -93,7 +71,7 @@ class BombBot(BaseBot):
 
     async def start_timer(self):
         """Start the bomb timer countdown."""
-        self.timer_start_time = datetime.now(timezone.utc)
+        self.countdown.set(TIMER_DURATION, running=True)
         
         # Cancel existing timer task if any
         if self.timer_task:
@@ -128,7 +106,7 @@ class BombBot(BaseBot):
                 # Reset the game
                 self.current_bomb_holder = None
                 self.previous_bomb_holder = None
-                self.timer_start_time = None
+                self.countdown.set(TIMER_DURATION, running=False)
                 self.game_active = False
                 self.pass_count = 0
                 self.current_ban_duration = INITIAL_BAN_DURATION
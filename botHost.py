@@ -0,0 +1,286 @@
+"""
+Plugin host: one Twitch chat connection, token refresh loop, relay WebSocket
+and Helix pool shared by any number of in-process game modules.
+
+Usage:
+  python botHost.py                        # every module in AVAILABLE_MODULES
+  python botHost.py counting streak        # only these
+
+Mods and the broadcaster can switch modules at runtime from chat:
+  !module list | !module enable <name> | !module disable <name>
+  !module cache                            # shared message cache hit rates
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import sys
+from typing import Dict, Iterable, List, Optional, Type
+
+from twitchio.ext import commands
+
+from baseBot import BaseBot
+from message_cache import message_cache
+
+logger = logging.getLogger(__name__)
+
+OVERLAY_WS = "ws://localhost:6790"
+
+# Chat messages buffered per module before the oldest are dropped
+MODULE_QUEUE_SIZE = 1000
+
+# Module name -> "python_module:ClassName", imported only when the module is loaded
+AVAILABLE_MODULES = {
+    "counting": "countingBot:CountingModule",
+    "progressbar": "progressbarBot:ProgressBarModule",
+    "quickchat": "quickchatBot:QuickChatModule",
+    "streak": "streakBot:StreakModule",
+}
+
+
+class ChatModule(commands.Cog):
+    # Overlay actions this module answers as requests (see BaseBot.on_websocket_request)
+    OVERLAY_REQUESTS: List[str] = []
+
+    def __init__(self, host: "BotHost"):
+        """
+        Base class for a game hosted by BotHost.
+
+        Every module sees chat messages in chat order, one at a time, from its
+        own queue, so a slow module never holds up the others. Commands
+        declared with @commands.command() are registered while the module is
+        enabled. The Cog name (``class MyModule(ChatModule, name="my")``) is
+        the module's name.
+
+        Args:
+            host: The BotHost that owns the chat and relay connections
+        """
+        self.host = host
+        self.enabled = False
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    # Hooks for subclasses
+
+    async def on_enable(self):
+        """Called when the module is enabled, before it receives messages."""
+
+    async def on_disable(self):
+        """Called after the module stopped receiving messages."""
+
+    async def on_message(self, message):
+        """Handle one chat message (echoes are filtered out by the host)."""
+
+    async def on_websocket_action(self, action: str, data: dict):
+        """Handle an overlay action broadcast through the relay."""
+
+    async def on_websocket_request(self, action: str, data: dict) -> Optional[dict]:
+        """Answer an overlay request for one of OVERLAY_REQUESTS; None if not handled."""
+        return None
+
+    async def upon_connection(self):
+        """Called whenever the host (re)connects to the relay."""
+
+    # Shared services of the host
+
+    async def send_to_overlay(self, text: str):
+        await self.host.send_to_overlay(text)
+
+    async def timeout_user(self, user_id: str, username: str, duration: int = 30, reason: str = "Timeout") -> bool:
+        return await self.host.timeout_user(user_id, username, duration=duration, reason=reason)
+
+    async def untimeout_user(self, user_id: str, username: str) -> bool:
+        return await self.host.untimeout_user(user_id, username)
+
+    def queue_timeout(self, user_id: str, username: str, duration: int = 30, reason: str = "Timeout") -> asyncio.Future:
+        return self.host.queue_timeout(user_id, username, duration=duration, reason=reason)
+
+    def queue_announce(self, channel, text: str) -> asyncio.Future:
+        return self.host.queue_announce(channel, text)
+
+    async def get_user_id(self, username: str) -> str:
+        return await self.host.get_user_id(username)
+
+    # Dispatch
+
+    def _start(self):
+        self._queue = asyncio.Queue(maxsize=MODULE_QUEUE_SIZE)
+        self._worker = asyncio.create_task(self._run())
+
+    async def _stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._queue = None
+
+    def dispatch(self, message):
+        """Queue a chat message for this module without waiting for it."""
+        if self._queue is None:
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            logger.warning(f"Module {self.name} is falling behind; dropped its oldest queued message")
+        self._queue.put_nowait(message)
+
+    async def _run(self):
+        while True:
+            message = await self._queue.get()
+            try:
+                await self.on_message(message)
+            except Exception as e:
+                logger.error(f"Module {self.name} failed on message: {e}", exc_info=True)
+
+
+class BotHost(BaseBot):
+    def __init__(self,
+                 modules: Iterable[Type[ChatModule]],
+                 enabled: Optional[Iterable[str]] = None,
+                 overlay_ws_url: Optional[str] = OVERLAY_WS,
+                 channel_name: str = "Feer"):
+        """
+        Run several game modules on one chat connection.
+
+        Args:
+            modules: ChatModule classes to load
+            enabled: Names of the modules to enable at startup (default: all)
+            overlay_ws_url: Relay URL shared by all modules, or None for none
+            channel_name: Twitch channel to join
+        """
+        super().__init__(
+            overlay_ws_url=overlay_ws_url,
+            prefix='!',
+            channel_name=channel_name,
+            require_client_id=True
+        )
+        self.modules: Dict[str, ChatModule] = {}
+        for module_cls in modules:
+            module = module_cls(self)
+            self.modules[module.name] = module
+        self._startup_modules = list(self.modules) if enabled is None else list(enabled)
+        self.OVERLAY_REQUESTS = []
+
+    async def event_ready(self):
+        for name in self._startup_modules:
+            await self.enable_module(name)
+        await super().event_ready()
+
+    async def enable_module(self, name: str) -> bool:
+        """Start delivering chat to a module and register its commands."""
+        module = self.modules.get(name)
+        if module is None or module.enabled:
+            return False
+        self.add_cog(module)
+        try:
+            await module.on_enable()
+        except Exception as e:
+            logger.error(f"Module {name} failed to enable: {e}", exc_info=True)
+            self.remove_cog(name)
+            return False
+        module._start()
+        module.enabled = True
+        new_requests = [a for a in module.OVERLAY_REQUESTS if a not in self.OVERLAY_REQUESTS]
+        self.OVERLAY_REQUESTS = self.OVERLAY_REQUESTS + new_requests
+        if new_requests and self.ws is not None:
+            await self.send_to_overlay(json.dumps({"relay": "register", "actions": new_requests}))
+        logger.info(f"Module {name} enabled")
+        return True
+
+    async def disable_module(self, name: str) -> bool:
+        """Stop delivering chat to a module; messages still queued for it are discarded."""
+        module = self.modules.get(name)
+        if module is None or not module.enabled:
+            return False
+        module.enabled = False
+        await module._stop()
+        self.remove_cog(name)
+        # Requests only this module answered now get no_handler from the relay
+        still_handled = {a for m in self.enabled_modules() for a in m.OVERLAY_REQUESTS}
+        removed = [a for a in module.OVERLAY_REQUESTS if a not in still_handled]
+        self.OVERLAY_REQUESTS = [a for a in self.OVERLAY_REQUESTS if a not in removed]
+        if removed and self.ws is not None:
+            await self.send_to_overlay(json.dumps({"relay": "unregister", "actions": removed}))
+        try:
+            await module.on_disable()
+        except Exception as e:
+            logger.error(f"Module {name} failed to disable cleanly: {e}", exc_info=True)
+        logger.info(f"Module {name} disabled")
+        return True
+
+    def enabled_modules(self) -> List[ChatModule]:
+        return [module for module in self.modules.values() if module.enabled]
+
+    async def event_message(self, message):
+        if message.echo:
+            return
+        # Same order for every module; each processes at its own pace
+        for module in self.enabled_modules():
+            module.dispatch(message)
+        await self.handle_commands(message)
+
+    async def upon_connection(self):
+        for module in self.enabled_modules():
+            try:
+                await module.upon_connection()
+            except Exception as e:
+                logger.error(f"Module {module.name} failed on relay connection: {e}")
+
+    async def on_websocket_action(self, action: str, data: dict):
+        for module in self.enabled_modules():
+            try:
+                await module.on_websocket_action(action, data)
+            except Exception as e:
+                logger.error(f"Module {module.name} failed on action {action}: {e}")
+
+    async def on_websocket_request(self, action: str, data: dict) -> Optional[dict]:
+        for module in self.enabled_modules():
+            if action in module.OVERLAY_REQUESTS:
+                return await module.on_websocket_request(action, data)
+        return None
+
+    @commands.command(name='module')
+    async def module_command(self, ctx: commands.Context, verb: str = "list", name: str = None):
+        """List, enable or disable hosted modules, or show cache hit rates. (Mods/Broadcaster only)"""
+        is_broadcaster = getattr(ctx.author, "is_broadcaster", False)
+        is_mod = getattr(ctx.author, "is_mod", False)
+        if not (is_broadcaster or is_mod):
+            return
+
+        if verb == "enable" and name:
+            changed = await self.enable_module(name)
+        elif verb == "disable" and name:
+            changed = await self.disable_module(name)
+        elif verb == "cache":
+            stats = message_cache.stats()
+            rates = ", ".join(f"{n} {s['hit_rate']:.0%}" for n, s in stats["classifiers"].items())
+            await ctx.send(f"Message cache: {stats['hit_rate']:.0%} hits, {stats['entries']} messages ({rates or 'unused'})")
+            return
+        else:
+            states = ", ".join(f"{n}{'' if m.enabled else ' (off)'}" for n, m in self.modules.items())
+            await ctx.send(f"Modules: {states}")
+            return
+        if changed:
+            await ctx.send(f"Module {name} {verb}d")
+        else:
+            await ctx.send(f"Module {name} is unknown or already {verb}d")
+
+
+def load_module_class(name: str) -> Type[ChatModule]:
+    """Import a module class from AVAILABLE_MODULES."""
+    module_path, class_name = AVAILABLE_MODULES[name].split(":")
+    return getattr(importlib.import_module(module_path), class_name)
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(AVAILABLE_MODULES)
+    unknown = [n for n in names if n not in AVAILABLE_MODULES]
+    if unknown:
+        logger.error(f"Unknown modules: {', '.join(unknown)} (available: {', '.join(AVAILABLE_MODULES)})")
+        sys.exit(1)
+    # Load every available module so disabled ones can be enabled from chat later
+    bot = BotHost([load_module_class(n) for n in AVAILABLE_MODULES], enabled=names)
+    bot.run()
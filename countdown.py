@@ -0,0 +1,86 @@
+import time
+from typing import Optional
+
+
+class Countdown:
+    def __init__(self, seconds: float = 0.0, rate: float = 1.0, running: bool = False):
+        """
+        A countdown kept on the monotonic clock and published to overlays as
+        an absolute deadline, so bots only message the relay when the timer
+        changes (start, pause, time added, reset) instead of on every tick.
+
+        Overlays count down locally from the deadline, using the clock offset
+        they measure against the relay ({"relay": "clock"} pings).
+
+        Args:
+            seconds: Initial time on the clock
+            rate: Countdown speed (1.0 = real time, 2.0 = double speed)
+            running: Start counting down immediately
+        """
+        self.rate = rate
+        self._remaining = float(seconds)
+        self._anchor: Optional[float] = time.monotonic() if running else None
+
+    @property
+    def running(self) -> bool:
+        return self._anchor is not None
+
+    def remaining(self) -> float:
+        """Seconds left right now (never negative)."""
+        if self._anchor is None:
+            return max(0.0, self._remaining)
+        elapsed = (time.monotonic() - self._anchor) * self.rate
+        return max(0.0, self._remaining - elapsed)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def _rebase(self):
+        """Fold elapsed time into the stored remaining value."""
+        if self._anchor is not None:
+            self._remaining = self.remaining()
+            self._anchor = time.monotonic()
+
+    def set(self, seconds: float, running: Optional[bool] = None):
+        """Put a new value on the clock, optionally starting or stopping it."""
+        self._remaining = float(seconds)
+        if running is None:
+            running = self.running
+        self._anchor = time.monotonic() if running else None
+
+    def add(self, seconds: float):
+        self._rebase()
+        self._remaining = max(0.0, self._remaining + seconds)
+
+    def pause(self):
+        self._rebase()
+        self._anchor = None
+
+    def resume(self):
+        if self._anchor is None:
+            self._anchor = time.monotonic()
+
+    def set_rate(self, rate: float):
+        self._rebase()
+        self.rate = rate
+
+    def to_message(self) -> dict:
+        """
+        Wire form of the timer:
+          remaining   seconds left at server_time
+          running     whether it is counting down
+          rate        countdown speed
+          server_time sender's UNIX time when the message was built
+          deadline    UNIX time the timer hits zero (None when paused)
+        """
+        now = time.time()
+        remaining = self.remaining()
+        running = self.running and remaining > 0 and self.rate > 0
+        return {
+            "remaining": round(remaining, 3),
+            "running": running,
+            "rate": self.rate,
+            "server_time": now,
+            "deadline": now + remaining / self.rate if running else None,
+        }
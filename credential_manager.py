@@ -1,25 +1,34 @@
 import os
 import time
-import requests
+import asyncio
 import logging
 from pathlib import Path
 from typing import Optional, Tuple
 from dotenv import load_dotenv
+from token_store import SharedTokenStore, atomic_write_text
 
 logger = logging.getLogger(__name__)
 
+TOKEN_URL = 'https://id.twitch.tv/oauth2/token'
+# Refresh this many seconds before the token actually expires
+REFRESH_BUFFER = 300
+
 class CredentialManager:
-    def __init__(self, env_file: str = ".env"):
+    def __init__(self, env_file: str = ".env", token_store: Optional[SharedTokenStore] = None):
         """
         Initialize the credential manager.
         
         Args:
             env_file: Path to the .env file
+            token_store: Shared cross-process token store (defaults to one next to env_file)
         """
         self.env_file = Path(env_file)
         self.last_refresh_time = 0
         self.token_expiry = 0  # Will be set when we get a token
+        self.token_store = token_store or SharedTokenStore(self.env_file.with_name(".twitch_tokens.json"))
         self._load_credentials()
+        # Reuse a still-valid token refreshed by another bot process
+        self._adopt_store()
         
     def _load_credentials(self):
         """Load credentials from .env file."""
@@ -38,24 +47,47 @@ class CredentialManager:
             raise ValueError(f"Missing required credentials: {', '.join(missing)}")
 
     def _update_env_file(self, access_token: str, refresh_token: str):
-        """Update the .env file with new tokens."""
+        """Update the .env file with new tokens (atomically, via temp file + rename)."""
         with open(self.env_file, "r") as file:
             lines = file.readlines()
 
-        with open(self.env_file, "w") as file:
-            for line in lines:
-                if line.startswith("TWITCH_BOT_ACCESS_TOKEN="):
-                    file.write(f"TWITCH_BOT_ACCESS_TOKEN={access_token}\n")
-                elif line.startswith("TWITCH_BOT_REFRESH_TOKEN="):
-                    file.write(f"TWITCH_BOT_REFRESH_TOKEN={refresh_token}\n")
-                else:
-                    file.write(line)
+        new_lines = []
+        for line in lines:
+            if line.startswith("TWITCH_BOT_ACCESS_TOKEN="):
+                new_lines.append(f"TWITCH_BOT_ACCESS_TOKEN={access_token}\n")
+            elif line.startswith("TWITCH_BOT_REFRESH_TOKEN="):
+                new_lines.append(f"TWITCH_BOT_REFRESH_TOKEN={refresh_token}\n")
+            else:
+                new_lines.append(line)
+        atomic_write_text(self.env_file, "".join(new_lines))
         
         logger.info("✅ .env file updated with new tokens")
 
+    def _adopt_store(self) -> bool:
+        """
+        Take the tokens from the shared store if they outlive ours.
+        Returns True if the in-memory tokens changed.
+        """
+        data = self.token_store.read()
+        if not data or data.get("expires_at", 0) <= self.token_expiry:
+            return False
+        self.access_token = data["access_token"]
+        self.refresh_token = data["refresh_token"]
+        self.token_expiry = data["expires_at"]
+        logger.info("Using token from shared token store")
+        return True
+
+    def _needs_refresh(self) -> bool:
+        return time.time() >= self.token_expiry - REFRESH_BUFFER
+
+    def _save_tokens(self, access_token: str, refresh_token: str):
+        """Persist refreshed tokens to the shared store and .env. Caller holds the store lock."""
+        self.token_store.write(access_token, refresh_token, self.token_expiry)
+        self._update_env_file(access_token, refresh_token)
+
     def _refresh_token(self) -> Tuple[Optional[str], Optional[str]]:
         """Refresh the Twitch access token."""
-        url = 'https://id.twitch.tv/oauth2/token'
+        url = TOKEN_URL
         payload = {
             'grant_type': 'refresh_token',
             'refresh_token': self.refresh_token,
@@ -64,6 +96,8 @@ class CredentialManager:
         }
 
         try:
+            import requests
+
             response = requests.post(url, data=payload)
             if response.status_code == 200:
                 data = response.json()
@@ -84,21 +118,25 @@ class CredentialManager:
         Get a valid access token, refreshing if necessary.
         Returns None if unable to get a valid token.
         """
-        current_time = time.time()
+        self._adopt_store()
         
         # Refresh if token is expired or will expire in the next 5 minutes
-        if current_time >= self.token_expiry - 300:  # 5 minute buffer
-            logger.info("Token expired or expiring soon, refreshing...")
-            new_access, new_refresh = self._refresh_token()
-            
-            if new_access and new_refresh:
-                self.access_token = new_access
-                self.refresh_token = new_refresh
-                self._update_env_file(new_access, new_refresh)
-                self.last_refresh_time = current_time
-            else:
-                logger.error("Failed to refresh token")
-                return None
+        if self._needs_refresh():
+            with self.token_store.lock:
+                # Another bot may have refreshed while we waited for the lock
+                self._adopt_store()
+                if self._needs_refresh():
+                    logger.info("Token expired or expiring soon, refreshing...")
+                    new_access, new_refresh = self._refresh_token()
+                    
+                    if new_access and new_refresh:
+                        self.access_token = new_access
+                        self.refresh_token = new_refresh
+                        self._save_tokens(new_access, new_refresh)
+                        self.last_refresh_time = time.time()
+                    else:
+                        logger.error("Failed to refresh token")
+                        return None
                 
         return self.access_token
 
@@ -111,6 +149,8 @@ class CredentialManager:
             return False
             
         try:
+            import requests
+
             response = requests.get(
                 'https://id.twitch.tv/oauth2/validate',
                 headers={'Authorization': f'OAuth {self.access_token}'}
@@ -122,4 +162,92 @@ class CredentialManager:
             return False
         except Exception as e:
             logger.error(f"Error validating token: {e}")
-            return False 
\ No newline at end of file
+            return False
+
+
+class AsyncCredentialManager(CredentialManager):
+    """
+    Credential manager for code running inside the event loop.
+
+    The synchronous API is kept for start-up and scripts; the async methods
+    use non-blocking HTTP and de-duplicate concurrent refreshes so that only
+    one request to id.twitch.tv is ever in flight.
+    """
+
+    def __init__(self, env_file: str = ".env"):
+        super().__init__(env_file)
+        self._refresh_future: Optional[asyncio.Future] = None
+
+    def seconds_until_refresh(self) -> float:
+        """Seconds until the token enters the refresh buffer (0 if it already has)."""
+        return max(0.0, self.token_expiry - REFRESH_BUFFER - time.time())
+
+    async def _refresh_token_async(self) -> Tuple[Optional[str], Optional[str]]:
+        """Refresh the Twitch access token without blocking the event loop."""
+        import aiohttp
+
+        payload = {
+            'grant_type': 'refresh_token',
+            'refresh_token': self.refresh_token,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+        }
+
+        try:
+            timeout = aiohttp.ClientTimeout(total=15)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.post(TOKEN_URL, data=payload) as response:
+                    if response.status == 200:
+                        data = await response.json()
+                        access_token = data['access_token']
+                        new_refresh_token = data.get('refresh_token', self.refresh_token)
+                        self.token_expiry = time.time() + data.get('expires_in', 3600)  # Default to 1 hour if not provided
+                        logger.info("✅ Token refreshed successfully")
+                        return access_token, new_refresh_token
+                    else:
+                        logger.error(f"❌ Error refreshing token: {response.status} {await response.text()}")
+                        return None, None
+        except Exception as e:
+            logger.error(f"❌ Exception while refreshing token: {e}")
+            return None, None
+
+    async def _do_refresh(self) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        # Waiting for another process's refresh must not block the loop, and a
+        # cancelled refresh must not leave the cross-process lock held
+        await self.token_store.lock.acquire_async()
+        try:
+            if self._adopt_store() and not self._needs_refresh():
+                return self.access_token
+            new_access, new_refresh = await self._refresh_token_async()
+            if new_access and new_refresh:
+                self.access_token = new_access
+                self.refresh_token = new_refresh
+                # File I/O off the loop
+                await loop.run_in_executor(None, self._save_tokens, new_access, new_refresh)
+                self.last_refresh_time = time.time()
+                return self.access_token
+            logger.error("Failed to refresh token")
+            return None
+        finally:
+            self.token_store.lock.release()
+
+    async def refresh(self) -> Optional[str]:
+        """
+        Refresh the token now. Concurrent callers share a single request.
+        Returns None if the refresh failed.
+        """
+        if self._refresh_future is None or self._refresh_future.done():
+            self._refresh_future = asyncio.ensure_future(self._do_refresh())
+        return await asyncio.shield(self._refresh_future)
+
+    async def get_valid_token_async(self) -> Optional[str]:
+        """
+        Get a valid access token, refreshing if necessary.
+        Returns None if unable to get a valid token.
+        """
+        self._adopt_store()
+        if self.seconds_until_refresh() <= 0:
+            logger.info("Token expired or expiring soon, refreshing...")
+            return await self.refresh()
+        return self.access_token
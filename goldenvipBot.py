@@ -2,10 +2,10 @@ import asyncio
 import logging
 import json
 import random
-from datetime import datetime, timezone
 from collections import deque
 from twitchio.ext import commands
 from baseBot import BaseBot
+from countdown import Countdown
 
 # Configure logging
 logging.basicConfig(
@@ -20,7 +20,6 @@ TIMER_DURATION = 30  # 30s countdown; at 0 the holder gets real VIP and game end
 INITIAL_SELECTION_MESSAGE_COUNT = 5  # Last 5 messages for initial selection
 STEAL_MESSAGE_COUNT = 200  # Last 200 messages for steal eligibility
 MAX_STEALS_PER_USER = 3
-UPDATE_INTERVAL = 0.5  # Send updates every 0.5 seconds to ensure reliability
 
 
 class GoldenVipBot(BaseBot):
@@ -38,40 +37,19 @@ class GoldenVipBot(BaseBot):
         self.recent_chatters = deque(maxlen=STEAL_MESSAGE_COUNT)
         self.current_vip_holder = None
         self.steal_counts = {}  # username_lower -> number of steals used (max 5)
-        self.timer_start_time = None
+        self.countdown = Countdown(TIMER_DURATION)  # Overlay counts down locally from its deadline
         self.timer_task = None
-        self.update_task = None
         self.game_active = False
 
-    async def event_ready(self):
-        """Called when the bot is ready and connected to Twitch."""
-        await super().event_ready()
-        self.update_task = asyncio.create_task(self.constant_update_loop())
-
-    async def constant_update_loop(self):
-        """Constantly send updates to the overlay."""
-        while True:
-            try:
-                if self.game_active and self.current_vip_holder is not None:
-                    await self.send_vip_update()
-                await asyncio.sleep(UPDATE_INTERVAL)
-            except Exception as e:
-                logger.error(f"Error in constant update loop: {e}")
-                await asyncio.sleep(UPDATE_INTERVAL)
-
     async def send_vip_update(self):
-        """Send current VIP state and timer to overlay."""
+        """Send current VIP state and timer deadline to overlay (on start, steal and reconnect only)."""
         if self.current_vip_holder is None:
             return
-        if self.timer_start_time:
-            elapsed = (datetime.now(timezone.utc) - self.timer_start_time).total_seconds()
-            remaining = max(0, TIMER_DURATION - elapsed)
-        else:
-            remaining = TIMER_DURATION
         payload = {
             "type": "vip_update",
             "holder": self.current_vip_holder,
-            "timer": round(remaining, 1),
+            "timer": round(self.countdown.remaining(), 1),
+            "countdown": self.countdown.to_message(),
             "game_active": self.game_active
         }
         try:
@@ -81,7 +59,7 @@ class GoldenVipBot(BaseBot):
 
     async def start_timer(self):
         """Start the 1-minute countdown. When it hits 0, holder gets real VIP and game ends."""
-        self.timer_start_time = datetime.now(timezone.utc)
+        self.countdown.set(TIMER_DURATION, running=True)
         if self.timer_task:
             self.timer_task.cancel()
         self.timer_task = asyncio.create_task(self.timer_countdown())
@@ -116,7 +94,7 @@ class GoldenVipBot(BaseBot):
     def _reset_game(self):
         """Clear game state (no overlay message)."""
         self.current_vip_holder = None
-        self.timer_start_time = None
+        self.countdown.set(TIMER_DURATION, running=False)
         self.game_active = False
         if self.timer_task:
             self.timer_task.cancel()
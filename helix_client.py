@@ -0,0 +1,338 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+HELIX_BASE_URL = "https://api.twitch.tv/helix"
+
+# Request priorities (lower is served first)
+PRIORITY_MODERATION = 0  # timeouts / untimeouts
+PRIORITY_LOOKUP = 1      # user ID lookups that usually precede a timeout
+PRIORITY_VIP = 2         # VIP grants / removals
+PRIORITY_READ = 3        # bulk reads such as the banned list
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Bucket points only moderation calls may spend, so a burst of reads or
+# lookups can never leave a timeout waiting for the next window
+MODERATION_RESERVE = 20
+
+
+def lower_keys(headers) -> dict:
+    """Plain dict of HTTP headers with lower-case keys (header names are case-insensitive)."""
+    return {key.lower(): value for key, value in headers.items()}
+
+
+class HelixResponse:
+    def __init__(self, status: int, headers: dict, data: Any = None, text: str = ""):
+        """
+        Result of a Helix request. The body is read before the connection
+        is handed back to the pool, so callers never hold a socket.
+
+        Args:
+            status: HTTP status code
+            headers: Response headers, keys lower-cased
+            data: Parsed JSON body, or None if the body was not JSON
+            text: Raw response body
+        """
+        self.status = status
+        self.headers = headers
+        self.data = data
+        self.text = text
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+
+class HelixScheduler:
+    def __init__(self, default_limit: int = 800, max_retries: int = 5, reserve: int = 0):
+        """
+        Token-bucket scheduler for Helix calls. The bucket is tracked from the
+        Ratelimit-Limit/Remaining/Reset response headers and queued requests
+        are released highest priority first. 429s and transient 5xx responses
+        are re-queued and retried once the bucket refills instead of dropped.
+
+        Args:
+            default_limit: Assumed bucket size until Twitch reports one
+            max_retries: Times a request is re-queued before its last response is returned
+            reserve: Points held back for higher-priority lanes (only PRIORITY_MODERATION may use them)
+        """
+        self.limit = default_limit
+        self.remaining = default_limit
+        self.reset_at = 0.0
+        self.max_retries = max_retries
+        self.reserve = reserve
+        self._queue: list = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._closed = False
+        self.retried = 0
+        self.rate_limited = 0
+
+    def submit(self, priority: int, send: Callable[[], Awaitable["HelixResponse"]]) -> asyncio.Future:
+        """Queue a request and return a future resolving to its HelixResponse."""
+        loop = asyncio.get_running_loop()
+        # A new request reopens a closed scheduler (the session is recreated on demand too)
+        self._closed = False
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = loop.create_task(self._dispatch_loop())
+        future = loop.create_future()
+        self._push(priority, send, future, 0)
+        return future
+
+    def _push(self, priority: int, send, future: asyncio.Future, attempt: int):
+        if self._closed:
+            # A retry that was sleeping when close() ran; nothing would dispatch it
+            self._fail(future)
+            return
+        heapq.heappush(self._queue, (priority, next(self._counter), send, future, attempt))
+        self._wakeup.set()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def _refill_if_reset(self):
+        if self.reset_at and time.time() >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = 0.0
+
+    def available(self, priority: int = PRIORITY_READ) -> int:
+        """Points that a request of the given priority may spend right now."""
+        self._refill_if_reset()
+        # Never hold back more than a quarter of the bucket, or small buckets would starve reads
+        held_back = 0 if priority == PRIORITY_MODERATION else min(self.reserve, self.limit // 4)
+        return max(0, self.remaining - held_back)
+
+    async def _dispatch_loop(self):
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            priority = self._queue[0][0]
+            if self.available(priority) <= 0:
+                wait = max(0.05, self.reset_at - time.time()) if self.reset_at else 1.0
+                logger.warning(f"Helix rate limit reached, holding {len(self._queue)} requests for {wait:.2f}s")
+                await asyncio.sleep(wait)
+                if self.reset_at and time.time() >= self.reset_at:
+                    self._refill_if_reset()
+                elif not self.reset_at:
+                    self.remaining = self.limit
+                continue
+
+            priority, _, send, future, attempt = heapq.heappop(self._queue)
+            if future.cancelled():
+                continue
+            self.remaining -= 1
+            task = asyncio.create_task(self._run(priority, send, future, attempt))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, priority: int, send, future: asyncio.Future, attempt: int):
+        try:
+            await self._attempt(priority, send, future, attempt)
+        except asyncio.CancelledError:
+            self._fail(future)
+            raise
+
+    async def _attempt(self, priority: int, send, future: asyncio.Future, attempt: int):
+        try:
+            response = await send()
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        self.update_from_headers(response.headers)
+        if response.status in RETRY_STATUSES and attempt < self.max_retries:
+            self.retried += 1
+            if response.status == 429:
+                self.rate_limited += 1
+                self.remaining = 0
+                if not self.reset_at:
+                    self.reset_at = time.time() + 1.0
+            else:
+                await asyncio.sleep(min(0.25 * (2 ** attempt), 4.0))
+            logger.info(f"Helix returned {response.status}, retrying (attempt {attempt + 1}/{self.max_retries})")
+            self._push(priority, send, future, attempt + 1)
+            return
+
+        if not future.done():
+            future.set_result(response)
+
+    @staticmethod
+    def _fail(future: asyncio.Future):
+        if not future.done():
+            future.set_exception(ConnectionError("Helix client closed"))
+
+    def close(self):
+        """Stop the dispatcher and fail every queued or in-flight request, so nobody waits on it forever."""
+        self._closed = True
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for task in list(self._inflight):
+            task.cancel()
+        queued, self._queue = self._queue, []
+        for _, _, _, future, _ in queued:
+            self._fail(future)
+        if queued:
+            logger.info(f"Helix scheduler closed with {len(queued)} queued requests")
+
+    def update_from_headers(self, headers: dict):
+        """Sync the local bucket with the Ratelimit-* headers from a response (any key case)."""
+        headers = lower_keys(headers)
+        try:
+            limit = headers.get("ratelimit-limit")
+            remaining = headers.get("ratelimit-remaining")
+            reset = headers.get("ratelimit-reset")
+            if limit is not None:
+                self.limit = int(limit)
+            if remaining is None or reset is None:
+                return
+            remaining = int(remaining)
+            reset = float(reset)
+            if reset > self.reset_at:
+                # Newer window: trust the server's count
+                self.reset_at = reset
+                self.remaining = remaining
+            elif reset == self.reset_at:
+                # Same window, responses may arrive out of order
+                self.remaining = min(self.remaining, remaining)
+        except (TypeError, ValueError):
+            pass
+
+
+class HelixClient:
+    def __init__(self,
+                 client_id: Optional[str],
+                 token_getter: Callable[[], Optional[str]],
+                 pool_size: int = 20,
+                 keepalive_timeout: float = 60.0,
+                 dns_cache_ttl: int = 300,
+                 request_timeout: float = 10.0,
+                 moderation_reserve: int = MODERATION_RESERVE):
+        """
+        Long-lived, connection-pooled HTTP client for the Twitch Helix API.
+
+        Args:
+            client_id: Twitch application client ID sent with every request
+            token_getter: Callable returning the current bot access token
+            pool_size: Maximum number of pooled connections to api.twitch.tv
+            keepalive_timeout: Seconds an idle connection is kept open
+            dns_cache_ttl: Seconds a resolved address is cached
+            request_timeout: Total timeout for a single request in seconds
+            moderation_reserve: Rate-limit points held back for timeouts/untimeouts
+        """
+        self.client_id = client_id
+        self.token_getter = token_getter
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.request_timeout = request_timeout
+        self._session = None  # aiohttp.ClientSession, created on first request
+        self._session_lock = asyncio.Lock()
+        self.scheduler = HelixScheduler(reserve=moderation_reserve)
+
+    async def _get_session(self):
+        """Create the shared session on first use (must run inside the event loop)."""
+        if self._session is not None and not self._session.closed:
+            return self._session
+        import aiohttp
+
+        async with self._session_lock:
+            if self._session is None or self._session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.pool_size,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=self.dns_cache_ttl,
+                    use_dns_cache=True,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=connector,
+                    timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+                )
+                logger.debug("Helix session created")
+        return self._session
+
+    def _headers(self) -> dict:
+        return {
+            "Authorization": f"Bearer {self.token_getter()}",
+            "Client-Id": self.client_id or "",
+        }
+
+    async def request(self,
+                      method: str,
+                      path: str,
+                      params: Any = None,
+                      json: Optional[dict] = None,
+                      priority: int = PRIORITY_READ) -> HelixResponse:
+        """
+        Send a request to Helix through the rate-limit scheduler.
+
+        Args:
+            method: HTTP method (GET, POST, DELETE, ...)
+            path: Helix path relative to the API root, e.g. "/users"
+            params: Query parameters (dict or list of tuples for repeated keys)
+            json: Optional JSON body
+            priority: One of the PRIORITY_* lanes; lower values go first
+
+        Returns:
+            HelixResponse: Status, headers and the already-read body
+        """
+        return await self.scheduler.submit(
+            priority, lambda: self._send(method, path, params, json)
+        )
+
+    async def _send(self, method: str, path: str, params: Any, json: Optional[dict]) -> HelixResponse:
+        """Perform a single HTTP request over the pooled session."""
+        session = await self._get_session()
+        async with session.request(
+            method,
+            f"{HELIX_BASE_URL}{path}",
+            params=params,
+            json=json,
+            headers=self._headers(),
+        ) as response:
+            text = await response.text()
+            data = None
+            if response.content_type == "application/json" and text:
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError:
+                    data = None
+            return HelixResponse(response.status, lower_keys(response.headers), data, text)
+
+    async def warm_up(self):
+        """
+        Resolve DNS and complete the TLS handshake ahead of the first real
+        call, so the first timeout of the stream pays only one round-trip.
+        """
+        try:
+            session = await self._get_session()
+            async with session.get(f"{HELIX_BASE_URL}/", headers=self._headers()) as response:
+                await response.read()
+                self.scheduler.update_from_headers(lower_keys(response.headers))
+            logger.info("Helix connection pool warmed up")
+        except Exception as e:
+            logger.warning(f"Helix warm-up failed: {e}")
+
+    async def close(self):
+        """Close the pooled session and its connections."""
+        self.scheduler.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Helix session closed")
+        self._session = None
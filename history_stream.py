@@ -0,0 +1,78 @@
+from typing import List, Optional
+
+RESYNC_ACTION = "resync"
+
+
+class HistoryStream:
+    def __init__(self, message_type: str, history_field: str, keyframe_interval: int = 300):
+        """
+        Keyframe + delta encoder for chart histories sent to overlays.
+
+        The first message (and any message after a resync request) carries the
+        full history; later messages only carry the points appended since the
+        previous message and how many were trimmed from the front. Every
+        message has a sequence number so the overlay can spot a gap and ask
+        for a keyframe with {"action": "resync", "stream": <message_type>}.
+
+        The history must only grow at the end and shrink at the front.
+
+        Args:
+            message_type: The overlay message "type" (e.g. "begathon_timer")
+            history_field: Name of the full-history field in keyframes
+            keyframe_interval: Send a full keyframe at least every N messages so
+                the relay's cached copy never gets too old
+        """
+        self.message_type = message_type
+        self.history_field = history_field
+        self.keyframe_interval = keyframe_interval
+        self.seq = 0
+        self._sent_length: Optional[int] = None
+        self._last_point = None
+        self._since_keyframe = 0
+
+    def request_keyframe(self):
+        """Make the next message a full keyframe (after a reconnect or resync request)."""
+        self._sent_length = None
+
+    def is_resync_request(self, data: dict) -> bool:
+        return data.get("action") == RESYNC_ACTION and data.get("stream") in (None, self.message_type)
+
+    def _appended(self, history: List[dict]) -> Optional[int]:
+        """How many points were appended since the last message, or None if that can't be told."""
+        if self._sent_length is None or self._since_keyframe >= self.keyframe_interval:
+            return None
+        if self._last_point is None:
+            return len(history)
+        # Walk back to the last point we sent; everything after it is new
+        for offset, point in enumerate(reversed(history)):
+            if point == self._last_point:
+                return offset
+        return None
+
+    def encode(self, history: List[dict], **fields) -> dict:
+        """
+        Build the next message for the given history.
+
+        Args:
+            history: The full current history
+            **fields: Current values sent with every message (e.g. timer_seconds)
+
+        Returns:
+            dict: A keyframe or delta message ready for json.dumps
+        """
+        self.seq += 1
+        appended = self._appended(history)
+        message = {"type": self.message_type, "seq": self.seq}
+        if appended is None:
+            message["mode"] = "keyframe"
+            message[self.history_field] = list(history)
+            self._since_keyframe = 0
+        else:
+            message["mode"] = "delta"
+            message["append"] = history[len(history) - appended:] if appended else []
+            message["drop"] = self._sent_length + appended - len(history)
+            self._since_keyframe += 1
+        message.update(fields)
+        self._sent_length = len(history)
+        self._last_point = history[-1] if history else None
+        return message
@@ -0,0 +1,156 @@
+"""
+Multi-pattern keyword matching for chat triggers (Aho-Corasick).
+
+The patterns are compiled once into a trie with failure links. After that,
+every hit of every pattern in a message is found in one pass over the text.
+The cost depends on the message length, not on how many patterns there are,
+so a taboo list or an emote vocabulary can grow without slowing down chat.
+
+Modes:
+  SUBSTRING  the pattern appears anywhere ("ICANT" in "xICANTx")
+  WORD       the pattern is not next to a letter, digit or underscore
+  PREFIX     the message starts with the pattern
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Union
+
+SUBSTRING = "substring"
+WORD = "word"
+PREFIX = "prefix"
+
+
+class KeywordMatch:
+    __slots__ = ("pattern", "value", "start", "end")
+
+    def __init__(self, pattern: str, value: Hashable, start: int, end: int):
+        """
+        One hit of a pattern.
+
+        Args:
+            pattern: The pattern as given (not case-folded)
+            value: The value the pattern was registered with
+            start, end: Slice of the (case-folded, if ignore_case) text
+        """
+        self.pattern = pattern
+        self.value = value
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"KeywordMatch({self.pattern!r}, {self.value!r}, {self.start}, {self.end})"
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+class KeywordMatcher:
+    def __init__(self, patterns: Union[Iterable[str], Dict[str, Hashable]], mode: str = SUBSTRING,
+                 ignore_case: bool = False):
+        """
+        Compile a set of patterns.
+
+        Args:
+            patterns: Patterns to find. A dict maps each pattern to a value that
+                is returned with its matches (e.g. +5 / -5); otherwise the value
+                is the pattern itself
+            mode: SUBSTRING, WORD or PREFIX
+            ignore_case: Case-fold patterns and text (str.casefold)
+        """
+        if mode not in (SUBSTRING, WORD, PREFIX):
+            raise ValueError(f"Unknown match mode: {mode}")
+        self.mode = mode
+        self.ignore_case = ignore_case
+        if not isinstance(patterns, dict):
+            patterns = {pattern: pattern for pattern in patterns}
+
+        # Trie node i: goto[i] maps a character to a node, out[i] lists the
+        # patterns (as indices) ending at i, including via failure links
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self._patterns: List[str] = []
+        self._values: List[Hashable] = []
+        self._lengths: List[int] = []
+        for pattern, value in patterns.items():
+            self._add(pattern, value)
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def _fold(self, text: str) -> str:
+        return text.casefold() if self.ignore_case else text
+
+    def _add(self, pattern: str, value: Hashable):
+        key = self._fold(pattern)
+        if not key:
+            return
+        node = 0
+        for char in key:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = next_node
+        self._out[node].append(len(self._patterns))
+        self._patterns.append(pattern)
+        self._values.append(value)
+        self._lengths.append(len(key))
+
+    def _link(self):
+        # Breadth-first, so a node's failure target is linked before the node itself
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _match(self, index: int, text: str, end: int) -> Optional[KeywordMatch]:
+        start = end - self._lengths[index]
+        if self.mode == WORD:
+            if start > 0 and _is_word_char(text[start - 1]):
+                return None
+            if end < len(text) and _is_word_char(text[end]):
+                return None
+        return KeywordMatch(self._patterns[index], self._values[index], start, end)
+
+    def finditer(self, text: str):
+        """Yield every match in order of where it ends (overlapping matches included)."""
+        text = self._fold(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                if self.mode == PREFIX:
+                    return
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not node and self.mode == PREFIX:
+                return
+            for index in out[node]:
+                match = self._match(index, text, position + 1)
+                if match is not None and (self.mode != PREFIX or match.start == 0):
+                    yield match
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        return list(self.finditer(text))
+
+    def search(self, text: str) -> Optional[KeywordMatch]:
+        """The first match to end in the text, or None."""
+        return next(self.finditer(text), None)
+
+    def matches(self, text: str) -> bool:
+        return self.search(text) is not None
+
+    def values(self, text: str) -> List[Hashable]:
+        """Distinct values of the patterns found, in order of first match."""
+        return list(dict.fromkeys(match.value for match in self.finditer(text)))
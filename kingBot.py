@@ -1,9 +1,12 @@
 from baseBot import BaseBot
+from keyword_matcher import SUBSTRING, KeywordMatcher
+from streak_engine import (ROLE_BROADCASTER, ROLE_MOD, MessageView, StreakEngine, StreakEvent, StreakRule,
+                           starts_with)
+from audio_store import upload_audio
 import logging
 from twitchio.ext import commands
 import asyncio
 import json
-import base64
 import requests
 import websockets
 import os
@@ -13,7 +16,11 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+ROLE_KING = "king"
+
 class KingBot(BaseBot):
+    OVERLAY_REQUESTS = ["get_king"]
+
     def __init__(self):
         super().__init__(
             overlay_ws_url="ws://localhost:6790",  # Use the server.py WebSocket server
@@ -27,28 +34,16 @@ class KingBot(BaseBot):
         # Load king data from file
         self.king_username = self.load_king_data()
         
-        self.pray_mode = False
-        self.pray_streak = 0
-        self.pray_high_streak = 0
-        self.pray_lock = asyncio.Lock()
+        # Pray, polish and type trains ("pray", "polish", "type" rules) and the word each one shows in chat
+        self.streaks = StreakEngine()
+        self.train_words = {}
         self.pray_task = None
-
-        self.polish_mode = False
-        self.polish_streak = 0
-        self.polish_high_streak = 0
-        self.polish_lock = asyncio.Lock()
         self.polish_task = None
-
-        # Type mode variables
-        self.type_mode = False
-        self.type_word = None
-        self.type_streak = 0
-        self.type_high_streak = 0
-        self.type_lock = asyncio.Lock()
         self.type_task = None
 
         # Taboo word variables
-        self.taboo_word = None
+        self.taboo_words = []
+        self.taboo_matcher = None  # KeywordMatcher over taboo_words while a taboo is active
         self.taboo_task = None
         self.taboo_lock = asyncio.Lock()
 
@@ -360,30 +355,37 @@ class KingBot(BaseBot):
             logger.error(f"Error showing OBS source: {e}", exc_info=True)
             return False
 
+    def start_train(self, name: str, word: str):
+        """
+        Start a chat train: every message must start with `word`. The King and
+        Broadcaster don't take part; mods can break it but aren't timed out.
+        """
+        self.train_words[name] = word
+        self.streaks.start(StreakRule(
+            name,
+            starts_with(word),
+            skip_roles=(ROLE_KING, ROLE_BROADCASTER),
+            no_timeout_roles=(ROLE_MOD,),
+            cap=86400,  # 24-hour cap
+        ))
+
     @commands.command(name="pray")
     async def pray_command(self, ctx: commands.Context):
-        if self.is_king_or_broadcaster(ctx) and not self.pray_mode and not self.polish_mode:
-            self.pray_mode = True
-            self.pray_streak = 0
-            self.pray_high_streak = 0
+        if self.is_king_or_broadcaster(ctx) and not self.streaks.active("pray") and not self.streaks.active("polish"):
+            self.start_train("pray", "Pray")
             await ctx.send("Pray King of Marbles demands you pray! Pray")
             self.pray_task = asyncio.create_task(self._pray_timer(ctx))
 
     async def _pray_timer(self, ctx):
         await asyncio.sleep(30)
-        async with self.pray_lock:
-            if self.pray_mode:
-                await ctx.send(f"Pray session complete! Highest streak: {self.pray_high_streak}")
-                self.pray_mode = False
-                self.pray_streak = 0
-                self.pray_high_streak = 0
+        state = self.streaks.stop("pray")
+        if state is not None:
+            await ctx.send(f"Pray session complete! Highest streak: {state.high}")
 
     @commands.command(name="polish")
     async def polish_command(self, ctx: commands.Context):
-        if self.is_king_or_broadcaster(ctx) and not self.polish_mode and not self.pray_mode:
-            self.polish_mode = True
-            self.polish_streak = 0
-            self.polish_high_streak = 0
+        if self.is_king_or_broadcaster(ctx) and not self.streaks.active("polish") and not self.streaks.active("pray"):
+            self.start_train("polish", "POLISH")
             await ctx.send("POLISH The King demands you polish your marble! POLISH")
             self.polish_task = asyncio.create_task(self._polish_timer(ctx))
 
@@ -393,41 +395,31 @@ class KingBot(BaseBot):
 
     async def _polish_timer(self, ctx):
         await asyncio.sleep(30)
-        async with self.polish_lock:
-            if self.polish_mode:
-                await ctx.send(f"Polishing session complete! Highest streak: {self.polish_high_streak}")
-                self.polish_mode = False
-                self.polish_streak = 0
-                self.polish_high_streak = 0
+        state = self.streaks.stop("polish")
+        if state is not None:
+            await ctx.send(f"Polishing session complete! Highest streak: {state.high}")
 
     @commands.command(name="type")
     async def type_command(self, ctx: commands.Context):
-        if self.is_king_or_broadcaster(ctx) and not self.type_mode and not self.pray_mode and not self.polish_mode:
+        if self.is_king_or_broadcaster(ctx) and not any(self.streaks.active(n) for n in ("type", "pray", "polish")):
             args = ctx.message.content.split()
             if len(args) < 2:
                 await ctx.send("Usage: !type <word>")
                 return
-            self.type_word = args[1]
-            self.type_mode = True
-            self.type_streak = 0
-            self.type_high_streak = 0
+            type_word = args[1]
+            self.start_train("type", type_word)
             await ctx.send(f"=====👑The King of Marbles👑=====")
-            await ctx.send(f"CHAT IS IN {self.type_word} MODE FOR 30s")
+            await ctx.send(f"CHAT IS IN {type_word} MODE FOR 30s")
             await ctx.send(f"=============================")
             self.type_task = asyncio.create_task(self._type_timer(ctx))
 
     async def _type_timer(self, ctx):
         await asyncio.sleep(30)
-        async with self.type_lock:
-            if self.type_mode:
-                await ctx.send(f"=====👑The King of Marbles👑=====")
-                await ctx.send(f"{self.type_word} MODE OFF. HIGHEST STREAK: {self.type_high_streak}")
-                await ctx.send(f"=============================")
-                # await ctx.send(f"Type session complete! Highest streak: {self.type_high_streak}")
-                self.type_mode = False
-                self.type_word = None
-                self.type_streak = 0
-                self.type_high_streak = 0
+        state = self.streaks.stop("type")
+        if state is not None:
+            await ctx.send(f"=====👑The King of Marbles👑=====")
+            await ctx.send(f"{self.train_words['type']} MODE OFF. HIGHEST STREAK: {state.high}")
+            await ctx.send(f"=============================")
 
     @commands.command(name="taboo")
     async def taboo_command(self, ctx: commands.Context):
@@ -436,25 +428,31 @@ class KingBot(BaseBot):
             return
         args = ctx.message.content.split()
         if len(args) < 2:
-            await ctx.send("Usage: !taboo <word>")
+            await ctx.send("Usage: !taboo <word> [word ...]")
             return
-        taboo_word = args[1].lower()  # Store as lowercase for case-insensitive matching
-        
+        taboo_words = list(dict.fromkeys(word.lower() for word in args[1:]))
+
         async with self.taboo_lock:
             # Cancel existing taboo timer if one exists
             if self.taboo_task and not self.taboo_task.done():
                 self.taboo_task.cancel()
-            
-            self.taboo_word = taboo_word
-            await ctx.send(f"👑 The word ' {taboo_word} ' is now TABOO for 5 minutes! Say it and face the consequences! 👑")
+
+            self.taboo_words = taboo_words
+            # Case-insensitive, and a taboo word also counts as part of a longer word
+            self.taboo_matcher = KeywordMatcher(taboo_words, mode=SUBSTRING, ignore_case=True)
+            if len(taboo_words) == 1:
+                await ctx.send(f"👑 The word ' {taboo_words[0]} ' is now TABOO for 5 minutes! Say it and face the consequences! 👑")
+            else:
+                await ctx.send(f"👑 The words ' {' , '.join(taboo_words)} ' are now TABOO for 5 minutes! Say them and face the consequences! 👑")
             self.taboo_task = asyncio.create_task(self._taboo_timer(ctx))
 
     async def _taboo_timer(self, ctx):
         await asyncio.sleep(300)  # 5 minutes = 300 seconds
         async with self.taboo_lock:
-            if self.taboo_word:
-                await ctx.send(f"👑 The taboo word '{self.taboo_word}' is no longer taboo. 👑")
-                self.taboo_word = None
+            if self.taboo_words:
+                await ctx.send(f"👑 No longer taboo: {', '.join(self.taboo_words)} 👑")
+                self.taboo_words = []
+                self.taboo_matcher = None
 
     @commands.command(name="show")
     async def show_command(self, ctx: commands.Context):
@@ -662,7 +660,7 @@ class KingBot(BaseBot):
             return
         
         # Generate TTS on server side and send audio data to overlay (avoids CORS issues)
-        audio_data_url = None
+        audio_url = None
         if self.tts_api_token:
             try:
                 # Generate TTS using TTS Monster API
@@ -684,16 +682,14 @@ class KingBot(BaseBot):
                 if response.status_code == 200:
                     result = response.json()
                     if result.get("status") == 200:
-                        audio_url = result.get("url")
+                        tts_url = result.get("url")
                         # Download the audio file
-                        audio_response = requests.get(audio_url)
+                        audio_response = requests.get(tts_url)
                         if audio_response.status_code == 200:
-                            # Convert to base64 data URL
-                            audio_base64 = base64.b64encode(audio_response.content).decode('utf-8')
-                            # Determine MIME type (TTS Monster typically returns WAV)
-                            mime_type = "audio/wav"  # Default, could detect from URL or content
-                            audio_data_url = f"data:{mime_type};base64,{audio_base64}"
-                            logger.debug("TTS audio generated and converted to base64")
+                            # Hand the raw bytes to the relay's blob server; only the URL goes over the websocket
+                            # (TTS Monster typically returns WAV)
+                            audio_url = await upload_audio(audio_response.content, "audio/wav")
+                            logger.debug(f"TTS audio generated and uploaded: {audio_url}")
                         else:
                             logger.error(f"Failed to download audio: {audio_response.status_code}")
                     else:
@@ -708,15 +704,11 @@ class KingBot(BaseBot):
         overlay_data = {
             "type": "declare",
             "message": message,
-            "audio_data_url": audio_data_url  # Send base64 data URL instead of credentials
+            "audio_url": audio_url  # Overlay fetches the clip from the relay's blob server
         }
-        logger.debug(f"Sending declare overlay data: type={overlay_data['type']}, has_audio={bool(audio_data_url)}")
+        logger.debug(f"Sending declare overlay data: type={overlay_data['type']}, has_audio={bool(audio_url)}")
         await self.send_to_overlay(json.dumps(overlay_data))
 
-    def timeout_seconds(self, streak: int) -> int:
-        timeout = (7.5 * (2 ** streak)) + 1
-        return min(timeout, 86400)  # 24-hour cap
-
     async def upon_connection(self):
         await self.send_king_to_overlay()
         pass 
@@ -729,16 +721,12 @@ class KingBot(BaseBot):
             return
 
         try:
-            items = await self.get_banned_users()
-            timeouts = [it for it in items if it.get('expires_at')]
-            freed = 0
-            for it in timeouts:
-                user_id = it.get('user_id')
-                username = it.get('user_login') or it.get('user_name') or str(user_id)
-                if user_id:
-                    await self.untimeout_user(user_id, username)
-                    freed += 1
-                    await asyncio.sleep(0.25)  # small delay to avoid rate limits
+            # Full paginated fetch so timeouts issued elsewhere are freed too
+            timeouts = await self.refresh_timeouts()
+            results = await self.bulk_untimeout(
+                (entry['user_id'], entry['user']) for entry in timeouts
+            )
+            freed = sum(1 for ok in results.values() if ok)
             await ctx.send(f"Jailbreak complete. Freed {freed} {'soul' if freed == 1 else 'souls'}.")
         except Exception as e:
             logger.error(f"Error during jailbreak: {str(e)}")
@@ -756,71 +744,28 @@ class KingBot(BaseBot):
         is_king = message.author.display_name == self.king_username
         is_king_or_broadcaster = is_king or is_broadcaster
 
-        # Taboo word logic - check if message contains the taboo word
+        # Taboo word logic - one scan of the message finds any of the taboo words
         async with self.taboo_lock:
-            if self.taboo_word and message.author and not is_king_or_broadcaster:
-                content_lower = message.content.lower()
-                # Check if the taboo word appears in the message (as a whole word or part of a word)
-                if self.taboo_word in content_lower:
+            if self.taboo_matcher and message.author and not is_king_or_broadcaster:
+                hit = self.taboo_matcher.search(message.content)
+                if hit is not None:
                     username = message.author.display_name
                     user_id = message.author.id
                     if not is_mod:
-                        await self.timeout_user(user_id, username, duration=300, reason=f"Said the taboo word: {self.taboo_word}")
-                        await message.channel.send(f"👑 @{username} has been timed out for 5 minutes for saying the taboo word! 👑")
-
-        # Pray mode logic
-        if self.pray_mode and message.author and not is_king_or_broadcaster:
-            content = message.content.strip()
-            username = message.author.display_name
-            user_id = message.author.id
-            async with self.pray_lock:
-                if content.startswith("Pray"):
-                    self.pray_streak += 1
-                    if self.pray_streak > self.pray_high_streak:
-                        self.pray_high_streak = self.pray_streak
-                else:
-                    streak_broken = self.pray_streak
-                    timeout_duration = self.timeout_seconds(streak_broken)
-                    await message.channel.send(f"Pray {streak_broken} KingOfTheMarbles BANNED @{username}")
-                    if not is_mod:
-                        await self.timeout_user(user_id, username, duration=timeout_duration, reason=f"Broke pray streak of {streak_broken}")
-                    self.pray_streak = 0
-        
-        # Polish mode logic
-        if self.polish_mode and message.author and not is_king_or_broadcaster:
-            content = message.content.strip()
-            username = message.author.display_name
-            user_id = message.author.id
-            async with self.polish_lock:
-                if content.startswith("POLISH"):
-                    self.polish_streak += 1
-                    if self.polish_streak > self.polish_high_streak:
-                        self.polish_high_streak = self.polish_streak
-                else:
-                    streak_broken = self.polish_streak
-                    timeout_duration = self.timeout_seconds(streak_broken)
-                    await message.channel.send(f"POLISH {streak_broken} KingOfTheMarbles BANNED @{username}")
-                    if not is_mod:
-                        await self.timeout_user(user_id, username, duration=timeout_duration, reason=f"Broke POLISH streak of {streak_broken}")
-                    self.polish_streak = 0
-
-        # Type mode logic
-        if self.type_mode and message.author and not is_king_or_broadcaster:
-            content = message.content.strip()
-            username = message.author.display_name
-            user_id = message.author.id
-            async with self.type_lock:
-                if content.startswith(self.type_word):
-                    self.type_streak += 1
-                    if self.type_streak > self.type_high_streak:
-                        self.type_high_streak = self.type_streak
-                else:
-                    streak_broken = self.type_streak
-                    timeout_duration = self.timeout_seconds(streak_broken)
-                    await message.channel.send(f"{self.type_word} {streak_broken} KingOfTheMarbles BANNED @{username}")
-                    if not is_mod:
-                        await self.timeout_user(user_id, username, duration=timeout_duration, reason=f"Broke TYPE streak of {streak_broken}")
-                    self.type_streak = 0
+                        self.queue_timeout(user_id, username, duration=300, reason=f"Said the taboo word: {hit.value}")
+                        self.queue_announce(message.channel, f"👑 @{username} has been timed out for 5 minutes for saying the taboo word! 👑")
+
+        # Pray, polish and type trains, all evaluated in one pass over the same message view
+        if message.author and self.streaks.rules:
+            view = MessageView.from_message(message, extra_roles=(ROLE_KING,) if is_king else ())
+            for event in self.streaks.process(view):
+                if event.kind != StreakEvent.BREAK:
+                    continue
+                word = self.train_words[event.rule.name]
+                self.queue_announce(message.channel, f"{word} {event.streak} KingOfTheMarbles BANNED @{view.username}")
+                if event.timeout is not None:
+                    self.queue_timeout(view.user_id, view.username, duration=event.timeout,
+                                       reason=f"Broke {word} streak of {event.streak}")
 
         await self.handle_commands(message)
 
@@ -830,9 +775,15 @@ class KingBot(BaseBot):
 
     async def send_king_to_overlay(self):
         """Send current king information to the overlay."""
-        data = {"king": self.king_username}
+        data = {"type": "king", "king": self.king_username}
         await self.send_to_overlay(json.dumps(data))
 
+    async def on_websocket_request(self, action: str, data: dict):
+        """Answer 'get_king' requests with the current king, for the requesting overlay only."""
+        if action == "get_king":
+            return {"type": "king", "king": self.king_username}
+        return None
+
     async def on_websocket_action(self, action: str, data: dict):
         """Handle websocket actions, specifically 'get_king' requests."""
         if action == "get_king":
@@ -0,0 +1,116 @@
+"""
+Shared memo of per-message classification results.
+
+During pray/polish trains, marbles races and emote walls, chat repeats the
+same few messages thousands of times. Each module's content-only work
+(normalizing, regexes, keyword scans) is registered here under a name.
+The result for a given raw message is computed once. Every later copy of
+that message, in any module of the process, is a dictionary lookup.
+
+Only pure functions of the message text belong here. Anything that
+depends on the author or on game state must be applied after the lookup.
+"""
+
+import functools
+from collections import OrderedDict
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+# Distinct raw messages remembered (least recently seen are evicted first)
+MESSAGE_CACHE_SIZE = 4096
+# Longer messages are classified every time; spam waves are short messages
+MESSAGE_CACHE_MAX_LENGTH = 500
+
+
+class ClassifierStats:
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class MessageCache:
+    def __init__(self, maxsize: int = MESSAGE_CACHE_SIZE, max_length: int = MESSAGE_CACHE_MAX_LENGTH):
+        """
+        Bounded LRU from raw message content to that message's classification results.
+
+        Args:
+            maxsize: Distinct messages to keep
+            max_length: Messages longer than this bypass the cache
+        """
+        self.maxsize = maxsize
+        self.max_length = max_length
+        # content -> {classifier name: result}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.classifiers: Dict[str, ClassifierStats] = {}
+        self.evictions = 0
+
+    def classify(self, name: str, content: str, compute: Callable[[str], T]) -> T:
+        """
+        Result of compute(content), memoized under the classifier name.
+
+        Args:
+            name: Classifier name, unique per function (e.g. "quickchat")
+            content: Raw message text
+            compute: Pure function of the text
+
+        Returns:
+            The cached or freshly computed result
+        """
+        stats = self.classifiers.get(name)
+        if stats is None:
+            stats = self.classifiers[name] = ClassifierStats()
+        if len(content) > self.max_length:
+            stats.misses += 1
+            return compute(content)
+
+        entry = self._entries.get(content)
+        if entry is None:
+            entry = self._entries[content] = {}
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._entries.move_to_end(content)
+            if name in entry:
+                stats.hits += 1
+                return entry[name]
+        stats.misses += 1
+        result = entry[name] = compute(content)
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        hits = sum(s.hits for s in self.classifiers.values())
+        misses = sum(s.misses for s in self.classifiers.values())
+        return {
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "classifiers": {name: {"hits": s.hits, "misses": s.misses, "hit_rate": round(s.hit_rate(), 3)}
+                            for name, s in self.classifiers.items()},
+        }
+
+
+# One cache per process, shared by every bot and hosted module
+message_cache = MessageCache()
+
+
+def cached_classifier(name: str) -> Callable[[Callable[[str], T]], Callable[[str], T]]:
+    """Decorator: memoize a pure function of the message text in message_cache."""
+    def decorate(compute: Callable[[str], T]) -> Callable[[str], T]:
+        @functools.wraps(compute)
+        def classify(content: str) -> T:
+            return message_cache.classify(name, content, compute)
+        return classify
+    return decorate
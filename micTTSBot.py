@@ -1,7 +1,6 @@
 import logging
 import asyncio
 import json
-import base64
 import requests
 import speech_recognition as sr
 import threading
@@ -10,6 +9,7 @@ import websockets
 import os
 import time
 from dotenv import load_dotenv
+from audio_store import upload_audio
 
 # Load environment variables
 load_dotenv()
@@ -98,6 +98,8 @@ class MicTTSBot:
                 async with websockets.connect(self.overlay_ws_url) as websocket:
                     logger.info("Connected to WebSocket server")
                     self.ws = websocket
+                    # Producer only: don't receive other bots' relay traffic
+                    await websocket.send(json.dumps({"relay": "subscribe", "topics": []}))
                     await self.upon_connection()
                     # Keep connection alive and handle messages
                     await websocket.wait_closed()
@@ -336,7 +338,7 @@ class MicTTSBot:
         logger.info(f"Sending to TTS overlay: {message}")
         
         # Generate TTS on server side and send audio data to overlay (avoids CORS issues)
-        audio_data_url = None
+        audio_url = None
         if self.tts_api_token:
             try:
                 # Generate TTS using TTS Monster API
@@ -358,16 +360,14 @@ class MicTTSBot:
                 if response.status_code == 200:
                     result = response.json()
                     if result.get("status") == 200:
-                        audio_url = result.get("url")
+                        tts_url = result.get("url")
                         # Download the audio file
-                        audio_response = requests.get(audio_url)
+                        audio_response = requests.get(tts_url)
                         if audio_response.status_code == 200:
-                            # Convert to base64 data URL
-                            audio_base64 = base64.b64encode(audio_response.content).decode('utf-8')
-                            # Determine MIME type (TTS Monster typically returns WAV)
-                            mime_type = "audio/wav"  # Default, could detect from URL or content
-                            audio_data_url = f"data:{mime_type};base64,{audio_base64}"
-                            logger.debug("TTS audio generated and converted to base64")
+                            # Hand the raw bytes to the relay's blob server; only the URL goes over the websocket
+                            # (TTS Monster typically returns WAV)
+                            audio_url = await upload_audio(audio_response.content, "audio/wav")
+                            logger.debug(f"TTS audio generated and uploaded: {audio_url}")
                         else:
                             logger.error(f"Failed to download audio: {audio_response.status_code}")
                     else:
@@ -382,9 +382,9 @@ class MicTTSBot:
         overlay_data = {
             "type": "mic_tts",
             "message": message,
-            "audio_data_url": audio_data_url  # Send base64 data URL instead of credentials
+            "audio_url": audio_url  # Overlay fetches the clip from the relay's blob server
         }
-        logger.debug(f"Sending mic TTS overlay data: type={overlay_data['type']}, has_audio={bool(audio_data_url)}")
+        logger.debug(f"Sending mic TTS overlay data: type={overlay_data['type']}, has_audio={bool(audio_url)}")
         await self.send_to_overlay(json.dumps(overlay_data))
 
     def __del__(self):
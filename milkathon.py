@@ -14,6 +14,7 @@ import logging
 import os
 import hmac
 import hashlib
+import math
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -22,6 +23,8 @@ from aiohttp import web
 import aiohttp
 import websockets
 
+from countdown import Countdown
+
 # --- Logging ---
 logging.basicConfig(
     level=logging.INFO,
@@ -69,9 +72,10 @@ MILKATHON_GOALS = [
 MILKATHON_DATA_FILE = "data/milkathon_data.json"
 OVERLAY_WS_URL = "ws://localhost:6790"
 TIMER_RESET_SECONDS = 3 * 60  # 3 minutes, resets on each sub
+SAVE_INTERVAL = 10  # seconds between checkpoints of the running timer
 
 _total_subs = 0
-_timer_seconds = 0
+_countdown = Countdown(TIMER_RESET_SECONDS, running=True)  # overlays count down locally from its deadline
 _achieved_goals: list[tuple[int, str]] = []  # [(subs, text), ...]
 _overlay_ws = None
 _app_token = None
@@ -102,16 +106,21 @@ def _process_new_subs(count: int) -> None:
             _achieved_goals.append((threshold, text))
 
 
+def _timer_now() -> int:
+    """Whole seconds left on the timer."""
+    return math.ceil(_countdown.remaining())
+
+
 def _load_data() -> tuple[int, list[tuple[int, str]], int]:
     """Load state from JSON file."""
-    global _total_subs, _achieved_goals, _timer_seconds
+    global _total_subs, _achieved_goals
     data_file = Path(MILKATHON_DATA_FILE)
     if data_file.exists():
         try:
             with open(data_file, "r") as f:
                 data = json.load(f)
                 _total_subs = data.get("total_subs", 0)
-                _timer_seconds = data.get("timer_seconds", TIMER_RESET_SECONDS)
+                _countdown.set(data.get("timer_seconds", TIMER_RESET_SECONDS))
                 raw = data.get("achieved_goals", [])
                 # Support both old format [str] and new format [{"subs": n, "text": s}]
                 _achieved_goals = []
@@ -125,10 +134,10 @@ def _load_data() -> tuple[int, list[tuple[int, str]], int]:
             logger.error("Error loading milkathon data: %s", e)
             _total_subs = 0
             _achieved_goals = []
-            _timer_seconds = TIMER_RESET_SECONDS
+            _countdown.set(TIMER_RESET_SECONDS)
     else:
-        _timer_seconds = TIMER_RESET_SECONDS
-    return _total_subs, _achieved_goals, _timer_seconds
+        _countdown.set(TIMER_RESET_SECONDS)
+    return _total_subs, _achieved_goals, _timer_now()
 
 
 def _save_data() -> None:
@@ -139,7 +148,7 @@ def _save_data() -> None:
         with open(data_file, "w") as f:
             json.dump({
                 "total_subs": _total_subs,
-                "timer_seconds": _timer_seconds,
+                "timer_seconds": _timer_now(),
                 "achieved_goals": [{"subs": s, "text": t} for s, t in _achieved_goals],
             }, f, indent=2)
     except Exception as e:
@@ -160,7 +169,8 @@ async def _send_to_overlay() -> bool:
             "subs_required": subs_for_goal,
             "subs_remaining": subs_remaining,
             "achieved_goals": [{"subs": s, "text": t} for s, t in _achieved_goals],
-            "timer_seconds": _timer_seconds,
+            "timer_seconds": _timer_now(),
+            "countdown": _countdown.to_message(),
         }
         await _overlay_ws.send(json.dumps(payload))
         return True
@@ -292,7 +302,7 @@ async def create_eventsub_subscription(
 
 async def handle_eventsub(request: web.Request, webhook_secret: str):
     """Handle Twitch EventSub: verification challenge and notifications."""
-    global _total_subs, _achieved_goals, _timer_seconds
+    global _total_subs, _achieved_goals
     body = await request.text()
     message_id = request.headers.get("Twitch-Eventsub-Message-Id", "")
     timestamp = request.headers.get("Twitch-Eventsub-Message-Timestamp", "")
@@ -320,7 +330,7 @@ async def handle_eventsub(request: web.Request, webhook_secret: str):
         if sub_type == "channel.subscription.message":
             user_name = event.get("user_name") or event.get("user_login", "?")
             _process_new_subs(1)
-            _timer_seconds = TIMER_RESET_SECONDS
+            _countdown.set(TIMER_RESET_SECONDS)
             _save_data()
             await _send_to_overlay()
             logger.info("Webhook: share -> %s, total_subs=%d", user_name, _total_subs)
@@ -328,7 +338,7 @@ async def handle_eventsub(request: web.Request, webhook_secret: str):
             user_name = event.get("user_name") or event.get("user_login", "?")
             total = event.get("total", 1)
             _process_new_subs(total)
-            _timer_seconds = TIMER_RESET_SECONDS
+            _countdown.set(TIMER_RESET_SECONDS)
             _save_data()
             await _send_to_overlay()
             logger.info("Webhook: gift -> %s x%d, total_subs=%d", user_name, total, _total_subs)
@@ -349,6 +359,8 @@ async def _overlay_websocket_loop() -> None:
             if _overlay_ws is None or _overlay_ws.state != websockets.State.OPEN:
                 async with websockets.connect(OVERLAY_WS_URL) as ws:
                     _overlay_ws = ws
+                    # Producer only: don't receive other bots' relay traffic
+                    await ws.send(json.dumps({"relay": "subscribe", "topics": []}))
                     await _send_to_overlay()
                     await ws.wait_closed()
                     _overlay_ws = None
@@ -362,17 +374,16 @@ async def _overlay_websocket_loop() -> None:
 
 
 async def _countdown_loop() -> None:
-    """Count down timer every second and send update to overlay."""
-    global _timer_seconds
+    """
+    Checkpoint the running timer to disk. The overlay counts down on its own
+    from the deadline, so nothing is sent until a sub resets the timer.
+    """
     while True:
+        await asyncio.sleep(SAVE_INTERVAL)
         try:
-            if _timer_seconds > 0:
-                _timer_seconds -= 1
             _save_data()
-            await _send_to_overlay()
         except Exception as e:
             logger.exception("Countdown error: %s", e)
-        await asyncio.sleep(1)
 
 
 @web.middleware
@@ -424,13 +435,13 @@ async def _check_webhook_reachable(callback_url: str, webhook_port: int) -> None
 
 async def run_test_mode() -> None:
     """Run in test mode: webhook server only. Use test_eventsub_webhook.py to send fake subs."""
-    global _total_subs, _achieved_goals, _timer_seconds
+    global _total_subs, _achieved_goals
     config = load_config()
     webhook_secret = config["webhook_secret"]
     webhook_port = config["webhook_port"]
 
-    _total_subs, _achieved_goals, _timer_seconds = _load_data()
-    logger.info("TEST MODE: Subs=%d, achieved=%d goals, timer=%ds", _total_subs, len(_achieved_goals), _timer_seconds)
+    _total_subs, _achieved_goals, timer_seconds = _load_data()
+    logger.info("TEST MODE: Subs=%d, achieved=%d goals, timer=%ds", _total_subs, len(_achieved_goals), timer_seconds)
     logger.info("TEST MODE: Webhook server on port %s. Run test_eventsub_webhook.py to send fake subs.", webhook_port)
     logger.info("TEST MODE: Overlay: milkathon_overlay.html (ws://localhost:6790)")
 
@@ -457,7 +468,7 @@ async def run_test_mode() -> None:
 
 
 async def main(keep_state: bool = False):
-    global _client_id, _broadcaster_id, _app_token, _client_secret, _total_subs, _achieved_goals, _timer_seconds
+    global _client_id, _broadcaster_id, _app_token, _client_secret, _total_subs, _achieved_goals
     config = load_config()
     webhook_secret = config["webhook_secret"]
     webhook_port = config["webhook_port"]
@@ -465,12 +476,12 @@ async def main(keep_state: bool = False):
     callback_url = f"{webhook_base_url}/eventsub" if webhook_base_url else None
 
     if keep_state:
-        _total_subs, _achieved_goals, _timer_seconds = _load_data()
-        logger.info("Subs: %d, achieved: %d goals, timer=%ds (kept from previous run)", _total_subs, len(_achieved_goals), _timer_seconds)
+        _total_subs, _achieved_goals, timer_seconds = _load_data()
+        logger.info("Subs: %d, achieved: %d goals, timer=%ds (kept from previous run)", _total_subs, len(_achieved_goals), timer_seconds)
     else:
         _total_subs = 0
         _achieved_goals = []
-        _timer_seconds = TIMER_RESET_SECONDS
+        _countdown.set(TIMER_RESET_SECONDS)
         _save_data()
         logger.info("Subs: 0, timer: 5:00 (fresh start)")
 
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModerationJob:
+    def __init__(self, key: Hashable, description: str, run: Callable[[], Awaitable[Any]], future: asyncio.Future):
+        self.key = key
+        self.description = description
+        self.run = run
+        self.future = future
+
+
+class ModerationOutbox:
+    def __init__(self, workers: int = 4, max_queue: int = 500,
+                 on_failure: Optional[Callable[[ModerationJob, Any], None]] = None):
+        """
+        Worker pool for Twitch side effects (timeouts, chat announcements).
+
+        Game logic updates its in-memory state under its lock, enqueues the
+        resulting actions and releases the lock immediately; the pool then
+        talks to Helix/IRC. Jobs with the same key (a user ID, a channel) run
+        on the same worker and so keep their order; different keys run in
+        parallel.
+
+        A job fails if it raises or returns False. Its future resolves to
+        the result (or the exception), and on_failure(job, result) is called.
+
+        Args:
+            workers: Number of concurrent workers
+            max_queue: Jobs waiting per worker before new ones are rejected
+            on_failure: Called with the job and its result or exception when it fails
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.on_failure = on_failure
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.max_queue) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queues = []
+
+    def submit(self, key: Hashable, description: str, run: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """
+        Queue an action without waiting for it.
+
+        Args:
+            key: Jobs with equal keys run in submission order
+            description: Used in failure logs (e.g. "timeout viewer123 for 300s")
+            run: Returns the awaitable to execute (called on the worker)
+
+        Returns:
+            asyncio.Future: Resolves to the action's result once it ran
+        """
+        future = asyncio.get_running_loop().create_future()
+        job = ModerationJob(key, description, run, future)
+        if not self._tasks:
+            self.start()
+        queue = self._queues[hash(key) % len(self._queues)]
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            self._fail(job, RuntimeError("moderation outbox full"))
+        return future
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            job = await queue.get()
+            try:
+                result = await job.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._fail(job, e)
+                continue
+            if result is False:
+                self._fail(job, result)
+                continue
+            self.completed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+
+    def _fail(self, job: ModerationJob, result: Any):
+        self.failed += 1
+        if not job.future.done():
+            if isinstance(result, BaseException):
+                job.future.set_exception(result)
+                # Nobody has to await the future; the failure is reported below
+                job.future.exception()
+            else:
+                job.future.set_result(result)
+        if self.on_failure is not None:
+            try:
+                self.on_failure(job, result)
+            except Exception as e:
+                logger.error(f"Moderation failure handler raised: {e}")
+
+    def pending(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
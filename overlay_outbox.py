@@ -0,0 +1,104 @@
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from relay_protocol import coalesce_key, message_topic, parse_message
+
+
+def _state_key(text: str) -> Optional[str]:
+    data = parse_message(text)
+    return coalesce_key(message_topic(text, data), data)
+
+
+class OverlayOutbox:
+    def __init__(self, max_messages: int = 500, max_event_age: float = 120.0):
+        """
+        Outbound buffer for a bot's relay connection.
+
+        While the socket is down, messages queue here in send order and are
+        flushed on reconnect. State messages (see relay_protocol.COALESCE_TYPES)
+        keep only their latest value, moved to the end of the queue so it still
+        lands after any events sent before it. One-off events older than
+        max_event_age are dropped at flush time rather than replayed late.
+
+        Args:
+            max_messages: Live messages kept before the oldest are dropped
+            max_event_age: Seconds after which a queued non-state event is stale
+        """
+        self.max_messages = max_messages
+        self.max_event_age = max_event_age
+        # Entries are [coalesce key, text, queued at]; text is None once superseded
+        self._queue: deque = deque()
+        self._pending: Dict[str, list] = {}
+        self._live = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def put(self, text: str):
+        """Queue a message, replacing any older queued value of the same state."""
+        key = _state_key(text)
+        if key is not None:
+            old = self._pending.get(key)
+            if old is not None:
+                old[1] = None
+                self._live -= 1
+                self.coalesced += 1
+        entry = [key, text, time.monotonic()]
+        self._queue.append(entry)
+        self._live += 1
+        if key is not None:
+            self._pending[key] = entry
+        while self._live > self.max_messages:
+            self._discard(self._pop_live())
+            self.dropped += 1
+
+    def _pop_live(self) -> Optional[list]:
+        while self._queue:
+            entry = self._queue.popleft()
+            if entry[1] is not None:
+                return entry
+        return None
+
+    def _discard(self, entry: Optional[list]):
+        if entry is None:
+            return
+        self._live -= 1
+        if entry[0] is not None and self._pending.get(entry[0]) is entry:
+            del self._pending[entry[0]]
+
+    def pop(self) -> Optional[str]:
+        """Next message to send, skipping stale events; None when empty."""
+        now = time.monotonic()
+        while True:
+            entry = self._pop_live()
+            if entry is None:
+                return None
+            self._discard(entry)
+            if entry[0] is None and now - entry[2] > self.max_event_age:
+                self.expired += 1
+                continue
+            return entry[1]
+
+    def push_front(self, text: str):
+        """Put back a message whose send failed so it goes out first next time."""
+        key = _state_key(text)
+        if key is not None and key in self._pending:
+            # A newer value was queued meanwhile
+            return
+        entry = [key, text, time.monotonic()]
+        self._queue.appendleft(entry)
+        self._live += 1
+        if key is not None:
+            self._pending[key] = entry
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._live,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "expired": self.expired,
+        }
@@ -1,8 +1,12 @@
+import json
 import logging
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
 from typing import Dict, Tuple
 import re
-from baseBot import BaseBot
+from botHost import BotHost, ChatModule
+from keyword_matcher import KeywordMatcher
+from message_cache import message_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,6 +22,27 @@ MIN_SENTIMENT = 0
 # Sentiment keywords
 INCREASE_KEYWORDS = {"ICANT", "ICUMT", "lCUMT", "+2", "WECANT", "Utopia", "LOL", "WW", "WWW", "W"}
 DECREASE_KEYWORDS = {"ICAN", "WECAN", "-2", "LL", "L"}
+# Optional extra vocabulary: {"increase": [...], "decrease": [...]}
+KEYWORDS_PATH = Path("progressbar_keywords.json")
+
+
+def load_keywords(path: Path = KEYWORDS_PATH) -> Dict[str, int]:
+    """
+    Map every sentiment keyword to its change. Increase keywords win when a
+    keyword is in both sets, as "ICANT" wins over the "ICAN" inside it.
+    """
+    increase, decrease = set(INCREASE_KEYWORDS), set(DECREASE_KEYWORDS)
+    try:
+        if path.exists():
+            with open(path, 'r') as f:
+                data = json.load(f)
+            increase.update(data.get("increase", []))
+            decrease.update(data.get("decrease", []))
+    except Exception as e:
+        logger.error(f"Error loading sentiment keywords from {path}: {e}")
+    keywords = {keyword: -SENTIMENT_CHANGE for keyword in decrease}
+    keywords.update((keyword, SENTIMENT_CHANGE) for keyword in increase)
+    return keywords
 
 class SentimentTracker:
     def __init__(self, initial_value: int = INITIAL_SENTIMENT):
@@ -46,29 +71,28 @@ class SentimentTracker:
         self.total_sentiment = max(MIN_SENTIMENT, min(MAX_SENTIMENT, self.total_sentiment + value))
         return self.total_sentiment
 
-class ProgressBarBot(BaseBot):
-    def __init__(self):
-        super().__init__(
-            overlay_ws_url=OVERLAY_WS,
-            prefix='!',
-            channel_name="Feer"
-        )
+class ProgressBarModule(ChatModule, name="progressbar"):
+    def __init__(self, host):
+        super().__init__(host)
         self.sentiment_tracker = SentimentTracker()
+        self.keywords = KeywordMatcher(load_keywords())
+        logger.info(f"Loaded {len(self.keywords)} sentiment keywords")
 
     def get_progress_bar_change(self, user_input: str) -> int:
-        """Determine sentiment change from user input."""
+        """Determine sentiment change from user input (memoized per message text)."""
+        return message_cache.classify("progressbar", user_input, self._classify)
+
+    def _classify(self, user_input: str) -> int:
         cleaned_input = re.sub(r'\s+', '', user_input)
-        
-        if any(keyword in cleaned_input for keyword in INCREASE_KEYWORDS):
+
+        values = self.keywords.values(cleaned_input)
+        if SENTIMENT_CHANGE in values:
             return SENTIMENT_CHANGE
-        if any(keyword in cleaned_input for keyword in DECREASE_KEYWORDS):
+        if values:
             return -SENTIMENT_CHANGE
         return 0
 
-    async def event_message(self, message):
-        if message.echo:
-            return
-        
+    async def on_message(self, message):
         value = self.get_progress_bar_change(message.content)
         if value == 0:
             logger.info(f'No sentiment change for message: {message.content}')
@@ -82,6 +106,10 @@ class ProgressBarBot(BaseBot):
         else:
             logger.info(f'Sentiment update ignored due to cooldown for user: {message.author.display_name}')
 
+class ProgressBarBot(BotHost):
+    def __init__(self):
+        super().__init__([ProgressBarModule], overlay_ws_url=OVERLAY_WS)
+
 if __name__ == '__main__':
     bot = ProgressBarBot()
     bot.run()
@@ -1,7 +1,8 @@
 import os
 import re
 import requests
-from baseBot import BaseBot
+from botHost import BotHost, ChatModule
+from message_cache import cached_classifier
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,23 +32,17 @@ def normalize(text):
 normalized_map = {normalize(msg): i for i, msg in enumerate(quick_chat_messages)}
 
 # Function to check if input matches a Quick Chat and get its index
+@cached_classifier("quickchat")
 def get_quick_chat_index(user_input):
     normalized_input = normalize(user_input)
     return normalized_map.get(normalized_input, -1)  # Returns -1 if not found
 
-class QuickChatBot(BaseBot):
-    def __init__(self):
-        super().__init__(
-            overlay_ws_url=OVERLAY_WS,
-            prefix='!',
-            channel_name="Feer"
-        )
+class QuickChatModule(ChatModule, name="quickchat"):
+    def __init__(self, host):
+        super().__init__(host)
         self.hype_train_level = 1
 
-    async def event_message(self, message):
-        if message.echo:
-            return
-        
+    async def on_message(self, message):
         index = get_quick_chat_index(message.content)
         if index == -1:
             logger.debug(f'(not a quick chat):{message.content}')
@@ -64,8 +59,8 @@ class QuickChatBot(BaseBot):
         """Fetch the current Hype Train level using Twitch Helix API."""
         url = f"https://api.twitch.tv/helix/hypetrain/events?broadcaster_id={self.get_broadcaster_id()}"
         headers = {
-            "Client-ID": self.client_id,
-            "Authorization": f"Bearer {self.token}"
+            "Client-ID": self.host.client_id,
+            "Authorization": f"Bearer {self.host.token}"
         }
         try:
             response = requests.get(url, headers=headers)
@@ -79,6 +74,10 @@ class QuickChatBot(BaseBot):
     def get_broadcaster_id(self):
         return '147306920'  # Feer id
 
+class QuickChatBot(BotHost):
+    def __init__(self):
+        super().__init__([QuickChatModule], overlay_ws_url=OVERLAY_WS)
+
 if __name__ == '__main__':
     bot = QuickChatBot()
     bot.run()
@@ -0,0 +1,96 @@
+"""
+Size-aware permessage-deflate for the relay.
+
+Browsers always offer permessage-deflate, but deflating a 60-byte timer tick
+costs more latency than it saves. RFC 7692 lets a sender leave any message
+uncompressed (RSV1 unset), so messages below a size threshold are sent as-is
+while big repetitive JSON (chart histories, score tables, timeout lists) is
+deflated. The threshold can be changed per client at runtime; see
+bench_compression.py for how the default was picked.
+"""
+
+from typing import Any, Optional
+
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import CONT, CTRL_OPCODES
+
+# Messages smaller than this many bytes are sent uncompressed; below it the
+# saving is a few dozen bytes per message (bench_compression.py)
+COMPRESSION_MIN_SIZE = 128
+# zlib level; level 1 stays within ~10% of level 6 on our JSON at a third of the CPU
+COMPRESSION_LEVEL = 1
+
+
+class SizeAwareDeflate(PerMessageDeflate):
+    def __init__(self, *args, min_size: Optional[int] = COMPRESSION_MIN_SIZE, **kwargs):
+        """
+        Args:
+            min_size: Smallest message that gets deflated; None sends everything uncompressed
+        """
+        super().__init__(*args, **kwargs)
+        self.min_size = min_size
+        self.compressed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def encode(self, frame):
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+        if frame.opcode is CONT or not frame.fin:
+            # Fragmented messages are always compressed so every fragment agrees
+            return super().encode(frame)
+        if self.min_size is None or len(frame.data) < self.min_size:
+            self.skipped += 1
+            return frame
+        encoded = super().encode(frame)
+        self.compressed += 1
+        self.bytes_in += len(frame.data)
+        self.bytes_out += len(encoded.data)
+        return encoded
+
+    def stats(self) -> dict:
+        return {
+            "min_size": self.min_size,
+            "compressed": self.compressed,
+            "skipped": self.skipped,
+            "ratio": round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+        }
+
+
+class SizeAwareDeflateFactory(ServerPerMessageDeflateFactory):
+    def __init__(self, min_size: Optional[int] = COMPRESSION_MIN_SIZE, level: int = COMPRESSION_LEVEL, **kwargs):
+        """
+        Server extension factory negotiating permessage-deflate with a size threshold.
+
+        Args:
+            min_size: Default threshold for new connections
+            level: zlib compression level
+            **kwargs: Passed to ServerPerMessageDeflateFactory (window bits, context takeover)
+        """
+        kwargs.setdefault("compress_settings", {"memLevel": 5, "level": level})
+        super().__init__(**kwargs)
+        self.min_size = min_size
+
+    def process_request_params(self, params, accepted_extensions):
+        response_params, extension = super().process_request_params(params, accepted_extensions)
+        return response_params, SizeAwareDeflate(
+            extension.remote_no_context_takeover,
+            extension.local_no_context_takeover,
+            extension.remote_max_window_bits,
+            extension.local_max_window_bits,
+            extension.compress_settings,
+            min_size=self.min_size,
+        )
+
+
+def compression_extension(websocket: Any) -> Optional[SizeAwareDeflate]:
+    """The negotiated SizeAwareDeflate of a connection, or None if the client didn't accept compression."""
+    extensions = getattr(websocket, "extensions", None)
+    if extensions is None:
+        # websockets' new asyncio implementation keeps them on the protocol object
+        extensions = getattr(getattr(websocket, "protocol", None), "extensions", None) or []
+    for extension in extensions:
+        if isinstance(extension, SizeAwareDeflate):
+            return extension
+    return None
@@ -0,0 +1,135 @@
+"""
+Counters for the relay's /metrics and /healthz endpoints.
+
+Everything recorded on the message path is a couple of dict updates; rates
+and rankings are only worked out when an endpoint is requested.
+"""
+
+import heapq
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Seconds of history kept for per-second rates
+RATE_WINDOW = 10
+# Largest payloads remembered
+TOP_PAYLOADS = 10
+
+
+class RelayMetrics:
+    def __init__(self, window: int = RATE_WINDOW, top_payloads: int = TOP_PAYLOADS):
+        """
+        Message, byte and connection counters for the relay.
+
+        Args:
+            window: Seconds over which messages/bytes per second are averaged
+            top_payloads: How many of the largest payloads to keep
+        """
+        self.window = window
+        self.top_payloads = top_payloads
+        self.started_at = time.time()
+        self.messages_total = 0
+        self.bytes_total = 0
+        self.connects = 0
+        self.disconnects = 0
+        # (second, {topic: [messages, bytes]}) buckets, newest last
+        self._buckets: deque = deque()
+        # (events, connects, disconnects) per second for churn rates
+        self._churn: deque = deque()
+        # Min-heap of (size, counter, topic, wall time)
+        self._largest: List[tuple] = []
+
+    def _bucket(self, buckets: deque, factory: Callable):
+        second = int(time.monotonic())
+        if not buckets or buckets[-1][0] != second:
+            buckets.append((second, factory()))
+            while buckets[0][0] <= second - self.window:
+                buckets.popleft()
+        return buckets[-1][1]
+
+    def record_message(self, topic: Optional[str], size: int):
+        """Count one message received from a client."""
+        self.messages_total += 1
+        self.bytes_total += size
+        counts = self._bucket(self._buckets, dict).setdefault(topic or "untyped", [0, 0])
+        counts[0] += 1
+        counts[1] += size
+        if len(self._largest) < self.top_payloads:
+            heapq.heappush(self._largest, (size, self.messages_total, topic or "untyped", time.time()))
+        elif size > self._largest[0][0]:
+            heapq.heapreplace(self._largest, (size, self.messages_total, topic or "untyped", time.time()))
+
+    def record_connect(self):
+        self.connects += 1
+        self._bucket(self._churn, lambda: [0, 0])[0] += 1
+
+    def record_disconnect(self):
+        self.disconnects += 1
+        self._bucket(self._churn, lambda: [0, 0])[1] += 1
+
+    def _recent(self, buckets: deque) -> Iterable:
+        cutoff = int(time.monotonic()) - self.window
+        return (value for second, value in buckets if second > cutoff)
+
+    def rates(self) -> Dict[str, dict]:
+        """Messages and bytes per second by type over the last window."""
+        totals: Dict[str, list] = {}
+        for counts in self._recent(self._buckets):
+            for topic, (messages, size) in counts.items():
+                total = totals.setdefault(topic, [0, 0])
+                total[0] += messages
+                total[1] += size
+        return {
+            topic: {"messages_per_sec": round(messages / self.window, 2),
+                    "bytes_per_sec": round(size / self.window, 1)}
+            for topic, (messages, size) in sorted(totals.items(), key=lambda item: -item[1][1])
+        }
+
+    def snapshot(self, clients: Iterable) -> dict:
+        """Full /metrics document; clients are the connected RelayClient objects."""
+        churn = [0, 0]
+        for connects, disconnects in self._recent(self._churn):
+            churn[0] += connects
+            churn[1] += disconnects
+        clients = list(clients)
+        return {
+            "uptime": round(time.time() - self.started_at, 1),
+            "messages_total": self.messages_total,
+            "bytes_total": self.bytes_total,
+            "window_seconds": self.window,
+            "by_type": self.rates(),
+            "connections": {
+                "current": len(clients),
+                "connects_total": self.connects,
+                "disconnects_total": self.disconnects,
+                "connects_per_sec": round(churn[0] / self.window, 2),
+                "disconnects_per_sec": round(churn[1] / self.window, 2),
+            },
+            "clients": [client.describe() for client in clients],
+            "largest_payloads": [
+                {"bytes": size, "type": topic, "at": at}
+                for size, _, topic, at in sorted(self._largest, reverse=True)
+            ],
+        }
+
+
+def add_metrics_routes(app, metrics: RelayMetrics, clients: Callable[[], Iterable], health: Callable[[], dict]):
+    """
+    Register GET /metrics and GET /healthz on an aiohttp application.
+
+    Args:
+        app: The aiohttp web.Application
+        metrics: Counters to report
+        clients: Returns the currently connected clients
+        health: Returns extra fields for /healthz
+    """
+    from aiohttp import web
+
+    async def metrics_view(request):
+        return web.json_response(metrics.snapshot(clients()))
+
+    async def healthz_view(request):
+        return web.json_response(dict({"status": "ok", "uptime": round(time.time() - metrics.started_at, 1)}, **health()))
+
+    app.router.add_get("/metrics", metrics_view)
+    app.router.add_get("/healthz", healthz_view)
@@ -0,0 +1,86 @@
+"""
+Message classification shared by the relay (server.py) and the bots' outbound
+queues, so both sides agree on which messages are replaceable state.
+"""
+
+import json
+from typing import Any, Optional
+
+# State-type messages where only the latest value matters. A newer message of the
+# same type (plus optional "key" field) replaces an older one still waiting in a queue.
+COALESCE_TYPES = {
+    "begathon_timer",
+    "bomb_update",
+    "combined_viewer_count",
+    "king",
+    "milkathon_goals",
+    "rlrank_update",
+    "scores",
+    "sub_count",
+    "timeouts",
+    "timer_update",
+    "tts_master",
+    "typeracer_state",
+    "viewer_count",
+    "vignette",
+    "vip_update",
+}
+
+
+def parse_message(message: Any) -> Optional[dict]:
+    """Parse a JSON object message; returns None for plain text or non-object JSON."""
+    if not isinstance(message, str) or not message.startswith("{"):
+        return None
+    try:
+        data = json.loads(message)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def message_topic(message: Any, data: Optional[dict]) -> Optional[str]:
+    """
+    Work out which topic a message belongs to:
+    an explicit "channel", else its "type", else "action:<name>" for overlay
+    actions, else the prefix of legacy "PREFIX:..." text messages (e.g. COUNT).
+    """
+    if data is not None:
+        topic = data.get("channel") or data.get("type")
+        if topic:
+            return str(topic)
+        if data.get("action"):
+            return f"action:{data['action']}"
+        return None
+    if isinstance(message, str):
+        prefix, sep, _ = message.partition(":")
+        if sep and prefix.isupper() and prefix.isalpha():
+            return prefix
+    return None
+
+
+def is_delta(data: Optional[dict]) -> bool:
+    """
+    History deltas (see history_stream.py) only make sense on top of the
+    previous message, so they are never coalesced or cached; the cached
+    keyframe plus the overlay's resync request cover late joiners.
+    """
+    return data is not None and data.get("mode") == "delta"
+
+
+def coalesce_key(topic: Optional[str], data: Optional[dict]) -> Optional[str]:
+    """Key under which newer messages replace queued older ones, or None if every message matters."""
+    if topic not in COALESCE_TYPES or is_delta(data):
+        return None
+    if data is not None and data.get("key") is not None:
+        return f"{topic}/{data['key']}"
+    return topic
+
+
+def is_request(data: Optional[dict]) -> bool:
+    """An overlay action expecting a reply: {"action": ..., "request_id": ...} (see relay_rpc.py)."""
+    return data is not None and bool(data.get("action")) and data.get("request_id") is not None
+
+
+def is_reply(data: Optional[dict]) -> bool:
+    """A bot's answer to a request: {"reply_to": <request_id>, ...}."""
+    return data is not None and data.get("reply_to") is not None
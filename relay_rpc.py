@@ -0,0 +1,142 @@
+"""
+Request/response routing for overlay actions.
+
+An overlay that wants an answer sends {"action": "get_king", "request_id": "k1"}.
+Instead of broadcasting it, the relay forwards it only to bots that registered
+for the action ({"relay": "register", "actions": ["get_king"]}), under a
+relay-unique request id ({"relay": "unregister", "actions": [...]} withdraws
+them again). The bot answers with {"reply_to": <that id>, ...}.
+The relay delivers the answer only to the requester, with its own
+request_id restored. If no bot handles the action, or nobody answers within
+RPC_TIMEOUT, the requester gets {"type": "rpc_error", ...} instead.
+
+Actions sent without a request_id are still broadcast on "action:<name>".
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from typing import Any, Dict, Optional, Set
+
+from relay_protocol import is_reply, is_request
+
+logger = logging.getLogger(__name__)
+
+# Seconds a request waits for a bot's reply
+RPC_TIMEOUT = 5.0
+
+
+class PendingRequest:
+    def __init__(self, requester_id: int, request_id: Any, action: str, timer: asyncio.TimerHandle):
+        self.requester_id = requester_id
+        self.request_id = request_id
+        self.action = action
+        self.timer = timer
+
+
+class RpcRouter:
+    def __init__(self, clients: Dict[int, Any], timeout: float = RPC_TIMEOUT):
+        """
+        Args:
+            clients: The relay's connected clients by id (RelayClient objects)
+            timeout: Seconds before an unanswered request fails
+        """
+        self.clients = clients
+        self.timeout = timeout
+        self.handlers: Dict[str, Set[int]] = {}
+        self.pending: Dict[str, PendingRequest] = {}
+        self._ids = itertools.count(1)
+        self.requests = 0
+        self.replies = 0
+        self.no_handler = 0
+        self.timeouts = 0
+
+    def register(self, client_id: int, actions):
+        for action in actions:
+            self.handlers.setdefault(action, set()).add(client_id)
+
+    def unregister(self, client_id: int, actions):
+        for action in actions:
+            handlers = self.handlers.get(action)
+            if handlers is None:
+                continue
+            handlers.discard(client_id)
+            if not handlers:
+                del self.handlers[action]
+
+    def drop_client(self, client_id: int):
+        """Forget a disconnected client's registrations."""
+        for action in list(self.handlers):
+            self.handlers[action].discard(client_id)
+            if not self.handlers[action]:
+                del self.handlers[action]
+
+    def route(self, client: Any, data: Optional[dict]) -> bool:
+        """
+        Handle a request or reply from a client.
+        Returns True if the message was routed here and must not be broadcast.
+        """
+        if is_reply(data):
+            self._reply(data)
+            return True
+        if is_request(data):
+            self._request(client, data)
+            return True
+        return False
+
+    def _request(self, client: Any, data: dict):
+        self.requests += 1
+        action = data["action"]
+        handlers = [self.clients[i] for i in self.handlers.get(action, ()) if i in self.clients]
+        if not handlers:
+            self.no_handler += 1
+            self._error(client.id, data["request_id"], action, "no_handler")
+            return
+        relay_id = str(next(self._ids))
+        timer = asyncio.get_running_loop().call_later(self.timeout, self._expire, relay_id)
+        self.pending[relay_id] = PendingRequest(client.id, data["request_id"], action, timer)
+        forwarded = json.dumps(dict(data, request_id=relay_id))
+        for handler in handlers:
+            handler.enqueue(forwarded, None)
+
+    def _reply(self, data: dict):
+        # The first reply answers the request; later ones (several handlers) are dropped
+        request = self.pending.pop(str(data["reply_to"]), None)
+        if request is None:
+            logger.debug(f"Dropping late or unknown reply to {data['reply_to']}")
+            return
+        request.timer.cancel()
+        self.replies += 1
+        requester = self.clients.get(request.requester_id)
+        if requester is None:
+            return
+        reply = {key: value for key, value in data.items() if key != "reply_to"}
+        reply["request_id"] = request.request_id
+        if "error" in reply and "type" not in reply:
+            reply.update(type="rpc_error", action=request.action)
+        requester.enqueue(json.dumps(reply), None)
+
+    def _expire(self, relay_id: str):
+        request = self.pending.pop(relay_id, None)
+        if request is None:
+            return
+        self.timeouts += 1
+        logger.warning(f"No reply to {request.action} within {self.timeout}s")
+        self._error(request.requester_id, request.request_id, request.action, "timeout")
+
+    def _error(self, client_id: int, request_id: Any, action: str, error: str):
+        client = self.clients.get(client_id)
+        if client is not None:
+            client.enqueue(json.dumps({"type": "rpc_error", "request_id": request_id,
+                                       "action": action, "error": error}), None)
+
+    def stats(self) -> dict:
+        return {
+            "actions": {action: len(ids) for action, ids in self.handlers.items()},
+            "pending": len(self.pending),
+            "requests": self.requests,
+            "replies": self.replies,
+            "no_handler": self.no_handler,
+            "timeouts": self.timeouts,
+        }
@@ -6,8 +6,11 @@ import json
 import aiohttp
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
+from history_stream import HistoryStream, RESYNC_ACTION
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +30,9 @@ OVERLAY_WS_URL = "ws://localhost:6790"
 MMR_HISTORY_FILE = "data/rlrank_history.json"
 CHECK_INTERVAL = 150  # Check every 5 minutes (300 seconds)
 
+# Sends the MMR history once per connection, then only new entries
+history_stream = HistoryStream("rlrank_update", "mmr_history")
+
 # Maps for platform and playlist names to their IDs
 PLATFORM_MAP = {
     "steam": 1,
@@ -184,14 +190,12 @@ async def send_to_overlay(ws, current_mmr, mmr_history):
             logger.debug("WebSocket not in OPEN state. Message not sent.")
             return False
         
-        payload = {
-            "type": "rlrank_update",
-            "current_mmr": current_mmr,
-            "mmr_history": mmr_history
-        }
+        # No MMR yet (empty history): leave the overlay's current value alone
+        fields = {} if current_mmr is None else {"current_mmr": current_mmr}
+        payload = history_stream.encode(mmr_history, **fields)
         
         await ws.send(json.dumps(payload))
-        logger.info(f"Sent MMR update to overlay: {current_mmr} MMR, {len(mmr_history)} history entries")
+        logger.info(f"Sent MMR update to overlay ({payload['mode']}): {current_mmr} MMR, {len(mmr_history)} history entries")
         return True
     except websockets.exceptions.ConnectionClosed:
         logger.debug("WebSocket connection closed while sending. Will reconnect.")
@@ -246,26 +250,70 @@ async def check_and_update_rank(ws):
         await send_to_overlay(ws, current_mmr, mmr_history)
 
 
+def display_mmr_for(mmr_history, last_mmr):
+    """MMR to show: the last recorded one, else the newest history entry, else None (no points yet)."""
+    if last_mmr is not None:
+        return last_mmr
+    if mmr_history:
+        return mmr_history[-1].get('mmr')
+    return None
+
+
+async def listen_for_resync(ws):
+    """Send a full history keyframe whenever an overlay reports a gap."""
+    try:
+        async for message in ws:
+            try:
+                data = json.loads(message)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(data, dict) and history_stream.is_resync_request(data):
+                mmr_history, last_mmr = load_mmr_history()
+                history_stream.request_keyframe()
+                # An empty history still goes out as an (empty) keyframe
+                await send_to_overlay(ws, display_mmr_for(mmr_history, last_mmr), mmr_history)
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+async def stop_resync_listener(task: Optional[asyncio.Task]):
+    """Cancel the resync listener of a dropped connection and wait for it to finish."""
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
 async def connect_websocket():
     """Maintain a persistent WebSocket connection."""
     websocket = None
-    
+    resync_task = None  # listen_for_resync on the current connection
+
     while True:
         # Try to connect if not connected
         if websocket is None or websocket.state != websockets.State.OPEN:
+            # The old connection is gone; so is its listener
+            await stop_resync_listener(resync_task)
+            resync_task = None
             logger.info("Attempting to connect to WebSocket server...")
             try:
                 # Connect without using async with so we can manage the connection
                 websocket = await websockets.connect(OVERLAY_WS_URL)
                 logger.info("Connected to WebSocket server")
+                # Only listen for overlays asking for a full history resync
+                await websocket.send(json.dumps({"relay": "subscribe", "topics": [f"action:{RESYNC_ACTION}"]}))
+                resync_task = asyncio.create_task(listen_for_resync(websocket))
                 
                 # Send initial state on connection
+                history_stream.request_keyframe()
                 mmr_history, last_mmr = load_mmr_history()
                 # Send history if we have any (including padded entries)
                 if mmr_history:
                     # Use last MMR from history if available, otherwise use 1388 (padded value)
-                    display_mmr = last_mmr if last_mmr is not None else mmr_history[-1]['mmr']
-                    await send_to_overlay(websocket, display_mmr, mmr_history)
+                    await send_to_overlay(websocket, display_mmr_for(mmr_history, last_mmr), mmr_history)
                 
                 # Perform initial rank check
                 await check_and_update_rank(websocket)
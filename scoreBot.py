@@ -12,6 +12,7 @@ import aiohttp
 import json
 from datetime import datetime, timezone
 from baseBot import BaseBot
+from message_cache import cached_classifier
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +21,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Look for +2 or -2 patterns (use only the first occurrence)
+SCORE_PATTERN = re.compile(r'[+-]2')
+MENTIONS_PATTERN = re.compile(r'@(\w+)')
+
+
+@cached_classifier("score")
+def parse_score(message_content: str) -> Optional[tuple]:
+    """
+    Extract the score change and the first mentioned user from a message.
+
+    Args:
+        message_content: The content of the message
+
+    Returns:
+        tuple: (score_change, mentioned_user or None) or None if no score found
+    """
+    first_match = SCORE_PATTERN.search(message_content)
+    if not first_match:
+        return None
+    total_change = 2 if first_match.group(0) == '+2' else -2
+    mention = MENTIONS_PATTERN.search(message_content)
+    return (total_change, mention.group(1) if mention else None)
+
+
 class ScoreBot(BaseBot):
     def __init__(self, overlay_ws_url: str = "ws://localhost:6790"):
         """
@@ -112,27 +137,17 @@ class ScoreBot(BaseBot):
         Returns:
             tuple: (score_change, target_user) or None if no valid score found
         """
-        # Look for +2 or -2 patterns (use only the first occurrence)
-        score_pattern = r'[+-]2'
-        mentions_pattern = r'@(\w+)'
-        
-        # Find the first score change only
-        first_match = re.search(score_pattern, message_content)
-        if not first_match:
+        parsed = parse_score(message_content)
+        if parsed is None:
             return None
+        total_change, mention = parsed
 
-        match = first_match.group(0)
-        total_change = 2 if match == '+2' else -2
-            
-        # Find mentioned users
-        mentions = re.findall(mentions_pattern, message_content)
-        
         # If no mentions, apply to broadcaster
-        if not mentions:
+        if mention is None:
             target_user = self.get_canonical_name(self.broadcaster_name)
         else:
             # Use the first mentioned user
-            target_user = self.get_canonical_name(mentions[0])
+            target_user = self.get_canonical_name(mention)
         
         # Prevent users from adjusting their own score (case-insensitive)
         if author_name.lower() == target_user.lower():
@@ -1,8 +1,17 @@
 import asyncio
+import json
+import time
 import websockets
 import logging
+from collections import deque, OrderedDict
 from datetime import datetime
-from typing import Set, Any
+from typing import Dict, Optional, Set, Any
+
+from audio_store import AUDIO_PORT, AudioBlobCache, start_audio_server
+from relay_compression import COMPRESSION_LEVEL, COMPRESSION_MIN_SIZE, SizeAwareDeflateFactory, compression_extension
+from relay_metrics import RelayMetrics, add_metrics_routes
+from relay_rpc import RpcRouter
+from relay_protocol import COALESCE_TYPES, parse_message, message_topic, is_delta, coalesce_key
 
 # Configure logging
 logging.basicConfig(
@@ -12,20 +21,398 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+RELAY_HOST = "localhost"
+RELAY_PORT = 6790
+
+# Topic that matches every message, including ones without a topic
+WILDCARD_TOPIC = "*"
+
+# Per-client outbound queue limits
+MAX_CLIENT_QUEUE = 256  # Messages buffered per client before the oldest are dropped
+SEND_TIMEOUT = 10.0     # Seconds a single send may stall before the client is disconnected as a slow consumer
+
+# Per-message debug logging is sampled so it stays cheap under load
+LOG_SAMPLE_EVERY = 100
+
+# Replay ring buffer for resumable sessions: clients that reconnect within these
+# bounds get exactly the messages they missed
+REPLAY_MAX_MESSAGES = 2000
+REPLAY_MAX_BYTES = 4 * 2**20
+
+# Identifies this relay run; sequence numbers from a previous run can't be resumed
+RELAY_EPOCH = format(int(time.time() * 1000), "x")
+
+# Messages whose latest value is cached and replayed to overlays when they subscribe.
+# COUNT is cached but not coalesced: every count is shown, but only the last one is state.
+STATE_TYPES = COALESCE_TYPES | {"COUNT"}
+
+# Event types that end a piece of state, so a reloaded overlay doesn't show a finished game
+STATE_CLEARED_BY = {
+    "bomb_exploded": ["bomb_update"],
+    "bomb_reset": ["bomb_update"],
+    "vip_winner": ["vip_update"],
+    "vip_reset": ["vip_update"],
+}
+
+
+class RelayClient:
+    def __init__(self, websocket: Any):
+        """
+        A connected overlay or bot.
+
+        Args:
+            websocket: The client's WebSocket connection
+        """
+        self.websocket = websocket
+        self.id = id(websocket)
+        self.remote = websocket.remote_address
+        self.connected_at = time.time()
+        # None means the client never subscribed and receives every message (legacy behaviour)
+        self.topics: Optional[Set[str]] = None
+        self.prefixes: Set[str] = set()
+        # Resumable clients get every message as JSON carrying its "rseq"
+        self.resumable = False
+        # Negotiated permessage-deflate, None if the client didn't offer it
+        self.compression = compression_extension(websocket)
+
+        # Outbound queue of [coalesce_key, message, enqueued_at] slots, drained by writer()
+        self.queue: deque = deque()
+        self.pending: Dict[str, list] = {}  # coalesce_key -> queued slot
+        self.wakeup = asyncio.Event()
+        self.writer_task: Optional[asyncio.Task] = None
+
+        # Slow-consumer metrics
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.last_latency = 0.0
+        self.avg_latency = 0.0
+        self.max_latency = 0.0
+
+    def enqueue(self, message: Any, coalesce_key: Optional[str] = None):
+        """Queue a message without waiting for the client."""
+        if coalesce_key is not None:
+            slot = self.pending.get(coalesce_key)
+            if slot is not None:
+                # Replace the stale value in place; it keeps its queue position
+                slot[1] = message
+                self.coalesced += 1
+                return
+        if len(self.queue) >= MAX_CLIENT_QUEUE:
+            old_key, _, _ = self.queue.popleft()
+            if old_key is not None:
+                self.pending.pop(old_key, None)
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 100 == 0:
+                logger.warning(f"Client {self.id} is falling behind; dropped {self.dropped} messages so far")
+        slot = [coalesce_key, message, time.monotonic()]
+        self.queue.append(slot)
+        if coalesce_key is not None:
+            self.pending[coalesce_key] = slot
+        if len(self.queue) > self.max_depth:
+            self.max_depth = len(self.queue)
+        self.wakeup.set()
+
+    async def writer(self):
+        """Drain the outbound queue, disconnecting the client if a send stalls."""
+        while True:
+            if not self.queue:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            key, message, enqueued_at = self.queue.popleft()
+            if key is not None:
+                self.pending.pop(key, None)
+            try:
+                await asyncio.wait_for(self.websocket.send(message), timeout=SEND_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"Client {self.id} stalled for {SEND_TIMEOUT}s; disconnecting slow consumer ({self.stats()})")
+                asyncio.ensure_future(self.websocket.close(code=1013, reason="slow consumer"))
+                return
+            except websockets.exceptions.ConnectionClosed:
+                logger.warning(f"Connection to client {self.id} closed. Message not sent.")
+                return
+            except Exception as e:
+                logger.error(f"Error sending message to client {self.id}: {str(e)}")
+                continue
+            self.sent += 1
+            self.last_latency = time.monotonic() - enqueued_at
+            self.avg_latency += (self.last_latency - self.avg_latency) * 0.1
+            if self.last_latency > self.max_latency:
+                self.max_latency = self.last_latency
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self.queue),
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "last_latency_ms": round(self.last_latency * 1000, 2),
+            "avg_latency_ms": round(self.avg_latency * 1000, 2),
+            "max_latency_ms": round(self.max_latency * 1000, 2),
+        }
+
+    def describe(self) -> dict:
+        """Identity, subscriptions and queue stats for /metrics."""
+        if self.topics is None:
+            topics = None
+        else:
+            topics = sorted(self.topics | {prefix + "*" for prefix in self.prefixes})
+        return dict({
+            "id": self.id,
+            "remote": str(self.remote),
+            "connected_for": round(time.time() - self.connected_at, 1),
+            "topics": topics,
+            "resumable": self.resumable,
+            "compression": self.compression.stats() if self.compression else None,
+        }, **self.stats())
+
+    def subscribe(self, topics):
+        if self.topics is None:
+            self.topics = set()
+        for topic in topics:
+            if topic != WILDCARD_TOPIC and topic.endswith("*"):
+                self.prefixes.add(topic[:-1])
+            else:
+                self.topics.add(topic)
+
+    def unsubscribe(self, topics):
+        if self.topics is None:
+            return
+        for topic in topics:
+            if topic != WILDCARD_TOPIC and topic.endswith("*"):
+                self.prefixes.discard(topic[:-1])
+            else:
+                self.topics.discard(topic)
+
+    def wants(self, topic: Optional[str]) -> bool:
+        """Whether a message with this topic should be delivered to the client."""
+        if self.topics is None or WILDCARD_TOPIC in self.topics:
+            return True
+        if topic is None:
+            return False
+        if topic in self.topics:
+            return True
+        return any(topic.startswith(prefix) for prefix in self.prefixes)
+
+
+# TTS clips served over HTTP next to the relay, so only their URL goes through it
+audio_cache = AudioBlobCache()
+
 # Store connected clients
-connected_clients: Set[Any] = set()
+connected_clients: Dict[int, RelayClient] = {}
+metrics = RelayMetrics()
+# Overlay action requests and bot replies (relay_rpc.py)
+rpc = RpcRouter(connected_clients)
+
+# Last message per state key ("type" or "type/key") -> (topic, message, seq), in arrival order
+state_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+# Sequence number of the last relayed message, and the recent (seq, topic, message, size) history
+relay_seq = 0
+replay_buffer: deque = deque()
+replay_bytes = 0
+
+
+def next_seq() -> int:
+    global relay_seq
+    relay_seq += 1
+    return relay_seq
+
+
+def stamp(message: Any, seq: int) -> Any:
+    """
+    Add "rseq" to a JSON object message by splicing the text, so the payload
+    isn't re-serialised.
+    """
+    body = message.lstrip()[1:].lstrip()
+    if body.startswith("}"):
+        return f'{{"rseq": {seq}}}'
+    return f'{{"rseq": {seq}, ' + body
+
+
+def for_client(client: RelayClient, message: Any, seq: int) -> Any:
+    """Resumable clients need every message numbered, so plain text is wrapped for them."""
+    if client.resumable and not (isinstance(message, str) and message.startswith('{"rseq"')):
+        return json.dumps({"rseq": seq, "text": message})
+    return message
+
+
+def remember(seq: int, topic: Optional[str], message: Any):
+    """Append to the replay ring buffer, evicting by count and by bytes."""
+    global replay_bytes
+    # Text frames are counted in UTF-8 bytes: emotes and other non-ASCII chat are several bytes per character
+    size = len(message.encode()) if isinstance(message, str) else len(message)
+    replay_buffer.append((seq, topic, message, size))
+    replay_bytes += size
+    while replay_buffer and (len(replay_buffer) > REPLAY_MAX_MESSAGES or replay_bytes > REPLAY_MAX_BYTES):
+        _, _, _, old_size = replay_buffer.popleft()
+        replay_bytes -= old_size
+
+
+def resume_session(client: RelayClient, resume: Any) -> Optional[int]:
+    """
+    Replay what a reconnecting client missed since {"epoch": ..., "seq": ...}.
+    Returns the number of messages queued, or None if the gap can't be
+    covered (other relay run, or older than the ring buffer).
+    """
+    if not isinstance(resume, dict) or resume.get("epoch") != RELAY_EPOCH:
+        return None
+    last_seq = resume.get("seq")
+    if not isinstance(last_seq, int):
+        return None
+    oldest = replay_buffer[0][0] if replay_buffer else relay_seq + 1
+    if last_seq < oldest - 1 or last_seq > relay_seq:
+        return None
+    missed = [(seq, topic, message) for seq, topic, message, _ in replay_buffer
+              if seq > last_seq and client.wants(topic)]
+    send_session(client, resumed=True, replayed=len(missed))
+    for seq, topic, message in missed:
+        data = parse_message(message)
+        client.enqueue(for_client(client, message, seq), coalesce_key(topic, data))
+    return len(missed)
+
+
+def send_session(client: RelayClient, resumed: bool, replayed: int = 0):
+    """Tell a resumable client which relay run it is on and where the sequence stands."""
+    client.enqueue(json.dumps({
+        "type": "relay_session",
+        "epoch": RELAY_EPOCH,
+        "seq": relay_seq,
+        "resumed": resumed,
+        "replayed": replayed,
+    }), None)
+
+
+def state_key(topic: Optional[str], data: Optional[dict]) -> Optional[str]:
+    """Key under which a message is kept in the state cache, or None if it is a one-off event."""
+    if topic not in STATE_TYPES or is_delta(data):
+        return None
+    if data is not None and data.get("key") is not None:
+        return f"{topic}/{data['key']}"
+    return topic
+
+
+def update_state(topic: Optional[str], data: Optional[dict], message: Any, seq: int = 0):
+    """Record the latest value of a state message (and drop state ended by an event)."""
+    for cleared in STATE_CLEARED_BY.get(topic, ()):
+        for key in [k for k in state_cache if k == cleared or k.startswith(cleared + "/")]:
+            del state_cache[key]
+    key = state_key(topic, data)
+    if key is not None:
+        state_cache[key] = (topic, message, seq)
+        state_cache.move_to_end(key)
+
+
+def send_snapshot(client: RelayClient) -> int:
+    """Queue the cached state the client is subscribed to. Returns the number of messages queued."""
+    count = 0
+    for key, (topic, message, seq) in list(state_cache.items()):
+        if client.wants(topic):
+            client.enqueue(for_client(client, message, seq), key if topic in COALESCE_TYPES else None)
+            count += 1
+    return count
+
+
+def handle_control(client: RelayClient, data: dict) -> bool:
+    """
+    Handle relay control messages such as
+    {"relay": "subscribe", "topics": ["bomb_update", "action:*"]}.
+    Returns True if the message was a control message (and must not be relayed).
+    """
+    command = data.get("relay")
+    if not command:
+        return False
+    topics = data.get("topics") or []
+    if isinstance(topics, str):
+        topics = [topics]
+    if command == "subscribe":
+        client.subscribe(topics)
+        logger.info(f"Client {client.id} subscribed to {sorted(client.topics | {p + '*' for p in client.prefixes})}")
+        # {"resume": true} opts into numbered messages; {"resume": {"epoch", "seq"}} also
+        # asks for everything missed since then
+        resume = data.get("resume")
+        if resume is not None:
+            client.resumable = True
+            resumed = resume_session(client, resume)
+            if resumed is not None:
+                logger.info(f"Client {client.id} resumed from seq {resume['seq']}, replayed {resumed} messages")
+                return True
+            send_session(client, resumed=False)
+        # Hydrate the overlay immediately from the last known state
+        replayed = send_snapshot(client)
+        if replayed:
+            logger.info(f"Sent {replayed} cached state messages to client {client.id}")
+    elif command == "register":
+        # Bots declare the overlay requests they answer: {"relay": "register", "actions": ["get_king"]}
+        actions = data.get("actions") or []
+        if isinstance(actions, str):
+            actions = [actions]
+        rpc.register(client.id, actions)
+        logger.info(f"Client {client.id} handles requests {sorted(actions)}")
+    elif command == "unregister":
+        # A bot stops answering some requests (e.g. a hosted module was disabled)
+        actions = data.get("actions") or []
+        if isinstance(actions, str):
+            actions = [actions]
+        rpc.unregister(client.id, actions)
+        logger.info(f"Client {client.id} no longer handles requests {sorted(actions)}")
+    elif command == "unsubscribe":
+        client.unsubscribe(topics)
+    elif command == "clock":
+        # Clock sync for deadline timers (countdown.py): echo the client's send time with ours
+        client.enqueue(json.dumps({"type": "clock", "t0": data.get("t0"), "server_time": time.time()}), None)
+    elif command == "compression":
+        # {"relay": "compression", "min_size": 4096} raises the threshold; null turns compression off
+        if client.compression is None:
+            logger.warning(f"Client {client.id} asked for compression but didn't negotiate permessage-deflate")
+        else:
+            min_size = data.get("min_size")
+            # bool is an int subclass; true/false are not sizes
+            if min_size is not None and (isinstance(min_size, bool) or not isinstance(min_size, int) or min_size < 0):
+                logger.warning(f"Ignoring invalid compression min_size from client {client.id}: {min_size!r}")
+            else:
+                client.compression.min_size = min_size
+                logger.info(f"Client {client.id} compression threshold set to {client.compression.min_size}")
+    elif command == "snapshot":
+        send_snapshot(client)
+    elif command == "clear_state":
+        # Bots can drop state explicitly, e.g. {"relay": "clear_state", "keys": ["bomb_update"]}
+        for key in data.get("keys") or []:
+            state_cache.pop(key, None)
+    else:
+        logger.warning(f"Unknown relay command from client {client.id}: {command}")
+    return True
+
 
 async def handler(websocket: Any) -> None:
     """Handle individual WebSocket connections."""
-    client_id = id(websocket)
+    client = RelayClient(websocket)
+    client_id = client.id
     remote = websocket.remote_address
     logger.info(f"New client connected! (ID: {client_id}, Remote: {remote})")
-    connected_clients.add(websocket)
-    
+    connected_clients[client_id] = client
+    metrics.record_connect()
+    client.writer_task = asyncio.create_task(client.writer())
+
     try:
         async for message in websocket:
             # logger.info(f"Received message from client {client_id}: {message}")
-            await broadcast(message, sender_id=client_id)
+            data = parse_message(message)
+            if data is not None and handle_control(client, data):
+                continue
+            topic = message_topic(message, data)
+            metrics.record_message(topic, len(message))
+            if rpc.route(client, data):
+                continue
+            seq = next_seq()
+            if isinstance(data, dict):
+                message = stamp(message, seq)
+            remember(seq, topic, message)
+            update_state(topic, data, message, seq)
+            broadcast(message, sender_id=client_id, topic=topic, key=coalesce_key(topic, data), seq=seq)
     except websockets.exceptions.ConnectionClosedError as e:
         logger.error(f"Client {client_id} disconnected unexpectedly: {str(e)}")
     except websockets.exceptions.ConnectionClosedOK:
@@ -35,54 +422,88 @@ async def handler(websocket: Any) -> None:
     except Exception as e:
         logger.error(f"Unexpected error with client {client_id}: {str(e)}", exc_info=True)
     finally:
-        if websocket in connected_clients:
-            connected_clients.remove(websocket)
-            logger.info(f"Client {client_id} removed from connected clients")
-
-async def broadcast(message: str, sender_id: int = None) -> None:
-    """Broadcast message to all connected clients except the sender."""
-    if not connected_clients:
-        logger.warning("No connected clients to broadcast to")
-        return
-
-    tasks = []
-    for client in connected_clients:
-        if id(client) != sender_id:  # Don't send back to the sender
-            tasks.append(asyncio.create_task(send_message(client, message)))
-    
-    if tasks:
-        await asyncio.gather(*tasks, return_exceptions=True)
-        logger.info(f"Broadcasted message to {len(tasks)} clients")
-
-async def send_message(ws: Any, message: str) -> None:
-    """Send a message to a specific WebSocket client."""
-    try:
-        await ws.send(message)
-    except websockets.exceptions.ConnectionClosedOK:
-        logger.warning(f"Connection to client {id(ws)} closed. Message not sent.")
-    except Exception as e:
-        logger.error(f"Error sending message to client {id(ws)}: {str(e)}")
+        client.writer_task.cancel()
+        metrics.record_disconnect()
+        rpc.drop_client(client_id)
+        if connected_clients.pop(client_id, None) is not None:
+            logger.info(f"Client {client_id} removed from connected clients ({client.stats()})")
+
+def broadcast(message: str, sender_id: int = None, topic: Optional[str] = None, key: Optional[str] = None,
+              seq: int = 0) -> int:
+    """
+    Queue a message for every subscriber of its topic except the sender.
+    Never waits on a client; each client's writer task delivers at its own pace.
+    Returns the number of clients the message was queued for.
+    """
+    recipients = 0
+    for client in connected_clients.values():
+        if client.id != sender_id and client.wants(topic):  # Don't send back to the sender
+            client.enqueue(for_client(client, message, seq), key)
+            recipients += 1
 
-async def main() -> None:
-    """Main function to start the WebSocket server."""
+    # Sampled: logging every message costs more than relaying it
+    if metrics.messages_total % LOG_SAMPLE_EVERY == 0 and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Broadcasted {topic or 'untyped'} message to {recipients} clients "
+                     f"(1 in {LOG_SAMPLE_EVERY} logged, {metrics.messages_total} total)")
+    return recipients
+
+def health() -> dict:
+    """Extra /healthz fields: who is connected and whether anyone is falling behind."""
+    return {
+        "clients": len(connected_clients),
+        "slow_clients": sum(1 for client in connected_clients.values() if len(client.queue) >= MAX_CLIENT_QUEUE // 2),
+        "epoch": RELAY_EPOCH,
+        "seq": relay_seq,
+        "state_keys": len(state_cache),
+        "replay_buffer": {"messages": len(replay_buffer), "bytes": replay_bytes},
+        "audio": audio_cache.stats(),
+        "rpc": rpc.stats(),
+    }
+
+
+def add_relay_routes(app):
+    """Serve /metrics and /healthz from the relay's HTTP server."""
+    add_metrics_routes(app, metrics, lambda: connected_clients.values(), health)
+
+
+async def main(host: str = RELAY_HOST, port: int = RELAY_PORT, audio_port: Optional[int] = AUDIO_PORT) -> None:
+    """
+    Main function to start the WebSocket server.
+
+    Args:
+        host: Interface to listen on
+        port: WebSocket port
+        audio_port: Port for the audio blob server, or None to run without it
+    """
+    runner = None
     try:
+        if audio_port is not None:
+            try:
+                runner = await start_audio_server(audio_cache, host, audio_port, setup=add_relay_routes)
+            except Exception as e:
+                logger.error(f"Audio blob server unavailable: {e}")
         async with websockets.serve(
             handler,
-            "localhost",
-            6790,
+            host,
+            port,
             ping_interval=20,  # Keep connections alive
             ping_timeout=20,
             close_timeout=10,
-            max_size=10 * 2**20,  # 10MB max message size (for base64 audio data)
+            max_size=2**20,  # 1MB max message size (audio goes through the blob server)
             max_queue=32,    # Max number of messages in queue
-            compression=None  # Disable compression for simplicity
+            # Size-aware permessage-deflate instead of the default one (relay_compression.py)
+            compression=None,
+            extensions=[SizeAwareDeflateFactory(min_size=COMPRESSION_MIN_SIZE, level=COMPRESSION_LEVEL)],
         ) as server:
-            logger.info("WebSocket server started on ws://localhost:6790")
+            logger.info(f"WebSocket server started on ws://{host}:{port}")
             logger.info("Waiting for connections...")
             await asyncio.Future()  # run forever
     except Exception as e:
         logger.error(f"Server error: {str(e)}", exc_info=True)
         raise
+    finally:
+        if runner is not None:
+            await runner.cleanup()
 
 if __name__ == "__main__":
     try:
@@ -90,4 +511,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("Server shutdown initiated by user")
     except Exception as e:
-        logger.error(f"Fatal server error: {str(e)}", exc_info=True)
\ No newline at end of file
+        logger.error(f"Fatal server error: {str(e)}", exc_info=True)
@@ -0,0 +1,224 @@
+"""
+Declarative streak games (pray/polish/type trains, counting, emote streaks).
+
+A StreakRule says which messages extend a streak, which ones the game
+ignores, how repeat users are treated, who is exempt and how timeouts
+escalate. StreakEngine runs every active rule against one shared
+MessageView per chat message, synchronously. Callers update state
+without awaiting anything and queue the side effects the returned
+StreakEvents ask for.
+"""
+
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from keyword_matcher import PREFIX, KeywordMatcher
+from message_cache import cached_classifier
+
+# How a user who already extended the current streak is treated
+REPEAT_ALLOWED = "allowed"  # counts again
+REPEAT_IGNORED = "ignored"  # neither extends nor breaks the streak
+REPEAT_BREAKS = "breaks"    # breaks the streak
+
+ROLE_BROADCASTER = "broadcaster"
+ROLE_MOD = "mod"
+
+
+@cached_classifier("streak_view")
+def _normalize(content: str):
+    text = content.strip()
+    return text, text.lower(), int(text) if text.isdecimal() else None
+
+
+class MessageView:
+    __slots__ = ("content", "text", "folded", "number", "username", "user_id", "roles")
+
+    def __init__(self, content: str, username: str, user_id: Optional[str], roles: Iterable[str] = ()):
+        """
+        A chat message normalized once and shared by every rule.
+
+        Args:
+            content: Raw message text
+            username: Author display name
+            user_id: Author user ID
+            roles: Author roles (ROLE_BROADCASTER, ROLE_MOD, or game-specific ones like "king")
+        """
+        self.content = content
+        self.text, self.folded, self.number = _normalize(content)
+        self.username = username
+        self.user_id = user_id
+        self.roles: FrozenSet[str] = frozenset(roles)
+
+    @classmethod
+    def from_message(cls, message, extra_roles: Iterable[str] = ()) -> "MessageView":
+        """Build a view of a twitchio message."""
+        author = message.author
+        roles = set(extra_roles)
+        if getattr(author, "is_broadcaster", False):
+            roles.add(ROLE_BROADCASTER)
+        if getattr(author, "is_mod", False):
+            roles.add(ROLE_MOD)
+        return cls(message.content, author.display_name, author.id, roles)
+
+
+class StreakState:
+    def __init__(self):
+        self.count = 0
+        self.high = 0
+        self.users = set()
+
+    def reset(self):
+        self.count = 0
+        self.users.clear()
+
+
+class StreakEvent:
+    HIT = "hit"
+    BREAK = "break"
+
+    def __init__(self, rule: "StreakRule", kind: str, streak: int, state: StreakState, view: MessageView,
+                 timeout: Optional[int] = None, record: bool = False, repeat: bool = False):
+        """
+        Outcome of one rule for one message.
+
+        Args:
+            rule: The rule that fired
+            kind: HIT (streak extended) or BREAK
+            streak: Streak length after a hit, or the length that was broken
+            state: The rule's state after the update
+            view: The message
+            timeout: Seconds to time the author out for, or None
+            record: A hit that set a new high
+            repeat: A break caused by a repeat user
+        """
+        self.rule = rule
+        self.kind = kind
+        self.streak = streak
+        self.state = state
+        self.view = view
+        self.timeout = timeout
+        self.record = record
+        self.repeat = repeat
+
+
+class StreakRule:
+    def __init__(self,
+                 name: str,
+                 matches: Callable[[MessageView, StreakState], bool],
+                 applies: Optional[Callable[[MessageView], bool]] = None,
+                 repeat: str = REPEAT_ALLOWED,
+                 base: float = 7.5,
+                 growth: float = 2.0,
+                 offset: float = 1.0,
+                 cap: float = 86400,
+                 min_streak: int = 0,
+                 skip_roles: Iterable[str] = (),
+                 no_timeout_roles: Iterable[str] = (),
+                 skip_users: Iterable[str] = ()):
+        """
+        Args:
+            name: Unique rule name
+            matches: Whether a message extends the streak
+            applies: Whether the game looks at a message at all (default: every message);
+                messages it doesn't apply to neither extend nor break the streak
+            repeat: REPEAT_ALLOWED, REPEAT_IGNORED or REPEAT_BREAKS
+            base, growth, offset: Timeout for breaking a streak of n is base * growth**n + offset
+            cap: Longest timeout in seconds
+            min_streak: Streaks shorter than this are broken without a timeout
+            skip_roles: Authors with these roles are ignored entirely
+            no_timeout_roles: Authors with these roles break streaks but are never timed out
+            skip_users: Display names that are ignored entirely (bots)
+        """
+        self.name = name
+        self.matches = matches
+        self.applies = applies
+        self.repeat = repeat
+        self.base = base
+        self.growth = growth
+        self.offset = offset
+        self.cap = cap
+        self.min_streak = min_streak
+        self.skip_roles = frozenset(skip_roles)
+        self.no_timeout_roles = frozenset(no_timeout_roles)
+        self.skip_users = frozenset(skip_users)
+
+    def timeout_seconds(self, streak: int) -> Optional[int]:
+        """Escalating timeout for breaking a streak, or None below min_streak."""
+        if streak < self.min_streak:
+            return None
+        return int(min(self.base * (self.growth ** streak) + self.offset, self.cap))
+
+    def evaluate(self, view: MessageView, state: StreakState) -> Optional[StreakEvent]:
+        if view.username in self.skip_users or (self.skip_roles and self.skip_roles & view.roles):
+            return None
+        if self.applies is not None and not self.applies(view):
+            return None
+        seen = view.username in state.users
+        matched = self.matches(view, state)
+        if matched and seen:
+            if self.repeat == REPEAT_IGNORED:
+                return None
+            if self.repeat == REPEAT_BREAKS:
+                matched = False
+        if matched:
+            state.count += 1
+            state.users.add(view.username)
+            record = state.count > state.high
+            if record:
+                state.high = state.count
+            return StreakEvent(self, StreakEvent.HIT, state.count, state, view, record=record)
+        broken = state.count
+        state.reset()
+        timeout = None if self.no_timeout_roles & view.roles else self.timeout_seconds(broken)
+        return StreakEvent(self, StreakEvent.BREAK, broken, state, view, timeout=timeout, repeat=seen)
+
+
+def starts_with(*prefixes: str) -> Callable[[MessageView, StreakState], bool]:
+    """Predicate: the trimmed message starts with any of the prefixes (case-sensitive)."""
+    matcher = KeywordMatcher(prefixes, mode=PREFIX)
+    return lambda view, state: matcher.matches(view.text)
+
+
+def next_number(view: MessageView, state: StreakState) -> bool:
+    """Predicate for counting games: the message is the number after the current count."""
+    return view.number == state.count + 1
+
+
+def is_number(view: MessageView) -> bool:
+    return view.number is not None
+
+
+class StreakEngine:
+    def __init__(self):
+        """Runs all active StreakRules against each message in one pass."""
+        self.rules: Dict[str, StreakRule] = {}
+        self.states: Dict[str, StreakState] = {}
+
+    def start(self, rule: StreakRule, keep_high: bool = False) -> StreakState:
+        """Activate a rule (replacing one with the same name) with a fresh streak."""
+        old = self.states.get(rule.name)
+        state = StreakState()
+        if keep_high and old is not None:
+            state.high = old.high
+        self.rules[rule.name] = rule
+        self.states[rule.name] = state
+        return state
+
+    def stop(self, name: str) -> Optional[StreakState]:
+        """Deactivate a rule; returns its final state."""
+        self.rules.pop(name, None)
+        return self.states.pop(name, None)
+
+    def active(self, name: str) -> bool:
+        return name in self.rules
+
+    def state(self, name: str) -> Optional[StreakState]:
+        return self.states.get(name)
+
+    def process(self, view: MessageView) -> List[StreakEvent]:
+        """Update every active rule for one message; returns what happened."""
+        events = []
+        for name, rule in self.rules.items():
+            event = rule.evaluate(view, self.states[name])
+            if event is not None:
+                events.append(event)
+        return events
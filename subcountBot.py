@@ -169,6 +169,8 @@ class SubCountBot:
                     async with websockets.connect(OVERLAY_WS_URL) as websocket:
                         logger.info("Connected to WebSocket server")
                         self.ws = websocket
+                        # Producer only: don't receive other bots' relay traffic
+                        await websocket.send(json.dumps({"relay": "subscribe", "topics": []}))
                         await self.send_subcount_update()  # Send initial state
                         await websocket.wait_closed()
                         self.ws = None
@@ -417,6 +417,8 @@ async def _overlay_websocket_loop() -> None:
             if _overlay_ws is None or _overlay_ws.state != websockets.State.OPEN:
                 async with websockets.connect(OVERLAY_WS_URL) as ws:
                     _overlay_ws = ws
+                    # Producer only: don't receive other bots' relay traffic
+                    await ws.send(json.dumps({"relay": "subscribe", "topics": []}))
                     await _send_subcount_to_overlay()
                     await ws.wait_closed()
                     _overlay_ws = None
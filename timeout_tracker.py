@@ -0,0 +1,130 @@
+import heapq
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class TimeoutTracker:
+    def __init__(self):
+        """
+        Live index of active timeouts, ordered by expiry.
+
+        A min-heap keyed on the expiry epoch gives the soonest-to-expire users
+        without sorting; a dict keeps the authoritative entry per user so that
+        re-timeouts and untimeouts invalidate old heap nodes lazily.
+        """
+        self._heap: List[tuple] = []
+        self._entries: Dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_id: str) -> bool:
+        return str(user_id) in self._entries
+
+    def clear(self):
+        self._heap.clear()
+        self._entries.clear()
+
+    def add(self, user_id: str, username: str, expires_at: float, moderator: Optional[str] = None):
+        """
+        Record (or replace) a user's timeout.
+
+        Args:
+            user_id: The Twitch user ID
+            username: Display name/login used in overlay output
+            expires_at: Expiry as a UNIX timestamp
+            moderator: Who issued the timeout, if known
+        """
+        user_id = str(user_id)
+        self._entries[user_id] = {
+            "user_id": user_id,
+            "user": username,
+            "expires_at": expires_at,
+            "moderator": moderator,
+        }
+        heapq.heappush(self._heap, (expires_at, user_id))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # Too many stale nodes from re-timeouts/untimeouts; rebuild
+            self._heap = [(e["expires_at"], uid) for uid, e in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def remove(self, user_id: str) -> Optional[dict]:
+        """Forget a user's timeout (e.g. after an untimeout). The heap node is dropped lazily."""
+        return self._entries.pop(str(user_id), None)
+
+    def seed(self, items: List[dict], parse_time) -> int:
+        """
+        Replace the index with entries from the Helix banned-users list.
+        Permanent bans (no expires_at) are skipped.
+
+        Args:
+            items: Helix /moderation/banned items
+            parse_time: Callable turning an ISO-8601 string into a datetime
+
+        Returns:
+            int: Number of timeouts indexed
+        """
+        self.clear()
+        for it in items:
+            expires: Optional[datetime] = parse_time(it.get('expires_at', ''))
+            if not expires or not it.get('user_id'):
+                continue
+            self.add(
+                it['user_id'],
+                it.get('user_login') or it.get('user_name') or it['user_id'],
+                expires.timestamp(),
+                it.get('moderator_login') or it.get('moderator_name'),
+            )
+        return len(self._entries)
+
+    def _is_live(self, expires_at: float, user_id: str) -> bool:
+        entry = self._entries.get(user_id)
+        return entry is not None and entry["expires_at"] == expires_at
+
+    def _prune(self):
+        """Drop stale heap nodes from the top."""
+        while self._heap and not self._is_live(*self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def next_expiry(self) -> Optional[float]:
+        """Epoch of the soonest active expiry, or None when nobody is timed out."""
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_expired(self, now: Optional[float] = None) -> List[dict]:
+        """Remove and return every entry whose timeout has run out."""
+        now = time.time() if now is None else now
+        expired = []
+        while True:
+            self._prune()
+            if not self._heap or self._heap[0][0] > now:
+                return expired
+            _, user_id = heapq.heappop(self._heap)
+            expired.append(self._entries.pop(user_id))
+
+    def soonest(self, k: Optional[int] = None) -> List[dict]:
+        """
+        Active timeouts, soonest to expire first.
+
+        Args:
+            k: Only return the first k entries (None for all)
+        """
+        self._prune()
+        heap = self._heap
+        if k is None:
+            return [self._entries[user_id] for expires_at, user_id in sorted(heap)
+                    if self._is_live(expires_at, user_id)]
+
+        # Best-first walk of the heap's tree: only the nodes above the k-th
+        # live entry (and their direct children) are ever touched
+        result = []
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(result) < k:
+            node, index = heapq.heappop(frontier)
+            if self._is_live(*node):
+                result.append(self._entries[node[1]])
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return result
@@ -10,12 +10,16 @@ import json
 import os
 import hmac
 import hashlib
+import math
 from datetime import datetime, timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 from aiohttp import web
 import websockets
 
+from countdown import Countdown
+from history_stream import HistoryStream, RESYNC_ACTION
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,13 +46,15 @@ BITS_TIME_PER_100 = 72  # 72 seconds per 100 bits
 
 # Graph history duration (5 hours)
 GRAPH_HISTORY_HOURS = 5
+HISTORY_INTERVAL = 30  # seconds between graph points while the timer runs
 
 
 class TimerBot:
     def __init__(self):
-        self.timer_seconds = 0  # Current timer value in seconds
+        self.countdown = Countdown(running=True)  # Overlay counts down locally from its deadline
         self.total_subs = 0  # Total number of subs given
         self.timer_history = []  # History for graph (last 5 hours)
+        self.history_stream = HistoryStream("timer_update", "timer_history")
         self.ws = None
         self.webhook_app = None
         self.webhook_runner = None
@@ -111,9 +117,18 @@ class TimerBot:
         except Exception as e:
             logger.error(f"Error saving timer data: {e}")
     
+    @property
+    def timer_seconds(self):
+        """Whole seconds left on the timer."""
+        return math.ceil(self.countdown.remaining())
+
+    @timer_seconds.setter
+    def timer_seconds(self, seconds):
+        self.countdown.set(seconds)
+
     def add_time(self, seconds):
         """Add time to the timer."""
-        self.timer_seconds += seconds
+        self.countdown.add(seconds)
         logger.info(f"Added {seconds}s to timer. New total: {self.timer_seconds}s")
         self.update_timer_history()
         self.save_timer_data()
@@ -257,8 +272,12 @@ class TimerBot:
                     async with websockets.connect(OVERLAY_WS_URL) as websocket:
                         logger.info("Connected to WebSocket server")
                         self.ws = websocket
+                        # Only listen for overlays asking for a full history resync
+                        await websocket.send(json.dumps({"relay": "subscribe", "topics": [f"action:{RESYNC_ACTION}"]}))
+                        self.history_stream.request_keyframe()
                         await self.send_timer_update()  # Send initial state
-                        await websocket.wait_closed()
+                        async for message in websocket:
+                            await self.handle_overlay_message(message)
                         self.ws = None
                         logger.info("WebSocket connection closed")
                 else:
@@ -272,6 +291,17 @@ class TimerBot:
             
             await asyncio.sleep(2)
     
+    async def handle_overlay_message(self, message):
+        """Answer resync requests from overlays that missed a history delta."""
+        try:
+            data = json.loads(message)
+        except (TypeError, ValueError):
+            return
+        if isinstance(data, dict) and self.history_stream.is_resync_request(data):
+            logger.debug("Overlay requested a history resync")
+            self.history_stream.request_keyframe()
+            await self.send_timer_update()
+
     async def send_timer_update(self):
         """Send timer update to the overlay via WebSocket."""
         if self.ws is None or self.ws.state != websockets.State.OPEN:
@@ -279,12 +309,13 @@ class TimerBot:
             return False
         
         try:
-            payload = {
-                "type": "timer_update",
-                "timer_seconds": self.timer_seconds,
-                "total_subs": self.total_subs,
-                "timer_history": self.timer_history
-            }
+            # Full history only on connect/resync; otherwise just the new points
+            payload = self.history_stream.encode(
+                self.timer_history,
+                timer_seconds=self.timer_seconds,
+                total_subs=self.total_subs,
+                countdown=self.countdown.to_message(),
+            )
             
             await self.ws.send(json.dumps(payload))
             logger.debug(f"Sent timer update: {self.timer_seconds}s remaining, {self.total_subs} subs")
@@ -298,36 +329,20 @@ class TimerBot:
             return False
     
     async def timer_countdown_loop(self):
-        """Background task that counts down the timer and updates the overlay."""
-        last_history_update = datetime.now()
+        """
+        Background task that adds a graph point every HISTORY_INTERVAL while the
+        timer runs. The overlay counts down on its own from the deadline, so
+        updates are only sent when the graph or the timer actually changes.
+        """
         while True:
+            await asyncio.sleep(HISTORY_INTERVAL)
             try:
-                # Count down if timer is positive
-                if self.timer_seconds > 0:
-                    self.timer_seconds -= 1
-                    # Ensure timer doesn't go negative
-                    if self.timer_seconds < 0:
-                        self.timer_seconds = 0
-                    
-                    # Update history every 30 seconds to show smooth graph
-                    now = datetime.now()
-                    if (now - last_history_update).total_seconds() >= 30:
-                        self.update_timer_history()
-                        self.save_timer_data()
-                        last_history_update = now
-                    
-                    # Send update every second
+                if self.timer_seconds > 0 or (self.timer_history and self.timer_history[-1]['timer_seconds'] > 0):
+                    self.update_timer_history()
+                    self.save_timer_data()
                     await self.send_timer_update()
-                else:
-                    # Timer is at 0, just send periodic updates (every 10 seconds to reduce load)
-                    await self.send_timer_update()
-                    await asyncio.sleep(10)
-                    continue
-                
-                await asyncio.sleep(1)
             except Exception as e:
                 logger.error(f"Error in timer countdown loop: {e}")
-                await asyncio.sleep(1)
     
     async def start(self):
         """Start the bot."""
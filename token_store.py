@@ -0,0 +1,146 @@
+import os
+import json
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    def __init__(self, path: Path):
+        """
+        Exclusive inter-process lock backed by a lock file.
+        Uses fcntl on POSIX and msvcrt on Windows.
+
+        Args:
+            path: Path of the lock file (created if missing)
+        """
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+
+    def acquire(self):
+        """Block until the lock is held by this process."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.name == "nt":
+                # msvcrt.LK_LOCK retries for ~10 s; loop until we get it
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def try_acquire(self) -> bool:
+        """Take the lock if it is free right now; never blocks."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.name == "nt":
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    async def acquire_async(self, poll_interval: float = 0.05):
+        """
+        Wait for the lock without blocking the event loop. Cancelling the
+        waiting task never leaves the lock held, since nothing is taken
+        outside of try_acquire.
+        """
+        while not self.try_acquire():
+            await asyncio.sleep(poll_interval)
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if os.name == "nt":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def atomic_write_text(path: Path, text: str):
+    """Write a file via a temp file + rename so readers never see a partial write."""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent or ".", prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class SharedTokenStore:
+    def __init__(self, path: str = ".twitch_tokens.json"):
+        """
+        Token state shared by every bot process on this machine.
+
+        Holds the access token, refresh token and absolute expiry so that a
+        freshly started bot can reuse a still-valid token, and so that only
+        one process refreshes while the others pick up its result.
+
+        Args:
+            path: Path of the JSON store; the lock file sits next to it
+        """
+        self.path = Path(path)
+        self.lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+
+    def read(self) -> Optional[dict]:
+        """Return the stored tokens, or None if the store is missing or unreadable."""
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("access_token") and data.get("refresh_token"):
+                return data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not read token store {self.path}: {e}")
+        return None
+
+    def write(self, access_token: str, refresh_token: str, expires_at: float):
+        """Atomically persist tokens. Callers should hold the lock."""
+        atomic_write_text(self.path, json.dumps({
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "expires_at": expires_at,
+        }, indent=2))
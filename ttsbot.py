@@ -6,6 +6,8 @@ import random
 logger = logging.getLogger(__name__)
 
 class TTSBot(BaseBot):
+    OVERLAY_REQUESTS = ["get_tts_master"]
+
     def __init__(self):
         """
         Initialize the TTS bot.
@@ -62,6 +64,7 @@ class TTSBot(BaseBot):
         try:
             if hasattr(self, 'ws') and self.ws:
                 message = {
+                    "type": "tts_master",
                     "tts_master": self.tts_master
                 }
                 await self.ws.send(json.dumps(message))
@@ -69,6 +72,12 @@ class TTSBot(BaseBot):
         except Exception as e:
             logger.error(f"Error sending TTS master update: {e}")
 
+    async def on_websocket_request(self, action: str, data: dict):
+        """Answer 'get_tts_master' requests from the overlay."""
+        if action == "get_tts_master":
+            return {"type": "tts_master", "tts_master": self.tts_master}
+        return None
+
     async def upon_connection(self):
         """
         Called when WebSocket connection is established.
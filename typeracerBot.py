@@ -1,4 +1,5 @@
 import os
+import string
 import asyncio
 import websockets
 import logging
@@ -12,11 +13,20 @@ from credential_manager import CredentialManager
 import aiohttp
 from datetime import datetime, timezone
 from baseBot import BaseBot
+from message_cache import cached_classifier
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+STRIP_PUNCTUATION = str.maketrans('', '', string.punctuation)
+
+
+@cached_classifier("typeracer")
+def clean_word(text: str) -> str:
+    """Lowercase and drop punctuation, for comparing typed words."""
+    return text.strip().lower().translate(STRIP_PUNCTUATION)
+
 class TypeRacerBot(BaseBot):
     def __init__(self, overlay_ws_url: str = "ws://localhost:6790"):
         """
@@ -77,19 +87,17 @@ class TypeRacerBot(BaseBot):
             return
             
         current_word = self.words[self.current_word_index]
-        user_message = message.content.strip()
         
         # Check if user typed the correct word (case-insensitive, punctuation-aware)
         # Remove punctuation for comparison but keep original for display
-        import string
-        current_word_clean = current_word.lower().translate(str.maketrans('', '', string.punctuation))
-        user_message_clean = user_message.lower().translate(str.maketrans('', '', string.punctuation))
+        current_word_clean = clean_word(current_word)
+        user_message_clean = clean_word(message.content)
         # Removed noisy prints
 
         # Check if user typed the word before the current word (backtracking)
         if self.current_word_index > 0:
             previous_word = self.words[self.current_word_index - 1]
-            previous_word_clean = previous_word.lower().translate(str.maketrans('', '', string.punctuation))
+            previous_word_clean = clean_word(previous_word)
             if user_message_clean == previous_word_clean:
                 await self.speak(f"{message.author.name} messed up! Shame!")
                 await self._backtrack(reason="typed_previous_word", actor=message.author.name)
@@ -98,7 +106,7 @@ class TypeRacerBot(BaseBot):
         # Check if user typed the word after the current word (skipping ahead)
         if self.current_word_index < len(self.words) - 1:
             next_word = self.words[self.current_word_index + 1]
-            next_word_clean = next_word.lower().translate(str.maketrans('', '', string.punctuation))
+            next_word_clean = clean_word(next_word)
             if user_message_clean == next_word_clean:
                 await self.speak(f"{message.author.name} messed up! Shame!")
                 await self._backtrack(reason="typed_next_word", actor=message.author.name)
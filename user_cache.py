@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Helix /users accepts at most 100 login parameters per request
+MAX_LOGINS_PER_REQUEST = 100
+
+
+class UserIdCache:
+    def __init__(self,
+                 fetcher: Callable[[List[str]], Awaitable[Dict[str, str]]],
+                 max_entries: int = 10000,
+                 ttl: float = 86400,
+                 batch_window: float = 0.01):
+        """
+        Bounded login -> user ID cache. Entries are learned for free from chat
+        tags; misses are coalesced into batched Helix lookups.
+
+        Args:
+            fetcher: Coroutine taking up to 100 logins and returning {login: user_id}
+            max_entries: Maximum number of cached logins (least recently used evicted)
+            ttl: Seconds an entry stays valid (logins can be renamed)
+            batch_window: Seconds to wait for more misses before sending a batch
+        """
+        self.fetcher = fetcher
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.batch_window = batch_window
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+        self.batches = 0
+
+    @staticmethod
+    def _normalize(login: str) -> str:
+        return login.strip().lstrip('@').lower()
+
+    def learn(self, login: str, user_id: str):
+        """Record a login -> user ID mapping (e.g. from a chat message's tags)."""
+        if not login or not user_id:
+            return
+        key = self._normalize(login)
+        existing = self._entries.get(key)
+        if existing is None or existing[0] != user_id:
+            self.learned += 1
+        self._entries[key] = (str(user_id), time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, login: str) -> Optional[str]:
+        """Return a cached user ID without touching the network."""
+        key = self._normalize(login)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        user_id, expires = entry
+        if time.monotonic() >= expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return user_id
+
+    async def resolve(self, login: str) -> Optional[str]:
+        """
+        Resolve a login to a user ID, hitting Helix only on a cache miss.
+
+        Args:
+            login: The Twitch login (case-insensitive, leading @ allowed)
+
+        Returns:
+            str: The user's ID if found, None otherwise
+        """
+        cached = self.get(login)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        return await self._enqueue(self._normalize(login))
+
+    async def resolve_many(self, logins: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Resolve several logins at once; all misses share the same batch."""
+        logins = list(logins)
+        results = await asyncio.gather(*(self.resolve(login) for login in logins))
+        return dict(zip(logins, results))
+
+    def _enqueue(self, key: str) -> asyncio.Future:
+        future = self._pending.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending[key] = future
+        if len(self._pending) >= MAX_LOGINS_PER_REQUEST:
+            self._schedule_flush(0)
+        elif self._flush_handle is None:
+            self._schedule_flush(self.batch_window)
+        return future
+
+    def _schedule_flush(self, delay: float):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(delay, lambda: asyncio.ensure_future(self._flush()))
+
+    async def _flush(self):
+        """Send every pending miss to Helix in batches of up to 100 logins."""
+        self._flush_handle = None
+        while self._pending:
+            batch = dict(list(self._pending.items())[:MAX_LOGINS_PER_REQUEST])
+            for key in batch:
+                del self._pending[key]
+            self.batches += 1
+            try:
+                found = await self.fetcher(list(batch))
+            except Exception as e:
+                logger.error(f"Error resolving user IDs for {list(batch)}: {e}")
+                found = {}
+            for login, user_id in found.items():
+                self.learn(login, user_id)
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(self.get(key))
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "learned": self.learned,
+            "batches": self.batches,
+        }